@@ -0,0 +1,173 @@
+"""
+Wash-duration analytics and queue forecasting for the web app.
+Works on columnar NumPy extracts of the cars table (arrival and completion
+times as epoch seconds) instead of per-car Python loops. Results for a day
+are cached per day: today's figures are refreshed after TODAY_TTL seconds,
+past days (which only change through sync or resets) after PAST_TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from carwash_core import day_bounds
+from wait_times import MAX_SAMPLE_SECONDS
+
+PERCENTILES = (50, 75, 90, 95)
+QUEUE_STEP_SECONDS = 15 * 60
+HISTORY_DAYS = 28
+FORECAST_HOURS = 4
+TODAY_TTL = 60
+PAST_TTL = 3600
+CACHE_SIZE = 64
+
+EPOCH = datetime(1970, 1, 1)
+
+def to_seconds(values):
+    """Naive datetimes (None allowed) -> float64 seconds since EPOCH, NaN for None"""
+    stamps = np.array(values, dtype='datetime64[us]')  # None becomes NaT
+    seconds = stamps.astype(np.int64) / 1e6
+    seconds[np.isnat(stamps)] = np.nan
+    return seconds
+
+def load_columns(session, model, start, end):
+    """Arrival and completion times of cars that arrived in [start, end)"""
+    rows = (session.query(model.timestamp, model.completion_time)
+            .filter(model.timestamp >= start, model.timestamp < end)
+            .order_by(model.timestamp)
+            .all())
+    if not rows:
+        return np.empty(0), np.empty(0)
+    timestamps, completions = zip(*rows)
+    return to_seconds(timestamps), to_seconds(completions)
+
+def cycle_time_percentiles(arrivals, completions, percentiles=PERCENTILES):
+    """Percentiles of arrival-to-completion time in minutes (finished cars only)"""
+    durations = (completions - arrivals) / 60
+    durations = durations[~np.isnan(durations)]
+    if not durations.size:
+        return {f'p{p}': None for p in percentiles}
+    values = np.percentile(durations, percentiles)
+    return {f'p{p}': round(float(value), 1) for p, value in zip(percentiles, values)}
+
+def queue_length(arrivals, completions, start, end, step=QUEUE_STEP_SECONDS):
+    """Cars on site (arrived, not yet finished) sampled every step seconds in [start, end)"""
+    samples = np.arange(start, end, step, dtype=np.float64)
+    arrived = np.searchsorted(np.sort(arrivals), samples, side='right')
+    # Unfinished cars stay in the queue: NaNs sort last and are never <= a sample
+    finished = np.searchsorted(np.sort(completions), samples, side='right')
+    return samples, arrived - finished
+
+def hourly_arrival_rates(arrivals, days):
+    """Mean arrivals per hour of day (24 values) over a number of days"""
+    hours = ((arrivals // 3600) % 24).astype(np.int64)
+    return np.bincount(hours, minlength=24) / max(days, 1)
+
+def weekday_hour_rates(arrivals, first_day, days):
+    """Mean arrivals per (weekday, hour) over the history window, shape (7, 24)"""
+    day_index = (arrivals // 86400).astype(np.int64)
+    weekdays = (day_index + 3) % 7  # 1970-01-01 was a Thursday
+    hours = ((arrivals // 3600) % 24).astype(np.int64)
+    counts = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+    # How many times each weekday occurs in the window
+    occurrences = np.bincount([(first_day + timedelta(days=i)).weekday() for i in range(days)],
+                              minlength=7)
+    return counts / np.maximum(occurrences, 1)[:, None]
+
+def forecast_queue(rates, now, median_minutes, hours=FORECAST_HOURS):
+    """Expected arrivals and cars on site for the next hours.
+
+    Uses Little's law: expected queue = arrival rate x time on site.
+    rates are per (weekday, hour) from weekday_hour_rates.
+    """
+    forecast = []
+    hour_start = now.replace(minute=0, second=0, microsecond=0)
+    for offset in range(1, hours + 1):
+        slot = hour_start + timedelta(hours=offset)
+        arrivals = float(rates[slot.weekday(), slot.hour])
+        expected_queue = arrivals * (median_minutes or 0) / 60
+        forecast.append({
+            'hour': slot.isoformat(),
+            'expected_arrivals': round(arrivals, 2),
+            'expected_queue': round(expected_queue, 2),
+        })
+    return forecast
+
+def compute_day(session, model, day, now, history_days=HISTORY_DAYS):
+    """All analytics for one day, plus a forecast from the preceding history"""
+    start, end = day_bounds(day)
+    history_start = start - timedelta(days=history_days)
+    arrivals, completions = load_columns(session, model, history_start, end)
+
+    on_day = arrivals >= (start - EPOCH).total_seconds()
+    day_arrivals, day_completions = arrivals[on_day], completions[on_day]
+    history_arrivals = arrivals[~on_day]
+
+    # Cars still on site from the previous evening count toward the queue too:
+    # those that arrived shortly before midnight and finished after it. Unfinished
+    # cars from past days were abandoned or moved to history by a reset
+    start_seconds = (start - EPOCH).total_seconds()
+    carried_over = (~on_day & (arrivals >= start_seconds - MAX_SAMPLE_SECONDS)
+                    & (completions >= start_seconds))
+    queue_arrivals = np.concatenate([arrivals[carried_over], day_arrivals])
+    queue_completions = np.concatenate([completions[carried_over], day_completions])
+    sample_end = min(end, now) if day == now.date() else end
+    samples, queue = queue_length(queue_arrivals, queue_completions,
+                                  start_seconds, (sample_end - EPOCH).total_seconds())
+
+    percentiles = cycle_time_percentiles(day_arrivals, day_completions)
+    history_percentiles = cycle_time_percentiles(history_arrivals, completions[~on_day])
+    median = history_percentiles['p50'] or percentiles['p50']
+    rates = weekday_hour_rates(history_arrivals, history_start.date(), history_days)
+
+    return {
+        'day': day.isoformat(),
+        'cars': int(day_arrivals.size),
+        'finished': int(np.count_nonzero(~np.isnan(day_completions))),
+        'cycle_time_minutes': percentiles,
+        'queue_length': [
+            {'time': (EPOCH + timedelta(seconds=float(t))).isoformat(), 'cars': int(n)}
+            for t, n in zip(samples, queue)
+        ],
+        'arrivals_per_hour': [round(float(rate), 2) for rate in hourly_arrival_rates(day_arrivals, 1)],
+        'history_arrivals_per_hour': [round(float(rate), 2)
+                                      for rate in hourly_arrival_rates(history_arrivals, history_days)],
+        'forecast': forecast_queue(rates, now, median) if day == now.date() else [],
+    }
+
+class AnalyticsCache:
+    """Per-day analytics results with a shorter lifetime for today than past days"""
+
+    def __init__(self, size=CACHE_SIZE, today_ttl=TODAY_TTL, past_ttl=PAST_TTL):
+        self.size = size
+        self.today_ttl = today_ttl
+        self.past_ttl = past_ttl
+        self.entries = OrderedDict()  # (day, history_days) -> (computed_at, result)
+        self.lock = threading.Lock()
+
+    def get(self, session, model, day, now, history_days=HISTORY_DAYS):
+        key = (day, history_days)
+        ttl = self.past_ttl if day < now.date() else self.today_ttl
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        # Computed outside the lock; concurrent misses for one day just both compute
+        result = compute_day(session, model, day, now, history_days)
+        with self.lock:
+            self.entries[key] = (time.monotonic(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+cache = AnalyticsCache()
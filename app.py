@@ -1,67 +1,240 @@
 import os
-import csv
+import time
+
+# Worker boot time is measured from here (see create_app)
+BOOT_STARTED = time.perf_counter()
+
+import hashlib
+import hmac
+import json
 import logging
 import uuid
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file, jsonify
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, Flask, current_app, g, render_template, make_response, request, redirect, url_for, session, flash, send_file, jsonify
 # Removed SocketIO for simpler approach
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+from sqlalchemy.exc import IntegrityError
+from markupsafe import Markup
 from werkzeug.utils import secure_filename
-from models import db, Car, Employee
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "carwash-secret-key-123")
-
-# Database configuration
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+from models import db, admit_arrival, business_day_at, BusinessDay, Car, Employee, SyncBatch
+from schema import init_db_command, rebuild_customers_command
+from customers import record_visit, record_payment, find_customer, MIN_PREFIX_LENGTH, cache as customer_cache
+from wait_times import record_stage, stage_averages, add_estimates, estimate_clock
+from change_version import version as change_version
+from fragments import cache as fragment_cache
+from session_store import create_store
+from unit_of_work import after_commit
+from partitions import partition_cars_command, run_partition_maintenance
+from replica import reporting_session, router as replica
+from staff import PeriodicTask, activity, active_staff, run_activity_flush, run_reaper, reap_sessions_command
+from sync_client import SYNC_FIELDS, DATETIME_FIELDS
+from carwash_core import (
+    STATUS_WASHING, STATUS_AWAITING_PAYMENT, STATUS_FINISHED, STATUSES, ROLES, REPORT_GROUPS, CarwashError,
+    can_add_car, new_car, status_change, payment_change, parse_report_range, normalize_plate, day_bounds,
+    sync_status_change, parse_payment_amount,
+)
+from carwash_core.sql_repository import SqlCarRepository
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# Initialize database
-db.init_app(app)
+# Desktop sync (disabled unless a shared token is configured)
+SYNC_TOKEN = os.environ.get("SYNC_TOKEN")
+SYNC_PULL_LIMIT = 500
+# updated_at is stamped at flush, not at commit: a pull's final cursor stays this
+# far behind the clock so changes committed late (and worker clock skew) are
+# re-read by the next pull instead of being skipped
+SYNC_PULL_OVERLAP = timedelta(seconds=60)
+
+# Where signed-in employees are looked up: 'memory' (per worker) or
+# 'sqlite:///<path>' (shared by the workers on a host); see session_store.py
+SESSION_STORE = os.environ.get("SESSION_STORE", "memory")
+SESSION_STORE_TTL = int(os.environ.get("SESSION_STORE_TTL", 300))
+
+# Employees idle this long are signed out by the session reaper (staff.py),
+# which runs every SESSION_REAPER_INTERVAL seconds in each worker (0 disables it)
+SESSION_IDLE_MINUTES = int(os.environ.get("SESSION_IDLE_MINUTES", 120))
+SESSION_REAPER_INTERVAL = int(os.environ.get("SESSION_REAPER_INTERVAL", 600))
+
+# Request heartbeats are written to employees.last_activity this often (0 stops tracking,
+# and the session reaper then only signs employees out a shift after login);
+# employees seen within STAFF_ONLINE_MINUTES count as on shift in /api/staff
+ACTIVITY_FLUSH_SECONDS = int(os.environ.get("ACTIVITY_FLUSH_SECONDS", 30))
+STAFF_ONLINE_MINUTES = 5
+
+# Partition cars by month of arrival on PostgreSQL (see partitions.py); upcoming
+# months' partitions are created every PARTITION_MAINTENANCE_INTERVAL seconds
+CARS_MONTHLY_PARTITIONS = os.environ.get("CARS_MONTHLY_PARTITIONS", "").lower() in ("1", "true", "yes")
+PARTITION_MAINTENANCE_INTERVAL = int(os.environ.get("PARTITION_MAINTENANCE_INTERVAL", 24 * 60 * 60))
+
+# Reports, exports and analytics read from this database when set (see replica.py),
+# provided it is within REPLICA_MAX_LAG_SECONDS of the primary for today's data
+REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+REPLICA_MAX_LAG_SECONDS = int(os.environ.get("REPLICA_MAX_LAG_SECONDS", 30))
+
+# Worker boot (imports + create_app) should stay under this so autoscaled
+# instances and restarts come up quickly; override with BOOT_BUDGET_MS
+BOOT_BUDGET_MS = float(os.environ.get("BOOT_BUDGET_MS", 1500))
+
+bp = Blueprint('carwash', __name__)
+
+# Car storage; changes are committed once per request (see commit_request)
+cars = SqlCarRepository(db.session, Car, BusinessDay, autocommit=False)
+
+def create_app(config=None):
+    """Build the Flask app; the schema is set up separately with `flask init-db`"""
+    # Configure logging
+    logging.basicConfig(level=logging.DEBUG)
+    
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "carwash-secret-key-123")
+    
+    # Database configuration
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config['SESSION_STORE'] = SESSION_STORE
+    app.config['SESSION_STORE_TTL'] = SESSION_STORE_TTL
+    app.config['SESSION_IDLE_MINUTES'] = SESSION_IDLE_MINUTES
+    app.config['SESSION_REAPER_INTERVAL'] = SESSION_REAPER_INTERVAL
+    app.config['ACTIVITY_FLUSH_SECONDS'] = ACTIVITY_FLUSH_SECONDS
+    app.config['CARS_MONTHLY_PARTITIONS'] = CARS_MONTHLY_PARTITIONS
+    app.config['PARTITION_MAINTENANCE_INTERVAL'] = PARTITION_MAINTENANCE_INTERVAL
+    app.config['REPLICA_DATABASE_URL'] = REPLICA_DATABASE_URL
+    app.config['REPLICA_MAX_LAG_SECONDS'] = REPLICA_MAX_LAG_SECONDS
+    
+    if config:
+        app.config.update(config)
+    
+    # Initialize database (connections are opened lazily on first query);
+    # the replica bind has to be configured first
+    replica.init_app(app)
+    db.init_app(app)
+    app.extensions['session_store'] = create_store(app.config['SESSION_STORE'], app.config['SESSION_STORE_TTL'])
+    
+    app.register_blueprint(bp)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_customers_command)
+    app.cli.add_command(reap_sessions_command)
+    app.cli.add_command(partition_cars_command)
+    
+    if app.config['SESSION_REAPER_INTERVAL'] > 0:
+        app.extensions['session_reaper'] = PeriodicTask(
+            app, app.config['SESSION_REAPER_INTERVAL'], run_reaper, 'session-reaper').start()
+    if app.config['ACTIVITY_FLUSH_SECONDS'] > 0:
+        app.extensions['activity_flush'] = PeriodicTask(
+            app, app.config['ACTIVITY_FLUSH_SECONDS'], run_activity_flush, 'activity-flush').start()
+    if app.config['CARS_MONTHLY_PARTITIONS'] and app.config['PARTITION_MAINTENANCE_INTERVAL'] > 0:
+        app.extensions['partition_maintenance'] = PeriodicTask(
+            app, app.config['PARTITION_MAINTENANCE_INTERVAL'], run_partition_maintenance, 'partition-maintenance').start()
+    
+    boot_ms = (time.perf_counter() - BOOT_STARTED) * 1000
+    app.config['BOOT_TIME_MS'] = boot_ms
+    if boot_ms > BOOT_BUDGET_MS:
+        app.logger.warning("App boot took %.0f ms (budget %.0f ms)", boot_ms, BOOT_BUDGET_MS)
+    else:
+        app.logger.info("App boot took %.0f ms", boot_ms)
+    return app
+
+def upload_path(filename):
+    """Absolute path of a file in the upload folder, creating the folder if needed"""
+    folder = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
+
+def cars_etag(*parts):
+    """ETag for a response built from cars: the change version plus what else it depends on"""
+    key = '|'.join((change_version.current(),) + parts)
+    return hashlib.sha1(key.encode()).hexdigest()
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+def not_modified(etag):
+    """A bodiless 304 if the client already has this ETag (checked before any DB query)"""
+    # Only for signed-in sessions; the ETag was handed out to an authenticated request
+    if session.get('session_id') and request.if_none_match.contains(etag):
+        return with_etag(current_app.response_class(status=304), etag)
+    return None
+
+def with_etag(response, etag):
+    """Tag a response and have browsers revalidate it on every request"""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def wants_fragments():
+    """True for forms posted by static/script.js, which swaps in sections instead of following redirects"""
+    return request.headers.get('X-Requested-With') == 'fetch'
+
+def fragment_response(employee, message, category, statuses):
+    """JSON answer to a fetch-posted action: its message and the dashboard sections it changed"""
+    # Sections are cached by change version, which only moves once the action commits
+    db.session.commit()
+    now = estimate_clock(datetime.utcnow())
+    return jsonify({
+        'message': message,
+        'category': category,
+        'sections': dashboard_sections(employee, now, statuses),
+        'total_count': sum(cars.count_by_status().values())
+    })
 
-# Car statuses
-STATUS_WASHING = "washing"
-STATUS_AWAITING_PAYMENT = "awaiting_payment" 
-STATUS_FINISHED = "finished"
+def report_cars(fresh=True):
+    """Car repository for read-only reporting queries, on the replica when it can serve them"""
+    return SqlCarRepository(reporting_session(fresh), Car, BusinessDay)
 
-# Create tables
-with app.app_context():
-    db.create_all()
-    print("Database tables created successfully")
+def cars_changed(*statuses):
+    """Bump the change versions (global plus statuses) once the request's changes commit"""
+    after_commit(db.session, lambda: change_version.bump(*statuses))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def session_store():
+    return current_app.extensions['session_store']
+
 def get_current_employee():
+    """The signed-in employee, from the session store or (on a miss) the employees table"""
     session_id = session.get('session_id')
-    if session_id:
-        employee = Employee.query.filter_by(session_id=session_id).first()
-        return employee.to_dict() if employee else None
-    return None
+    if not session_id:
+        return None
+    # Resolved once per request; templates call this again for the navbar
+    if 'employee' in g:
+        return g.employee
+    
+    employee = session_store().get(session_id)
+    if employee is None:
+        row = Employee.query.filter_by(session_id=session_id).first()
+        employee = row.to_dict() if row else None
+        if employee:
+            session_store().put(session_id, employee)
+    g.employee = employee
+    return employee
 
 # Removed real-time broadcasting for simplified web approach
 
+@bp.after_app_request
+def commit_request(response):
+    """Commit the changes a successful POST staged; after-commit side effects run here"""
+    if request.method != 'GET' and response.status_code < 400 and db.session().in_transaction():
+        db.session.commit()
+    return response
+
+@bp.before_app_request
+def note_activity():
+    """Heartbeat for the signed-in employee; kept in memory and flushed in bulk (staff.py)"""
+    session_id = session.get('session_id')
+    if session_id and current_app.config['ACTIVITY_FLUSH_SECONDS'] > 0:
+        activity.touch(session_id)
+
 # Make get_current_employee available in templates
-@app.context_processor
+@bp.app_context_processor
 def inject_current_employee():
     return dict(get_current_employee=get_current_employee)
 
@@ -70,20 +243,20 @@ def generate_session_id():
 
 # Simplified web-based carwash management
 
-@app.route('/')
+@bp.route('/')
 def index():
     employee = get_current_employee()
     if not employee:
-        return redirect(url_for('login'))
-    return redirect(url_for('dashboard'))
+        return redirect(url_for('.login'))
+    return redirect(url_for('.dashboard'))
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         name = request.form.get('name', '').strip()
         role = request.form.get('role')
         
-        if not name or role not in ['washer', 'cashier']:
+        if not name or role not in ROLES:
             flash('Please enter your name and select a valid role.', 'error')
             return render_template('login.html')
         
@@ -91,24 +264,27 @@ def login():
         session_id = generate_session_id()
         session['session_id'] = session_id
         
-        # Store employee in database
+        # Store employee in database (committed with the request)
         employee = Employee(
             session_id=session_id,
             name=name,
             role=role
         )
         db.session.add(employee)
-        db.session.commit()
+        db.session.flush()
+        employee_record = employee.to_dict()
+        after_commit(db.session, lambda: session_store().put(session_id, employee_record))
         
         flash(f'Welcome, {name}!', 'success')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('.dashboard'))
     
     return render_template('login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session_id = session.get('session_id')
     if session_id:
+        session_store().delete(session_id)
         # Remove employee from database
         employee = Employee.query.filter_by(session_id=session_id).first()
         if employee:
@@ -116,310 +292,770 @@ def logout():
             db.session.commit()
     session.clear()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
+    # The page depends on the cars, the estimate clock and who is signed in;
+    # pages carrying flash messages are one-offs and never cached
+    now = estimate_clock(datetime.utcnow())
+    etag = cars_etag(session.get('session_id', ''), now.isoformat())
+    cacheable = '_flashes' not in session
+    if cacheable:
+        cached = not_modified(etag)
+        if cached:
+            return cached
+    
     employee = get_current_employee()
     if not employee:
-        return redirect(url_for('login'))
-    
-    # Filter cars by status for dashboard display
-    washing_cars = [car.to_dict() for car in Car.query.filter_by(status=STATUS_WASHING).all()]
-    awaiting_payment_cars = [car.to_dict() for car in Car.query.filter_by(status=STATUS_AWAITING_PAYMENT).all()]
-    finished_cars = [car.to_dict() for car in Car.query.filter_by(status=STATUS_FINISHED).all()]
+        return redirect(url_for('.login'))
     
-    return render_template('dashboard.html', 
+    response = make_response(render_template('dashboard.html', 
                          employee=employee,
-                         washing_cars=washing_cars,
-                         awaiting_payment_cars=awaiting_payment_cars,
-                         finished_cars=finished_cars,
-                         total_cars=Car.query.count())
+                         sections=dashboard_sections(employee, now),
+                         total_cars=sum(cars.count_by_status().values())))
+    return with_etag(response, etag) if cacheable else response
+
+@bp.route('/dashboard/sections')
+def dashboard_sections_data():
+    """Dashboard sections the page doesn't show yet, for static/script.js to swap in.
+
+    Query parameters: one per status with the data-tag of the section the
+    page has; sections whose tag is unchanged are left out.
+    """
+    now = estimate_clock(datetime.utcnow())
+    etag = cars_etag(session.get('session_id', ''), now.isoformat(), request.query_string.decode())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    changed = {status: section for status, section in dashboard_sections(employee, now).items()
+               if request.args.get(status) != section['tag']}
+    return with_etag(jsonify({
+        'sections': changed,
+        'total_count': sum(cars.count_by_status().values())
+    }), etag)
+
+def dashboard_sections(employee, now, statuses=STATUSES):
+    """{status: {'html', 'count', 'tag'}} for dashboard sections, from the fragment cache"""
+    # Each section is rendered only if its cars changed since it was cached
+    averages = {}
+    sections = {}
+    for status in statuses:
+        key = section_key(status, employee, now)
+        tag = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        html, count = fragment_cache.get(
+            key, lambda status=status, tag=tag: render_section(status, employee, now, averages, tag))
+        sections[status] = {'html': html, 'count': count, 'tag': tag}
+    return sections
 
-@app.route('/add_car', methods=['GET', 'POST'])
+def section_key(status, employee, now):
+    """Everything a dashboard section's HTML depends on"""
+    # The version is read before the cars, so a section can't be cached under a newer one
+    key = (status, change_version.current(status), employee['role'])
+    if status == STATUS_FINISHED:
+        return key + (now.date(),)
+    return key + (now,)
+
+def render_section(status, employee, now, averages, tag):
+    """(HTML, number of cars) for one status section of the dashboard"""
+    if status == STATUS_FINISHED:
+        section_cars = cars.finished_on(now.date(), live=True)
+    else:
+        if not averages:
+            averages.update(stage_averages(db.session))
+        section_cars = add_estimates(cars.list_by_status(status), averages, now)
+    html = render_template(f'sections/{status}.html', employee=employee, cars=section_cars, tag=tag)
+    return Markup(html), len(section_cars)
+
+@bp.route('/add_car', methods=['GET', 'POST'])
 def add_car():
     employee = get_current_employee()
-    if not employee or employee['role'] != 'washer':
+    if not employee or not can_add_car(employee['role']):
         flash('Only washers can add new cars.', 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('.dashboard'))
     
     if request.method == 'POST':
-        car_name = request.form.get('car_name', '').strip()
-        plate_number = request.form.get('plate_number', '').strip()
-        
-        if not car_name or not plate_number:
-            flash('Please enter both car name and plate number.', 'error')
+        try:
+            fields = new_car(request.form.get('car_name'), request.form.get('plate_number'),
+                             employee['name'], now=datetime.utcnow())
+        except CarwashError as e:
+            flash(str(e), 'error')
             return render_template('add_car.html', employee=employee)
         
         # Handle file upload
-        plate_photo = None
         if 'plate_photo' in request.files:
             file = request.files['plate_photo']
             if file and file.filename != '' and allowed_file(file.filename):
                 filename = secure_filename(f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                plate_photo = filename
+                # Written only once the car is committed, so a failed add leaves no orphan file
+                photo_path = upload_path(filename)
+                after_commit(db.session, lambda: file.save(photo_path))
+                fields['photo_filename'] = filename
         
-        # Create new car entry in database
-        car = Car(
-            car_name=car_name,
-            plate_number=plate_number,
-            photo_filename=plate_photo,
-            status=STATUS_WASHING,
-            washer_name=employee['name']
-        )
-        db.session.add(car)
-        db.session.commit()
-        
-        # Car added successfully to database
+        # Create new car entry in database (customer profile committed with it)
+        record_visit(db.session, fields['plate_number'], fields['car_name'], now=fields['timestamp'])
+        cars.add(fields)
+        cars_changed(STATUS_WASHING)
         
-        flash(f'Car "{car_name}" has been added and is now washing.', 'success')
-        return redirect(url_for('dashboard'))
+        flash(f'Car "{fields["car_name"]}" has been added and is now washing.', 'success')
+        return redirect(url_for('.dashboard'))
     
     return render_template('add_car.html', employee=employee)
 
-@app.route('/update_status/<car_id>', methods=['GET', 'POST'])
+@bp.route('/update_status/<car_id>', methods=['GET', 'POST'])
 def update_status(car_id):
     employee = get_current_employee()
     if not employee:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
-    if car_id not in cars_data:
+    # Primary-key lookup; cars of past business days are history, not actionable
+    car = cars.get_live(car_id)
+    if car is None:
+        if wants_fragments():
+            return jsonify({'message': 'Car not found.', 'category': 'error'}), 404
         flash('Car not found.', 'error')
-        return redirect(url_for('dashboard'))
-    
-    car = cars_data[car_id]
+        return redirect(url_for('.dashboard'))
     
     if request.method == 'POST':
-        new_status = request.form.get('status')
+        try:
+            changes = status_change(car, employee['role'], employee['name'], request.form.get('status'))
+        except CarwashError as e:
+            if wants_fragments():
+                return jsonify({'message': str(e), 'category': 'error'}), 400
+            flash(str(e), 'error')
+            return redirect(url_for('.dashboard'))
         
-        # Validate status transitions
-        if employee['role'] == 'washer' and car['status'] == STATUS_WASHING and new_status == STATUS_AWAITING_PAYMENT:
-            car['status'] = STATUS_AWAITING_PAYMENT
-            flash(f'Car "{car["car_name"]}" is now awaiting payment.', 'success')
-        elif employee['role'] == 'washer' and new_status == STATUS_WASHING:
-            car['status'] = STATUS_WASHING
-            car['washer_name'] = employee['name']
-            flash(f'Car "{car["car_name"]}" status updated to washing.', 'success')
-        else:
-            flash('Invalid status update.', 'error')
-            return redirect(url_for('dashboard'))
+        now = datetime.utcnow()
+        changes['ready_time'] = now if changes['status'] == STATUS_AWAITING_PAYMENT else None
+        
+        # One UPDATE guarded by the status this page saw, so two workers can't both move the car
+        updated = cars.transition(car_id, car['status'], changes)
+        if updated is None:
+            message = f'Car "{car["car_name"]}" was just updated by someone else.'
+            if wants_fragments():
+                return jsonify({'message': message, 'category': 'error'}), 409
+            flash(message, 'error')
+            return redirect(url_for('.dashboard'))
         
-        return redirect(url_for('dashboard'))
+        # Keep the rolling wash-time average current; committed with the car
+        if updated['status'] == STATUS_AWAITING_PAYMENT:
+            record_stage(db.session, STATUS_WASHING, car['timestamp'], now)
+        car = updated
+        # Both sections: the car moves and the rolling averages behind their estimates changed
+        cars_changed(STATUS_WASHING, STATUS_AWAITING_PAYMENT)
+        if car['status'] == STATUS_AWAITING_PAYMENT:
+            message = f'Car "{car["car_name"]}" is now awaiting payment.'
+        else:
+            message = f'Car "{car["car_name"]}" status updated to washing.'
+        if wants_fragments():
+            return fragment_response(employee, message, 'success', (STATUS_WASHING, STATUS_AWAITING_PAYMENT))
+        flash(message, 'success')
+        return redirect(url_for('.dashboard'))
     
     return render_template('update_status.html', employee=employee, car=car)
 
-@app.route('/payment/<car_id>', methods=['GET', 'POST'])
+@bp.route('/payment/<car_id>', methods=['GET', 'POST'])
 def payment(car_id):
     employee = get_current_employee()
     if not employee:
         flash('Please log in to access this page.', 'error')
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
-    if car_id not in cars_data:
+    car = cars.get_live(car_id)
+    if car is None:
         flash('Car not found.', 'error')
-        return redirect(url_for('dashboard'))
-    
-    car = cars_data[car_id]
+        return redirect(url_for('.dashboard'))
     
     if car['status'] != STATUS_AWAITING_PAYMENT:
         flash('This car is not awaiting payment.', 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('.dashboard'))
     
     if request.method == 'POST':
         try:
-            payment_amount = float(request.form.get('payment_amount', 0))
-            if payment_amount <= 0:
-                flash('Please enter a valid payment amount.', 'error')
-                return render_template('payment.html', employee=employee, car=car)
-            
-            # Update car status to finished
-            car['status'] = STATUS_FINISHED
-            car['payment_amount'] = payment_amount
-            car['cashier_name'] = employee['name']
-            car['completion_time'] = datetime.now()
-            
-            flash(f'Payment of ₱{payment_amount:.2f} processed for car "{car["car_name"]}".', 'success')
-            return redirect(url_for('dashboard'))
-            
-        except ValueError:
-            flash('Please enter a valid payment amount.', 'error')
-            return render_template('payment.html', employee=employee, car=car)
+            changes = payment_change(car, request.form.get('payment_amount'), employee['name'],
+                                     now=datetime.utcnow())
+        except CarwashError as e:
+            flash(str(e), 'error')
+            return render_template('payment.html', employee=employee, car=car,
+                           customer=find_customer(db.session, car['plate_number']))
+        
+        # Update car status to finished, unless another cashier just did
+        paid = cars.transition(car_id, STATUS_AWAITING_PAYMENT, changes)
+        if paid is None:
+            flash(f'Car "{car["car_name"]}" has already been paid for.', 'error')
+            return redirect(url_for('.dashboard'))
+        
+        record_stage(db.session, STATUS_AWAITING_PAYMENT, car.get('ready_time'), changes['completion_time'])
+        record_payment(db.session, car['plate_number'], changes['payment_amount'])
+        car = paid
+        # Washing estimates include the payment wait, so that section changes too
+        cars_changed(*STATUSES)
+        
+        flash(f'Payment of ₱{car["payment_amount"]:.2f} processed for car "{car["car_name"]}".', 'success')
+        return redirect(url_for('.dashboard'))
     
-    return render_template('payment.html', employee=employee, car=car)
+    return render_template('payment.html', employee=employee, car=car,
+                           customer=find_customer(db.session, car['plate_number']))
 
-@app.route('/export_daily_data')
+@bp.route('/export_daily_data')
 def export_daily_data():
     employee = get_current_employee()
     if not employee:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
-    # Get today's date
-    today = datetime.now().date()
-    
-    # Filter finished cars from today
-    finished_today = []
-    for car in cars_data.values():
-        if (car['status'] == STATUS_FINISHED and 
-            car['completion_time'] and 
-            car['completion_time'].date() == today):
-            finished_today.append(car)
+    # Finished cars from today
+    today = datetime.utcnow().date()
+    finished_today = report_cars().finished_on(today)
     
     if not finished_today:
         flash('No completed cars found for today.', 'info')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('.dashboard'))
     
     # Create CSV file
+    from carwash_core.exports import write_csv
     csv_filename = f"carwash_daily_report_{today.strftime('%Y-%m-%d')}.csv"
-    csv_path = os.path.join(app.config['UPLOAD_FOLDER'], csv_filename)
+    csv_path = upload_path(csv_filename)
     
     with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Car Name', 'Plate Number', 'Washer', 'Cashier', 'Payment Amount', 'Start Time', 'Completion Time']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for car in finished_today:
-            writer.writerow({
-                'Car Name': car['car_name'],
-                'Plate Number': car['plate_number'],
-                'Washer': car['washer_name'],
-                'Cashier': car['cashier_name'],
-                'Payment Amount': f"₱{car['payment_amount']:.2f}" if car['payment_amount'] else '',
-                'Start Time': car['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                'Completion Time': car['completion_time'].strftime('%Y-%m-%d %H:%M:%S') if car['completion_time'] else ''
-            })
+        write_csv(finished_today, csvfile)
     
     return send_file(csv_path, as_attachment=True, download_name=csv_filename)
 
-@app.route('/manifest.json')
+@bp.route('/manifest.json')
 def manifest():
     return send_file('templates/manifest.json', mimetype='application/json')
 
-@app.route('/sw.js')
+@bp.route('/sw.js')
 def service_worker():
     return send_file('static/sw.js', mimetype='application/javascript')
 
-@app.route('/export_daily_excel')
+@bp.route('/export_daily_excel')
 def export_daily_excel():
     employee = get_current_employee()
     if not employee:
-        return redirect(url_for('login'))
-    
-    # Get today's date
-    today = datetime.now().date()
+        return redirect(url_for('.login'))
     
-    # Filter finished cars from today
-    finished_today = []
-    for car in cars_data.values():
-        if (car['status'] == STATUS_FINISHED and 
-            car['completion_time'] and 
-            car['completion_time'].date() == today):
-            finished_today.append(car)
+    # Finished cars from today
+    today = datetime.utcnow().date()
+    finished_today = report_cars().finished_on(today)
     
     if not finished_today:
         flash('No completed cars found for today.', 'info')
-        return redirect(url_for('dashboard'))
-    
-    # Create Excel workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Carwash Report {today.strftime('%Y-%m-%d')}"
-    
-    # Define styles
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Headers
-    headers = ['Car Name', 'Plate Number', 'Washer', 'Cashier', 'Payment Amount (₱)', 'Start Time', 'Completion Time']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = border
-    
-    # Data rows
-    total_payment = 0
-    for row, car in enumerate(finished_today, 2):
-        data = [
-            car['car_name'],
-            car['plate_number'],
-            car['washer_name'],
-            car['cashier_name'] or employee['name'],
-            car['payment_amount'] if car['payment_amount'] else 0,
-            car['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-            car['completion_time'].strftime('%Y-%m-%d %H:%M:%S') if car['completion_time'] else ''
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row, column=col, value=value)
-            cell.border = border
-        
-        if car['payment_amount']:
-            total_payment += car['payment_amount']
-    
-    # Summary row
-    summary_row = len(finished_today) + 3
-    ws.cell(row=summary_row, column=1, value="TOTAL CARS:").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=len(finished_today)).font = Font(bold=True)
-    ws.cell(row=summary_row + 1, column=1, value="TOTAL REVENUE:").font = Font(bold=True)
-    ws.cell(row=summary_row + 1, column=2, value=f"₱{total_payment:.2f}").font = Font(bold=True)
-    
-    # Auto-adjust column widths
-    for col in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col)
-        max_length = 0
-        for row in range(1, len(finished_today) + 2):
-            cell_value = str(ws[f"{column_letter}{row}"].value)
-            max_length = max(max_length, len(cell_value))
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 30)
+        return redirect(url_for('.dashboard'))
+    
+    # Create Excel workbook (openpyxl is only imported on this path)
+    from carwash_core.exports import build_workbook
+    wb = build_workbook(finished_today, today, default_cashier=employee['name'])
     
     # Save file
     excel_filename = f"carwash_daily_report_{today.strftime('%Y-%m-%d')}.xlsx"
-    excel_path = os.path.join(app.config['UPLOAD_FOLDER'], excel_filename)
+    excel_path = upload_path(excel_filename)
     wb.save(excel_path)
     
     return send_file(excel_path, as_attachment=True, download_name=excel_filename)
 
-@app.route('/reset_daily_data', methods=['POST'])
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# /api/cars paging and the fields clients may ask for
+CARS_PAGE_LIMIT = 50
+CARS_MAX_LIMIT = 200
+CAR_API_FIELDS = (
+    'id', 'car_name', 'plate_number', 'status', 'timestamp', 'completion_time', 'ready_time',
+    'washer_name', 'cashier_name', 'payment_amount', 'photo_filename', 'created_at', 'updated_at',
+    'business_day',
+)
+
+def record_json(record):
+    """JSON-friendly copy of a car record (ISO 8601 datetimes)"""
+    return {key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in record.items()}
+
+@bp.route('/search')
+def search():
+    employee = get_current_employee()
+    if not employee:
+        return redirect(url_for('.login'))
+    
+    query = request.args.get('q', '').strip()
+    results = cars.search(query, SEARCH_LIMIT) if query else []
+    return render_template('search.html', employee=employee, query=query, results=results)
+
+@bp.route('/api/search')
+def api_search():
+    """Cars by plate (prefix, then similar plates for misreads) or car name"""
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    query = request.args.get('q', '').strip()
+    # Unparseable limits fall back to the default; the rest are clamped to 1-100
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT, type=int), SEARCH_MAX_LIMIT))
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    
+    return jsonify({'query': query, 'results': [record_json(car) for car in cars.search(query, limit)]})
+
+def car_fields_json(car, fields):
+    """Only the requested fields of a Car row, with ISO 8601 datetimes"""
+    values = {}
+    for field in fields:
+        value = getattr(car, field)
+        values[field] = value.isoformat() if isinstance(value, datetime) else value
+    return values
+
+@bp.route('/api/cars')
+def api_cars():
+    """Cars newest first, filtered and paged with a '<timestamp>|<id>' cursor.
+
+    Query parameters: status (comma-separated), start and end (YYYY-MM-DD,
+    by arrival), business_day (id, or current for the dashboard's cars), washer, cashier or employee (either role), fields (a
+    comma-separated subset of CAR_API_FIELDS), limit (1-200) and cursor
+    (next_cursor of the previous page). Responses carry an ETag.
+    """
+    etag = cars_etag(request.query_string.decode())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    args = request.args
+    try:
+        limit = int(args.get('limit', CARS_PAGE_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    if not 1 <= limit <= CARS_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {CARS_MAX_LIMIT}'}), 400
+    
+    fields = [field for field in args.get('fields', '').split(',') if field] or list(CAR_API_FIELDS)
+    unknown = [field for field in fields if field not in CAR_API_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    statuses = [status for status in args.get('status', '').split(',') if status]
+    if any(status not in STATUSES for status in statuses):
+        return jsonify({'error': f"status must be one of {', '.join(STATUSES)}"}), 400
+    
+    # Only load the requested columns (plus the keyset columns)
+    columns = {field for field in fields if field != 'id'} | {'timestamp'}
+    query = Car.query.options(load_only(*[getattr(Car, field) for field in columns]))
+    if statuses:
+        query = query.filter(Car.status.in_(statuses))
+    try:
+        if args.get('start'):
+            query = query.filter(Car.timestamp >= day_bounds(datetime.strptime(args['start'], '%Y-%m-%d').date())[0])
+        if args.get('end'):
+            query = query.filter(Car.timestamp < day_bounds(datetime.strptime(args['end'], '%Y-%m-%d').date())[1])
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD'}), 400
+    if args.get('business_day') == 'current':
+        # The dashboard's cars
+        query = query.filter(cars.is_live())
+    elif args.get('business_day'):
+        try:
+            query = query.filter(Car.business_day == int(args['business_day']))
+        except ValueError:
+            return jsonify({'error': 'business_day must be a number or current'}), 400
+    if args.get('washer'):
+        query = query.filter(Car.washer_name == args['washer'])
+    if args.get('cashier'):
+        query = query.filter(Car.cashier_name == args['cashier'])
+    if args.get('employee'):
+        query = query.filter(or_(Car.washer_name == args['employee'], Car.cashier_name == args['employee']))
+    
+    cursor = args.get('cursor', '')
+    if cursor:
+        cursor_text, _, cursor_id = cursor.partition('|')
+        try:
+            cursor_time = datetime.fromisoformat(cursor_text)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        # Keyset: strictly after the last row of the previous page
+        query = query.filter(or_(Car.timestamp < cursor_time,
+                                 and_(Car.timestamp == cursor_time, Car.id < cursor_id)))
+    
+    page = query.order_by(Car.timestamp.desc(), Car.id.desc()).limit(limit + 1).all()
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = f"{page[-1].timestamp.isoformat()}|{page[-1].id}" if has_more else None
+    
+    response = jsonify({
+        'cars': [car_fields_json(car, fields) for car in page],
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    })
+    # Lets clients revalidate a page with If-None-Match and get a bodiless 304
+    return with_etag(response, etag)
+
+@bp.route('/api/customers/autocomplete')
+def api_customer_autocomplete():
+    """Known customers for a partly typed plate, with their car name and usual price"""
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    prefix = normalize_plate(request.args.get('plate', ''))
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return jsonify({'customers': []})
+    return jsonify({'customers': customer_cache.get(db.session, prefix)})
+
+@bp.route('/api/reports')
+def api_reports():
+    """Grouped report of finished cars over a date range, as JSON, CSV or Excel.
+
+    Query parameters: start and end (YYYY-MM-DD, default today),
+    group_by (day, washer, cashier or hour) and format (json, csv or xlsx).
+    """
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    group_by = request.args.get('group_by', 'day')
+    export_format = request.args.get('format', 'json')
+    if group_by not in REPORT_GROUPS:
+        return jsonify({'error': f"group_by must be one of {', '.join(REPORT_GROUPS)}"}), 400
+    if export_format not in ('json', 'csv', 'xlsx'):
+        return jsonify({'error': 'format must be json, csv or xlsx'}), 400
+    try:
+        first_day, last_day = parse_report_range(request.args.get('start'), request.args.get('end'),
+                                                 datetime.utcnow().date())
+    except CarwashError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Aggregated by the database: one row per group, never one per car;
+    # ranges that end before today may be read from a lagging replica
+    today = datetime.utcnow().date()
+    rows = report_cars(fresh=last_day >= today).summarize(first_day, last_day, group_by)
+    
+    if export_format == 'json':
+        from carwash_core.exports import summary_totals
+        total_cars, total_revenue = summary_totals(rows)
+        return jsonify({
+            'start': first_day.isoformat(),
+            'end': last_day.isoformat(),
+            'group_by': group_by,
+            'rows': rows,
+            'total_cars': total_cars,
+            'total_revenue': total_revenue
+        })
+    
+    filename = f"carwash_report_by_{group_by}_{first_day.isoformat()}_{last_day.isoformat()}.{export_format}"
+    path = upload_path(filename)
+    if export_format == 'csv':
+        from carwash_core.exports import write_summary_csv
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            write_summary_csv(rows, group_by, csvfile)
+    else:
+        from carwash_core.exports import build_summary_workbook
+        build_summary_workbook(rows, group_by, first_day, last_day).save(path)
+    
+    return send_file(path, as_attachment=True, download_name=filename)
+
+@bp.route('/api/analytics')
+def api_analytics():
+    """Cycle times, queue length, arrival rates and a short queue forecast for a day.
+
+    Query parameters: day (YYYY-MM-DD, default today) and history_days
+    (1-90, default 28) for the arrival rates behind the forecast.
+    """
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    now = datetime.utcnow()
+    try:
+        day = datetime.strptime(request.args['day'], '%Y-%m-%d').date() if request.args.get('day') else now.date()
+        history_days = int(request.args.get('history_days', 28))
+    except ValueError:
+        return jsonify({'error': 'day must be YYYY-MM-DD and history_days a number'}), 400
+    if not 1 <= history_days <= 90:
+        return jsonify({'error': 'history_days must be between 1 and 90'}), 400
+    
+    # NumPy is only needed here; keep it out of worker boot
+    import analytics
+    session = reporting_session(fresh=day >= now.date())
+    return jsonify(analytics.cache.get(session, Car, day, now, history_days))
+
+@bp.route('/reset_daily_data', methods=['POST'])
 def reset_daily_data():
     employee = get_current_employee()
     if not employee:
-        return redirect(url_for('login'))
+        return redirect(url_for('.login'))
     
     # Count cars that will be reset
-    total_cars = len(cars_data)
-    finished_cars = len([car for car in cars_data.values() if car['status'] == STATUS_FINISHED])
+    counts = cars.count_by_status()
+    finished_cars = counts[STATUS_FINISHED]
+    
+    total_cars = sum(counts.values())
     
-    # Clear all car data
-    cars_data.clear()
+    # Open a new business day: one INSERT, whatever the number of cars; the
+    # previous days stay in reports, exports and search
+    cars.roll_over(datetime.utcnow(), opened_by=employee['name'])
+    cars_changed(*STATUSES)
     
-    flash(f'Daily data reset completed. Cleared {total_cars} cars ({finished_cars} finished cars).', 'success')
-    return redirect(url_for('dashboard'))
+    message = f'Daily data reset completed. Moved {total_cars} cars ({finished_cars} finished cars) to history.'
+    if wants_fragments():
+        return fragment_response(employee, message, 'success', STATUSES)
+    flash(message, 'success')
+    return redirect(url_for('.dashboard'))
 
-@app.route('/api/dashboard_data')
+@bp.route('/api/staff')
+def api_staff():
+    """Who is on shift: signed-in employees, their last activity and whether they're active now"""
+    employee = get_current_employee()
+    if not employee:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    # last_activity lags by up to ACTIVITY_FLUSH_SECONDS
+    online_since = datetime.utcnow() - timedelta(minutes=STAFF_ONLINE_MINUTES)
+    staff = [
+        {
+            'name': row.name,
+            'role': row.role,
+            'last_activity': row.last_activity.isoformat() if row.last_activity else None,
+            'online': row.last_activity is not None and row.last_activity >= online_since
+        }
+        for row in Employee.query.order_by(Employee.last_activity.desc())
+    ]
+    return jsonify({
+        'staff': staff,
+        'signed_in': active_staff(db.session),
+        'online': sum(1 for member in staff if member['online'])
+    })
+
+@bp.route('/api/dashboard_data')
 def api_dashboard_data():
     """API endpoint for dashboard updates (minimal JavaScript usage)"""
+    # Polls that find nothing changed get a 304 without touching the database
+    now = estimate_clock(datetime.utcnow())
+    etag = cars_etag(now.isoformat())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
     employee = get_current_employee()
     if not employee:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    washing_count = len([car for car in cars_data.values() if car['status'] == STATUS_WASHING])
-    awaiting_payment_count = len([car for car in cars_data.values() if car['status'] == STATUS_AWAITING_PAYMENT])
-    finished_count = len([car for car in cars_data.values() if car['status'] == STATUS_FINISHED])
+    # One grouped COUNT instead of loading every car
+    counts = cars.count_by_status()
+    
+    # Estimated completion for the cars still in the queue
+    averages = stage_averages(db.session)
+    estimates = [
+        {
+            'id': car['id'],
+            'status': car['status'],
+            'estimated_completion': car['estimated_completion'].isoformat()
+        }
+        for status in (STATUS_WASHING, STATUS_AWAITING_PAYMENT)
+        for car in add_estimates(cars.list_by_status(status), averages, now)
+    ]
+    
+    return with_etag(jsonify({
+        'washing_count': counts[STATUS_WASHING],
+        'awaiting_payment_count': counts[STATUS_AWAITING_PAYMENT],
+        'finished_count': counts[STATUS_FINISHED],
+        'total_count': sum(counts.values()),
+        'average_minutes': {stage: round(seconds / 60, 1) for stage, seconds in averages.items()},
+        'estimates': estimates
+    }), etag)
+
+def check_sync_token():
+    token = request.headers.get('X-Sync-Token')
+    return bool(SYNC_TOKEN) and token is not None and hmac.compare_digest(token, SYNC_TOKEN)
+
+def parse_sync_change(change):
+    """(car id, fields) of one pushed change, with datetimes parsed to naive UTC; raises CarwashError if malformed"""
+    if not isinstance(change, dict):
+        raise CarwashError("A change must be an object.")
+    car_id = change.get('id')
+    if not isinstance(car_id, str) or not car_id or len(car_id) > Car.id.type.length:
+        raise CarwashError("Missing or invalid car id.")
+    raw_fields = change.get('fields') or {}
+    if not isinstance(raw_fields, dict):
+        raise CarwashError("fields must be an object.")
+    
+    fields = {}
+    for field, value in raw_fields.items():
+        if field not in SYNC_FIELDS:
+            continue
+        if field in DATETIME_FIELDS:
+            if value is not None:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise CarwashError(f"Invalid {field}.")
+                if value.tzinfo is not None:
+                    # Cars are stored in naive UTC
+                    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        elif field == 'payment_amount':
+            if value is not None:
+                if isinstance(value, bool):
+                    raise CarwashError("Invalid payment_amount.")
+                value = parse_payment_amount(value)
+        elif field == 'status':
+            if value not in STATUSES:
+                raise CarwashError(f"status must be one of {', '.join(STATUSES)}.")
+        elif value is not None:
+            if not isinstance(value, str) or len(value) > Car.__table__.c[field].type.length:
+                raise CarwashError(f"Invalid {field}.")
+        fields[field] = value
+    
+    for field in ('car_name', 'plate_number', 'timestamp'):
+        if field in fields and not fields[field]:
+            raise CarwashError(f"{field} can't be empty.")
+    return car_id, fields
+
+def apply_sync_change(car, car_id, fields):
+    """Insert a pushed car or update an existing one (status changes go through the guarded transition)"""
+    if fields.get('timestamp'):
+        # Filed under the business day it arrived in, so it never precedes the day's cars_since
+        fields['business_day'] = business_day_at(fields['timestamp'])
+        db.session.execute(admit_arrival(fields['timestamp']))
+    
+    if car is None:
+        if not fields.get('car_name') or not fields.get('plate_number') or not fields.get('timestamp'):
+            raise CarwashError("New cars need a car name, plate number and timestamp.")
+        car = Car(id=car_id, **fields)
+        db.session.add(car)
+        return car
+    
+    if not fields:
+        return car
+    if car in db.session.new:
+        # Pushed twice in one batch: flush so its defaults (status) are known
+        db.session.flush()
+    if 'status' in fields:
+        sync_status_change(car.status, fields['status'])
+    if 'plate_number' in fields:
+        # The UPDATE bypasses Car.normalize_plate_number
+        fields['plate_normalized'] = normalize_plate(fields['plate_number'])
+    # Changes to earlier business days are allowed: the branch may have been offline at the reset
+    if cars.transition(car_id, car.status, fields, live=False) is None:
+        raise CarwashError("The car's status changed on the server first.")
+    return car
+
+def with_server_copies(errors):
+    """Attach the server's current copy of each rejected car (None if it has none)"""
+    rejected = {error['id'] for error in errors if error['id']}
+    current = {car.id: car.to_dict() for car in Car.query.filter(Car.id.in_(rejected))} if rejected else {}
+    return [dict(error, car=current.get(error['id'])) for error in errors]
+
+def duplicate_batch(batch):
+    """Response to a batch applied before, repeating what was rejected then"""
+    return jsonify({'batch_id': batch.batch_id, 'applied': batch.applied_count, 'duplicate': True,
+                    'errors': with_server_copies(json.loads(batch.errors or '[]'))})
+
+@bp.route('/api/sync/push', methods=['POST'])
+def api_sync_push():
+    """Apply a batch of desktop changes; repeated batch_ids are acknowledged without reapplying.
+    
+    Invalid or conflicting changes are skipped and reported in errors
+    (their index in the batch, car id, message and the server's copy of the
+    car, if any, for the client to reset to); the rest are applied.
+    """
+    if not check_sync_token():
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'batch_id and changes are required'}), 400
+    batch_id = payload.get('batch_id')
+    changes = payload.get('changes')
+    if not isinstance(batch_id, str) or not batch_id or not isinstance(changes, list):
+        return jsonify({'error': 'batch_id and changes are required'}), 400
+    if len(batch_id) > SyncBatch.batch_id.type.length:
+        return jsonify({'error': 'Invalid batch_id'}), 400
+    
+    existing = db.session.get(SyncBatch, batch_id)
+    if existing:
+        return duplicate_batch(existing)
+    
+    errors = []
+    parsed = []
+    for index, change in enumerate(changes):
+        try:
+            parsed.append((index, *parse_sync_change(change)))
+        except CarwashError as e:
+            car_id = change.get('id') if isinstance(change, dict) else None
+            errors.append({'index': index, 'id': car_id if isinstance(car_id, str) else None, 'error': str(e)})
+    
+    # One query for all cars touched by the batch
+    known = {car.id: car for car in Car.query.filter(Car.id.in_([car_id for _, car_id, _ in parsed])).all()}
+    
+    applied = 0
+    for index, car_id, fields in parsed:
+        try:
+            known[car_id] = apply_sync_change(known.get(car_id), car_id, fields)
+        except CarwashError as e:
+            errors.append({'index': index, 'id': car_id, 'error': str(e)})
+            continue
+        applied += 1
+    errors.sort(key=lambda error: error['index'])
+    
+    db.session.add(SyncBatch(batch_id=batch_id, applied_count=applied, errors=json.dumps(errors)))
+    if applied:
+        cars_changed(*STATUSES)
+    try:
+        # Committed here rather than with the request to detect duplicate batches
+        db.session.commit()
+    except IntegrityError:
+        # Another worker applied the same batch concurrently
+        db.session.rollback()
+        existing = db.session.get(SyncBatch, batch_id)
+        if existing is None:
+            raise
+        return duplicate_batch(existing)
+    
+    return jsonify({'batch_id': batch_id, 'applied': applied, 'duplicate': False,
+                    'errors': with_server_copies(errors)})
+
+@bp.route('/api/sync/pull')
+def api_sync_pull():
+    """Return cars changed after a cursor of the form '<updated_at>|<id>'.
+
+    Changes of the last SYNC_PULL_OVERLAP are sent again by the next pull;
+    clients apply pulled records idempotently.
+    """
+    if not check_sync_token():
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    since = request.args.get('since', '')
+    since_text, _, since_id = since.partition('|')
+    
+    query = Car.query
+    if since_text:
+        try:
+            since_time = datetime.fromisoformat(since_text)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(or_(Car.updated_at > since_time,
+                                 and_(Car.updated_at == since_time, Car.id > since_id)))
+    
+    changed = query.order_by(Car.updated_at, Car.id).limit(SYNC_PULL_LIMIT + 1).all()
+    has_more = len(changed) > SYNC_PULL_LIMIT
+    changed = changed[:SYNC_PULL_LIMIT]
+    position = (changed[-1].updated_at, changed[-1].id) if changed else None
+    if not has_more:
+        # Last page: don't move past changes that may still be committing
+        settled = (datetime.utcnow() - SYNC_PULL_OVERLAP, '')
+        if position is None or position > settled:
+            position = settled
+    cursor = f"{position[0].isoformat()}|{position[1]}"
     
     return jsonify({
-        'washing_count': washing_count,
-        'awaiting_payment_count': awaiting_payment_count,
-        'finished_count': finished_count,
-        'total_count': len(cars_data)
+        'changes': [car.to_dict() for car in changed],
+        'cursor': cursor,
+        'has_more': has_more
     })
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
@@ -2,6 +2,9 @@
 """
 Complete build script for Carwash Management System
 Creates both desktop executable and mobile PWA package
+
+Usage:
+    python build_all.py [--onedir]
 """
 
 import os
@@ -11,6 +14,8 @@ import shutil
 import zipfile
 from pathlib import Path
 
+from build_exe import create_spec_file, copy_build_output, check_startup_time
+
 def run_command(command, shell=False):
     """Run a command and return success status"""
     try:
@@ -36,7 +41,7 @@ def install_required_packages():
     
     return True
 
-def build_desktop_executable():
+def build_desktop_executable(onedir=False):
     """Build the desktop executable"""
     print("\n" + "="*60)
     print("Building Desktop Executable (.exe)")
@@ -47,51 +52,11 @@ def build_desktop_executable():
         print("✗ carwash_app.py not found")
         return False
     
-    # Create PyInstaller spec file
-    spec_content = '''# -*- mode: python ; coding: utf-8 -*-
-
-a = Analysis(
-    ['carwash_app.py'],
-    pathex=[],
-    binaries=[],
-    datas=[],
-    hiddenimports=['openpyxl', 'tkinter', 'tkinter.ttk', 'tkinter.filedialog', 'tkinter.messagebox'],
-    hookspath=[],
-    hooksconfig={},
-    runtime_hooks=[],
-    excludes=[],
-    noarchive=False,
-)
-
-pyz = PYZ(a.pure)
-
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='CarwashManager',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-    icon=None,
-)
-'''
-    
-    with open('carwash.spec', 'w') as f:
-        f.write(spec_content)
+    # Track cold-start import time from build to build
+    check_startup_time('carwash_app.py')
     
-    print("✓ Created PyInstaller spec file")
+    # Create PyInstaller spec file
+    create_spec_file('carwash_app.py', onedir)
     
     # Build executable
     print("Building executable... This may take several minutes...")
@@ -109,18 +74,7 @@ exe = EXE(
     
     # Create portable package
     package_dir = "CarwashManager_Desktop"
-    if os.path.exists(package_dir):
-        shutil.rmtree(package_dir)
-    
-    os.makedirs(package_dir)
-    
-    # Copy executable
-    exe_path = os.path.join("dist", "CarwashManager.exe")
-    if os.path.exists(exe_path):
-        shutil.copy2(exe_path, package_dir)
-        print(f"✓ Copied executable to {package_dir}")
-    else:
-        print("✗ Executable not found in dist folder")
+    if not copy_build_output(package_dir, onedir):
         return False
     
     # Create instructions
@@ -221,6 +175,21 @@ def build_mobile_pwa():
     web_files = [
         'app.py',
         'main.py',
+        'models.py',
+        'schema.py',
+        'analytics.py',
+        'wait_times.py',
+        'customers.py',
+        'ids.py',
+        'sync_client.py',
+        'change_version.py',
+        'fragments.py',
+        'session_store.py',
+        'staff.py',
+        'unit_of_work.py',
+        'partitions.py',
+        'replica.py',
+        'carwash_core/',
         'templates/',
         'static/',
         'pyproject.toml',
@@ -340,7 +309,7 @@ echo "Python detected: $($PYTHON_CMD --version)"
 
 # Install dependencies
 echo "Installing dependencies..."
-$PYTHON_CMD -m pip install flask flask-sqlalchemy openpyxl gunicorn
+$PYTHON_CMD -m pip install flask flask-sqlalchemy openpyxl numpy gunicorn
 
 # Check if files exist
 if [ ! -f "app.py" ]; then
@@ -348,6 +317,9 @@ if [ ! -f "app.py" ]; then
     exit 1
 fi
 
+# Create or upgrade the database schema once, before the workers start
+$PYTHON_CMD -m flask --app main init-db || exit 1
+
 echo
 echo "Starting Carwash Management System..."
 echo "Mobile-optimized version with PWA capabilities"
@@ -429,7 +401,8 @@ def main():
         return
     
     # Build desktop version
-    desktop_success = build_desktop_executable()
+    onedir = '--onedir' in sys.argv
+    desktop_success = build_desktop_executable(onedir)
     
     # Build mobile version
     mobile_success = build_mobile_pwa()
@@ -445,7 +418,10 @@ def main():
     
     if desktop_success:
         print("✓ Desktop Version: CarwashManager_Desktop/")
-        print("  - CarwashManager.exe (standalone executable)")
+        if onedir:
+            print("  - CarwashManager.exe + support files (onedir build, faster startup)")
+        else:
+            print("  - CarwashManager.exe (standalone executable)")
         print("  - Start_Carwash.bat (easy launcher)")
         print("  - README.txt (instructions)")
         print("  - CarwashManager_Desktop.zip (distribution package)")
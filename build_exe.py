@@ -2,6 +2,10 @@
 """
 Build script to create standalone executable from carwash_app.py
 Uses PyInstaller to create a single .exe file that doesn't require Python installation
+
+Usage:
+    python build_exe.py            # single CarwashManager.exe (unpacks on every launch)
+    python build_exe.py --onedir   # folder build, starts faster on shop PCs
 """
 
 import os
@@ -10,6 +14,15 @@ import subprocess
 import shutil
 from pathlib import Path
 
+import startup_bench
+
+# Import time budget for the desktop app before PyInstaller overhead
+STARTUP_BUDGET_MS = 250
+
+# Never used by the desktop app, but pulled in by optional imports in
+# openpyxl and friends if they happen to be installed in the build environment
+EXCLUDED_MODULES = ['numpy', 'pandas', 'PIL', 'flask', 'sqlalchemy', 'flask_sqlalchemy']
+
 def run_command(command, shell=False):
     """Run a command and return success status"""
     try:
@@ -44,7 +57,7 @@ def check_files():
         print("  Looking for: carwash_app_compatible.py or carwash_app.py")
         return False, None
 
-def create_spec_file(main_file):
+def create_spec_file(main_file, onedir=False):
     """Create PyInstaller spec file for customization"""
     spec_content = f'''# -*- mode: python ; coding: utf-8 -*-
 
@@ -53,16 +66,52 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['openpyxl', 'tkinter', 'tkinter.ttk'],
+    hiddenimports=['openpyxl', 'tkinter', 'tkinter.ttk', 'tkinter.filedialog', 'tkinter.messagebox'],
     hookspath=[],
-    hooksconfig={},
+    hooksconfig={{}},
     runtime_hooks=[],
-    excludes=[],
+    excludes={EXCLUDED_MODULES!r},
     noarchive=False,
 )
 
 pyz = PYZ(a.pure)
+'''
+    
+    if onedir:
+        # Binaries stay next to the exe instead of being unpacked to a temp
+        # folder on every launch
+        spec_content += '''
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='CarwashManager',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=None,
+)
 
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='CarwashManager',
+)
+'''
+    else:
+        spec_content += '''
 exe = EXE(
     pyz,
     a.scripts,
@@ -89,7 +138,20 @@ exe = EXE(
     with open('carwash.spec', 'w') as f:
         f.write(spec_content)
     
-    print("✓ Created carwash.spec file")
+    print(f"✓ Created carwash.spec file ({'onedir' if onedir else 'onefile'})")
+
+def check_startup_time(main_file):
+    """Measure the app's cold import time and log it to startup_times.csv"""
+    print("Measuring startup import time...")
+    module = os.path.splitext(os.path.basename(main_file))[0]
+    try:
+        within_budget = startup_bench.report(module, STARTUP_BUDGET_MS)
+    except RuntimeError as e:
+        print(f"✗ Could not measure startup time: {e}")
+        return
+    
+    if within_budget:
+        print(f"✓ Startup import time within {STARTUP_BUDGET_MS} ms budget")
 
 def build_executable():
     """Build the executable using PyInstaller"""
@@ -109,23 +171,35 @@ def build_executable():
         print(f"✗ Build failed: {stderr}")
         return False
 
-def create_portable_package():
-    """Create a portable package with the executable and instructions"""
-    # Create package directory
-    package_dir = "CarwashManager_Portable"
+def copy_build_output(package_dir, onedir=False):
+    """Copy the PyInstaller output from dist/ into a fresh package folder"""
     if os.path.exists(package_dir):
         shutil.rmtree(package_dir)
     
-    os.makedirs(package_dir)
+    if onedir:
+        # The whole folder is the application; the exe needs the files beside it
+        build_dir = os.path.join("dist", "CarwashManager")
+        if not os.path.isdir(build_dir):
+            print("✗ Application folder not found in dist folder")
+            return False
+        shutil.copytree(build_dir, package_dir)
+        print(f"✓ Copied application folder to {package_dir}")
+        return True
     
-    # Copy executable
+    os.makedirs(package_dir)
     exe_path = os.path.join("dist", "CarwashManager.exe")
-    if os.path.exists(exe_path):
-        shutil.copy2(exe_path, package_dir)
-        print(f"✓ Copied executable to {package_dir}")
-    else:
+    if not os.path.exists(exe_path):
         print("✗ Executable not found in dist folder")
         return False
+    shutil.copy2(exe_path, package_dir)
+    print(f"✓ Copied executable to {package_dir}")
+    return True
+
+def create_portable_package(onedir=False):
+    """Create a portable package with the executable and instructions"""
+    package_dir = "CarwashManager_Portable"
+    if not copy_build_output(package_dir, onedir):
+        return False
     
     # Create readme for portable version
     readme_content = '''# Carwash Management System - Portable Version
@@ -213,18 +287,24 @@ def main():
     print("=" * 60)
     print()
     
+    onedir = '--onedir' in sys.argv
+    
     # Check if required files exist
-    if not check_files():
+    found, main_file = check_files()
+    if not found:
         input("Press Enter to exit...")
         return
     
+    # Track cold-start import time from build to build
+    check_startup_time(main_file)
+    
     # Install PyInstaller
     if not install_pyinstaller():
         input("Press Enter to exit...")
         return
     
     # Create spec file
-    create_spec_file()
+    create_spec_file(main_file, onedir)
     
     # Build executable
     if not build_executable():
@@ -232,7 +312,7 @@ def main():
         return
     
     # Create portable package
-    if not create_portable_package():
+    if not create_portable_package(onedir):
         input("Press Enter to exit...")
         return
     
@@ -253,6 +333,8 @@ def main():
     print("Distribution:")
     print("- Copy the entire 'CarwashManager_Portable' folder to any Windows computer")
     print("- No installation required - just run CarwashManager.exe")
+    if onedir:
+        print("- Keep CarwashManager.exe together with the other files in the folder")
     print("- All data is stored locally in the same folder")
     print()
     
@@ -261,6 +343,7 @@ def main():
     if os.path.exists(exe_path):
         size_mb = os.path.getsize(exe_path) / (1024 * 1024)
         print(f"📊 Executable size: {size_mb:.1f} MB")
+    print("📈 Startup history: startup_times.csv")
     
     print()
     input("Press Enter to exit...")
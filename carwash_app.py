@@ -7,16 +7,25 @@ A standalone desktop app for managing carwash operations with car tracking and p
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
-import csv
 import json
 from datetime import datetime
-from pathlib import Path
 import shutil
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+import threading
+from collections import OrderedDict
+from itertools import islice
+import snapshot
+from sync_client import SyncClient, SYNC_FIELDS, is_offline_error
+from carwash_core import (
+    STATUS_WASHING, STATUS_AWAITING_PAYMENT, STATUS_FINISHED, CarwashError,
+    LocalCarRepository, new_car, status_change, payment_change, report_totals,
+)
+from carwash_core.exports import write_csv, build_workbook
 
 class CarwashApp:
+    PAYMENT_DIALOG_SIZE = "400x200"
+    ADD_CAR_DIALOG_SIZE = "400x300"
+    SEARCH_DIALOG_SIZE = "700x400"
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Carwash Management System")
@@ -24,13 +33,32 @@ class CarwashApp:
         
         # Data storage
         self.cars_data = {}
+        self.store = LocalCarRepository(self.cars_data)
         self.current_employee = None
         self.data_file = "carwash_data.json"
-        
-        # Car statuses
-        self.STATUS_WASHING = "washing"
-        self.STATUS_AWAITING_PAYMENT = "awaiting_payment"
-        self.STATUS_FINISHED = "finished"
+        # Binary snapshot used instead of the JSON file once created (see snapshot.py)
+        self.snapshot_file = "carwash_data.snap"
+        
+        # Day-partitioned history (one file per business day, loaded on demand)
+        self.archive_dir = "carwash_archive"
+        self.archive_cache = OrderedDict()
+        self.ARCHIVE_CACHE_DAYS = 7
+        
+        # Finished view paging
+        self.FINISHED_PAGE_SIZE = 50
+        self.finished_page = 0
+        self.finished_has_more = False
+        self.finished_date_var = None
+        
+        # Optional sync with the central server (configured via environment)
+        self.sync_client = None
+        self.sync_thread = None
+        self.sync_result = None
+        self.sync_status = ""
+        sync_url = os.environ.get("CARWASH_SYNC_URL")
+        sync_token = os.environ.get("CARWASH_SYNC_TOKEN")
+        if sync_url and sync_token:
+            self.sync_client = SyncClient(sync_url, sync_token)
         
         # Load existing data
         self.load_data()
@@ -40,43 +68,138 @@ class CarwashApp:
         
         # Auto-save every 30 seconds
         self.auto_save()
+        
+        # Sync with the server every minute (no-op when not configured)
+        self.auto_sync()
     
     def load_data(self):
-        """Load car data from JSON file"""
-        if os.path.exists(self.data_file):
+        """Load car data from the snapshot or JSON file"""
+        if os.path.exists(self.snapshot_file):
+            try:
+                self.cars_data = snapshot.load(self.snapshot_file)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load data: {e}")
+        elif os.path.exists(self.data_file):
             try:
                 with open(self.data_file, 'r') as f:
                     data = json.load(f)
                     self.cars_data = data.get('cars', {})
                     # Convert timestamp strings back to datetime objects
-                    for car_id, car_data in self.cars_data.items():
-                        if 'timestamp' in car_data:
-                            car_data['timestamp'] = datetime.fromisoformat(car_data['timestamp'])
-                        if 'completion_time' in car_data and car_data['completion_time']:
-                            car_data['completion_time'] = datetime.fromisoformat(car_data['completion_time'])
+                    for car_data in self.cars_data.values():
+                        self.deserialize_car(car_data)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load data: {e}")
+        
+        self.store = LocalCarRepository(self.cars_data)
+        
+        # Move finished cars from previous days out of the working set
+        self.rollover_finished_cars()
+    
+    def serialize_car(self, car_data):
+        """Return a JSON-serializable copy of a car record"""
+        car_copy = car_data.copy()
+        if 'timestamp' in car_copy:
+            car_copy['timestamp'] = car_copy['timestamp'].isoformat()
+        if 'completion_time' in car_copy and car_copy['completion_time']:
+            car_copy['completion_time'] = car_copy['completion_time'].isoformat()
+        return car_copy
+    
+    def deserialize_car(self, car_data):
+        """Convert timestamp strings of a loaded car record back to datetime objects"""
+        if 'timestamp' in car_data:
+            car_data['timestamp'] = datetime.fromisoformat(car_data['timestamp'])
+        if 'completion_time' in car_data and car_data['completion_time']:
+            car_data['completion_time'] = datetime.fromisoformat(car_data['completion_time'])
+        return car_data
     
     def save_data(self):
-        """Save car data to JSON file"""
+        """Save car data to the snapshot or JSON file"""
         try:
+            if os.path.exists(self.snapshot_file):
+                snapshot.dump(self.cars_data, self.snapshot_file)
+                return
+            
             # Convert datetime objects to strings for JSON serialization
             data_to_save = {'cars': {}}
             for car_id, car_data in self.cars_data.items():
-                car_copy = car_data.copy()
-                if 'timestamp' in car_copy:
-                    car_copy['timestamp'] = car_copy['timestamp'].isoformat()
-                if 'completion_time' in car_copy and car_copy['completion_time']:
-                    car_copy['completion_time'] = car_copy['completion_time'].isoformat()
-                data_to_save['cars'][car_id] = car_copy
+                data_to_save['cars'][car_id] = self.serialize_car(car_data)
             
             with open(self.data_file, 'w') as f:
                 json.dump(data_to_save, f, indent=2)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save data: {e}")
     
+    def archive_path(self, day):
+        """Return the archive file path for a business day"""
+        return os.path.join(self.archive_dir, f"{day.strftime('%Y-%m-%d')}.json")
+    
+    def load_archive_day(self, day):
+        """Lazily load the archived cars of one day (cached for recent days)"""
+        if day in self.archive_cache:
+            self.archive_cache.move_to_end(day)
+            return self.archive_cache[day]
+        
+        cars = {}
+        path = self.archive_path(day)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                cars = json.load(f).get('cars', {})
+            for car_data in cars.values():
+                self.deserialize_car(car_data)
+        
+        self.archive_cache[day] = cars
+        if len(self.archive_cache) > self.ARCHIVE_CACHE_DAYS:
+            self.archive_cache.popitem(last=False)
+        return cars
+    
+    def archive_cars(self, car_ids):
+        """Move finished cars from the working set into their day's archive file"""
+        by_day = {}
+        for car_id in car_ids:
+            car_data = self.store.get(car_id)
+            del car_data['id']
+            day = (car_data.get('completion_time') or car_data['timestamp']).date()
+            by_day.setdefault(day, {})[car_id] = car_data
+        
+        # Unsynced changes of these cars must still reach the server once they leave cars_data
+        if self.sync_client:
+            for cars in by_day.values():
+                self.sync_client.queue.detach(cars)
+        
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for day, cars in by_day.items():
+            archived = dict(self.load_archive_day(day))
+            archived.update(cars)
+            
+            # Write compact JSON via a temp file so a crash never leaves a partial day
+            path = self.archive_path(day)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'cars': {car_id: self.serialize_car(car_data)
+                                    for car_id, car_data in archived.items()}},
+                          f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            self.archive_cache[day] = archived
+        
+        return self.store.remove(car_ids)
+    
+    def rollover_finished_cars(self):
+        """Archive finished cars completed before today"""
+        stale_ids = self.store.finished_before(datetime.now().date())
+        if not stale_ids:
+            return 0
+        
+        try:
+            archived = self.archive_cars(stale_ids)
+            self.save_data()
+            return archived
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to archive previous days: {e}")
+            return 0
+    
     def auto_save(self):
         """Auto-save data every 30 seconds"""
+        self.rollover_finished_cars()
         self.save_data()
         self.root.after(30000, self.auto_save)  # 30 seconds
     
@@ -89,27 +212,27 @@ class CarwashApp:
         login_frame.pack(expand=True, fill='both')
         
         # Title
-        title_label = ttk.Label(login_frame, text="Carwash Management System")
+        title_label = self.create_label(login_frame, "Carwash Management System", 'title')
         title_label.pack(pady=30)
         
         # Employee name
-        name_label = ttk.Label(login_frame, text="Employee Name:")
+        name_label = self.create_label(login_frame, "Employee Name:")
         name_label.pack(pady=5)
-        self.name_entry = ttk.Entry(login_frame, width=30)
+        self.name_entry = self.create_entry(login_frame, width=30)
         self.name_entry.pack(pady=5)
         
         # Role selection
-        role_label = ttk.Label(login_frame, text="Role:")
+        role_label = self.create_label(login_frame, "Role:")
         role_label.pack(pady=(20, 5))
         self.role_var = tk.StringVar(value="washer")
         
         role_frame = ttk.Frame(login_frame)
         role_frame.pack(pady=5)
         
-        washer_radio = ttk.Radiobutton(role_frame, text="Washer", variable=self.role_var, value="washer")
+        washer_radio = self.create_radiobutton(role_frame, "Washer", self.role_var, "washer")
         washer_radio.pack(side='left', padx=20)
         
-        cashier_radio = ttk.Radiobutton(role_frame, text="Cashier", variable=self.role_var, value="cashier")
+        cashier_radio = self.create_radiobutton(role_frame, "Cashier", self.role_var, "cashier")
         cashier_radio.pack(side='left', padx=20)
         
         # Login button
@@ -146,7 +269,8 @@ class CarwashApp:
         header_frame = ttk.Frame(main_frame)
         header_frame.pack(fill='x', pady=(0, 10))
         
-        header_label = ttk.Label(header_frame, text=f"Dashboard - {self.current_employee['name']} ({self.current_employee['role'].title()})")
+        header_text = f"Dashboard - {self.current_employee['name']} ({self.current_employee['role'].title()})"
+        header_label = self.create_label(header_frame, header_text, 'heading')
         header_label.pack(side='left')
         
         # Buttons frame
@@ -157,6 +281,8 @@ class CarwashApp:
             ttk.Button(btn_frame, text="Add New Car", 
                       command=self.show_add_car_dialog).pack(side='left', padx=5)
         
+        ttk.Button(btn_frame, text="Search", 
+                  command=self.show_search_dialog).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Export Excel", 
                   command=self.export_excel).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Export CSV", 
@@ -173,22 +299,23 @@ class CarwashApp:
         # Washing tab
         washing_frame = ttk.Frame(notebook)
         notebook.add(washing_frame, text="Washing")
-        self.create_car_list(washing_frame, self.STATUS_WASHING, "Move to Payment")
+        self.create_car_list(washing_frame, STATUS_WASHING, "Move to Payment")
         
         # Awaiting Payment tab
         payment_frame = ttk.Frame(notebook)
         notebook.add(payment_frame, text="Awaiting Payment")
-        self.create_car_list(payment_frame, self.STATUS_AWAITING_PAYMENT, "Process Payment")
+        self.create_car_list(payment_frame, STATUS_AWAITING_PAYMENT, "Process Payment")
         
         # Finished tab
         finished_frame = ttk.Frame(notebook)
         notebook.add(finished_frame, text="Finished")
-        self.create_car_list(finished_frame, self.STATUS_FINISHED, None)
+        self.create_finished_controls(finished_frame)
+        self.create_car_list(finished_frame, STATUS_FINISHED, None)
         
         # Status bar
         self.status_var = tk.StringVar()
         self.update_status()
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief='sunken')
+        status_bar = self.create_label(main_frame, None, 'status', textvariable=self.status_var, relief='sunken')
         status_bar.pack(fill='x', side='bottom')
         
         # Auto-refresh every 5 seconds
@@ -227,26 +354,106 @@ class CarwashApp:
         # Store reference for updates
         setattr(self, f'{status}_tree', tree)
     
+    def create_finished_controls(self, parent):
+        """Create the date filter and paging controls for the Finished tab"""
+        controls = ttk.Frame(parent)
+        controls.pack(side='top', fill='x', pady=5)
+        
+        ttk.Label(controls, text="Date (YYYY-MM-DD):").pack(side='left', padx=5)
+        self.finished_date_var = tk.StringVar(value=datetime.now().strftime('%Y-%m-%d'))
+        date_entry = ttk.Entry(controls, textvariable=self.finished_date_var, width=12)
+        date_entry.pack(side='left', padx=5)
+        date_entry.bind('<Return>', lambda e: self.show_finished_page(0))
+        
+        ttk.Button(controls, text="Show",
+                  command=lambda: self.show_finished_page(0)).pack(side='left', padx=5)
+        ttk.Button(controls, text="Today",
+                  command=self.show_finished_today).pack(side='left', padx=5)
+        
+        ttk.Button(controls, text="Next >",
+                  command=lambda: self.show_finished_page(self.finished_page + 1)).pack(side='right', padx=5)
+        self.finished_page_var = tk.StringVar()
+        ttk.Label(controls, textvariable=self.finished_page_var).pack(side='right', padx=5)
+        ttk.Button(controls, text="< Prev",
+                  command=lambda: self.show_finished_page(self.finished_page - 1)).pack(side='right', padx=5)
+        
+        self.finished_page = 0
+    
+    def show_finished_today(self):
+        """Reset the Finished view to the first page of today"""
+        self.finished_date_var.set(datetime.now().strftime('%Y-%m-%d'))
+        self.show_finished_page(0)
+    
+    def show_finished_page(self, page):
+        """Switch the Finished view to the given page"""
+        if page < 0 or (page > self.finished_page and not self.finished_has_more):
+            return
+        self.finished_page = page
+        if hasattr(self, 'finished_tree'):
+            self.populate_car_list(self.finished_tree, STATUS_FINISHED)
+    
+    def get_finished_date(self):
+        """Return the date selected in the Finished view (defaults to today)"""
+        if self.finished_date_var is not None:
+            try:
+                return datetime.strptime(self.finished_date_var.get().strip(), '%Y-%m-%d').date()
+            except ValueError:
+                pass
+        return datetime.now().date()
+    
+    def iter_cars(self, status, day=None):
+        """Lazily yield car records with a status (finished cars: of one completion day)"""
+        if day is None:
+            yield from self.store.iter_by_status(status)
+            return
+        
+        if status != STATUS_FINISHED:
+            return
+        yield from self.store.iter_finished_on(day)
+        # Archived days only hold finished cars
+        for car_id, car_data in self.load_archive_day(day).items():
+            yield dict(car_data, id=car_id)
+    
+    def get_finished_page(self, day, page):
+        """Return one page of finished cars for a day and whether more pages follow"""
+        start = page * self.FINISHED_PAGE_SIZE
+        # Fetch one extra row to know if there is a next page without counting everything
+        rows = list(islice(self.iter_cars(STATUS_FINISHED, day),
+                           start, start + self.FINISHED_PAGE_SIZE + 1))
+        return rows[:self.FINISHED_PAGE_SIZE], len(rows) > self.FINISHED_PAGE_SIZE
+    
     def populate_car_list(self, tree, status):
         """Populate the car list with current data"""
         # Clear existing items
-        for item in tree.get_children():
-            tree.delete(item)
+        tree.delete(*tree.get_children())
+        
+        if status == STATUS_FINISHED:
+            # Only load the visible window of finished cars
+            day = self.get_finished_date()
+            rows, has_more = self.get_finished_page(day, self.finished_page)
+            if not rows and self.finished_page > 0:
+                self.finished_page = 0
+                rows, has_more = self.get_finished_page(day, 0)
+            self.finished_has_more = has_more
+            if hasattr(self, 'finished_page_var'):
+                more_text = " (more)" if has_more else ""
+                self.finished_page_var.set(f"Page {self.finished_page + 1}{more_text}")
+        else:
+            rows = self.iter_cars(status)
         
         # Add cars with matching status
-        for car_id, car_data in self.cars_data.items():
-            if car_data['status'] == status:
-                payment_text = f"₱{car_data.get('payment_amount', 0):.2f}" if car_data.get('payment_amount') else ""
-                time_text = car_data['timestamp'].strftime('%H:%M:%S')
-                
-                tree.insert('', 'end', values=(
-                    car_data['car_name'],
-                    car_data['plate_number'],
-                    car_data.get('washer_name', ''),
-                    car_data.get('cashier_name', ''),
-                    payment_text,
-                    time_text
-                ), tags=(car_id,))
+        for car_data in rows:
+            payment_text = f"₱{car_data.get('payment_amount', 0):.2f}" if car_data.get('payment_amount') else ""
+            time_text = car_data['timestamp'].strftime('%H:%M:%S')
+            
+            tree.insert('', 'end', values=(
+                car_data['car_name'],
+                car_data['plate_number'],
+                car_data.get('washer_name', ''),
+                car_data.get('cashier_name', ''),
+                payment_text,
+                time_text
+            ), tags=(car_data['id'],))
     
     def handle_action(self, tree, status):
         """Handle action button clicks"""
@@ -257,43 +464,53 @@ class CarwashApp:
         
         car_id = tree.item(selection[0])['tags'][0]
         
-        if status == self.STATUS_WASHING:
+        if status == STATUS_WASHING:
             self.move_to_payment(car_id)
-        elif status == self.STATUS_AWAITING_PAYMENT:
+        elif status == STATUS_AWAITING_PAYMENT:
             self.process_payment(car_id)
     
     def move_to_payment(self, car_id):
         """Move car from washing to awaiting payment"""
-        if car_id in self.cars_data:
-            self.cars_data[car_id]['status'] = self.STATUS_AWAITING_PAYMENT
-            self.cars_data[car_id]['washer_name'] = self.current_employee['name']
-            self.refresh_dashboard()
-            messagebox.showinfo("Success", "Car moved to payment queue")
+        car_data = self.store.get(car_id)
+        if car_data is None:
+            return
+        
+        try:
+            changes = status_change(car_data, self.current_employee['role'],
+                                    self.current_employee['name'], STATUS_AWAITING_PAYMENT)
+        except CarwashError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        self.store.update(car_id, changes)
+        self.record_change(car_id, changes)
+        self.refresh_dashboard()
+        messagebox.showinfo("Success", "Car moved to payment queue")
     
     def process_payment(self, car_id):
         """Process payment for a car"""
-        if car_id not in self.cars_data:
+        car_data = self.store.get(car_id)
+        if car_data is None:
             return
         
         # Create payment dialog
         dialog = tk.Toplevel(self.root)
         dialog.title("Process Payment")
-        dialog.geometry("400x200")
+        dialog.geometry(self.PAYMENT_DIALOG_SIZE)
         dialog.transient(self.root)
         dialog.grab_set()
-        
-        car_data = self.cars_data[car_id]
+        self.style_window(dialog)
         
         # Car info
-        car_label = ttk.Label(dialog, text=f"Car: {car_data['car_name']}")
+        car_label = self.create_label(dialog, f"Car: {car_data['car_name']}", 'dialog_title')
         car_label.pack(pady=10)
-        plate_label = ttk.Label(dialog, text=f"Plate: {car_data['plate_number']}")
+        plate_label = self.create_label(dialog, f"Plate: {car_data['plate_number']}", 'detail')
         plate_label.pack()
         
         # Payment amount
-        amount_label = ttk.Label(dialog, text="Payment Amount (₱):")
+        amount_label = self.create_label(dialog, "Payment Amount (₱):")
         amount_label.pack(pady=(20, 5))
-        payment_entry = ttk.Entry(dialog, width=20)
+        payment_entry = self.create_entry(dialog, width=20)
         payment_entry.pack(pady=5)
         payment_entry.focus()
         
@@ -303,22 +520,17 @@ class CarwashApp:
         
         def confirm_payment():
             try:
-                amount = float(payment_entry.get())
-                if amount <= 0:
-                    messagebox.showerror("Error", "Amount must be greater than 0")
-                    return
-                
-                self.cars_data[car_id]['payment_amount'] = amount
-                self.cars_data[car_id]['cashier_name'] = self.current_employee['name']
-                self.cars_data[car_id]['status'] = self.STATUS_FINISHED
-                self.cars_data[car_id]['completion_time'] = datetime.now()
-                
-                self.refresh_dashboard()
-                dialog.destroy()
-                messagebox.showinfo("Success", f"Payment of ₱{amount:.2f} processed successfully")
-                
-            except ValueError:
-                messagebox.showerror("Error", "Please enter a valid amount")
+                changes = payment_change(car_data, payment_entry.get(), self.current_employee['name'])
+            except CarwashError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            
+            self.store.update(car_id, changes)
+            self.record_change(car_id, changes)
+            
+            self.refresh_dashboard()
+            dialog.destroy()
+            messagebox.showinfo("Success", f"Payment of ₱{changes['payment_amount']:.2f} processed successfully")
         
         ttk.Button(btn_frame, text="Process Payment", 
                   command=confirm_payment).pack(side='left', padx=5)
@@ -328,37 +540,81 @@ class CarwashApp:
         # Bind Enter key
         dialog.bind('<Return>', lambda e: confirm_payment())
     
+    def show_search_dialog(self):
+        """Show dialog to find cars by plate (prefix or similar) or car name"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Search Cars")
+        dialog.geometry(self.SEARCH_DIALOG_SIZE)
+        dialog.transient(self.root)
+        self.style_window(dialog)
+        
+        search_label = self.create_label(dialog, "Plate number or car name:")
+        search_label.pack(pady=5)
+        search_entry = self.create_entry(dialog, width=30)
+        search_entry.pack(pady=5)
+        search_entry.focus()
+        
+        columns = ('Car Name', 'Plate Number', 'Status', 'Match', 'Time')
+        tree = ttk.Treeview(dialog, columns=columns, show='headings', height=12)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=120)
+        tree.pack(expand=True, fill='both', padx=10, pady=10)
+        
+        match_labels = {'plate': 'Plate', 'similar_plate': 'Similar plate', 'car_name': 'Car name'}
+        
+        def run_search(event=None):
+            tree.delete(*tree.get_children())
+            query = search_entry.get().strip()
+            if not query:
+                return
+            # Searches today's store; archived days are not indexed
+            for car_data in self.store.search(query, limit=50):
+                tree.insert('', 'end', values=(
+                    car_data['car_name'],
+                    car_data['plate_number'],
+                    car_data['status'].replace('_', ' ').title(),
+                    match_labels[car_data['match']],
+                    car_data['timestamp'].strftime('%Y-%m-%d %H:%M')
+                ), tags=(car_data['id'],))
+        
+        # Results update as the plate is typed
+        search_entry.bind('<KeyRelease>', run_search)
+        
+        ttk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=5)
+    
     def show_add_car_dialog(self):
         """Show dialog to add a new car"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Add New Car")
-        dialog.geometry("400x300")
+        dialog.geometry(self.ADD_CAR_DIALOG_SIZE)
         dialog.transient(self.root)
         dialog.grab_set()
+        self.style_window(dialog)
         
         # Car name
-        car_name_label = ttk.Label(dialog, text="Car Name:")
+        car_name_label = self.create_label(dialog, "Car Name:")
         car_name_label.pack(pady=5)
-        car_name_entry = ttk.Entry(dialog, width=30)
+        car_name_entry = self.create_entry(dialog, width=30)
         car_name_entry.pack(pady=5)
         car_name_entry.focus()
         
         # Plate number
-        plate_label = ttk.Label(dialog, text="Plate Number:")
+        plate_label = self.create_label(dialog, "Plate Number:")
         plate_label.pack(pady=5)
-        plate_entry = ttk.Entry(dialog, width=30)
+        plate_entry = self.create_entry(dialog, width=30)
         plate_entry.pack(pady=5)
         
         # Photo section
-        photo_label = ttk.Label(dialog, text="License Plate Photo (optional):")
+        photo_label = self.create_label(dialog, "License Plate Photo (optional):")
         photo_label.pack(pady=5)
         
         photo_frame = ttk.Frame(dialog)
         photo_frame.pack(pady=5)
         
         photo_path_var = tk.StringVar()
-        photo_label = ttk.Label(photo_frame, textvariable=photo_path_var)
-        photo_label.pack()
+        photo_display = self.create_label(photo_frame, None, 'hint', textvariable=photo_path_var)
+        photo_display.pack()
         
         def browse_photo():
             filename = filedialog.askopenfilename(
@@ -377,16 +633,12 @@ class CarwashApp:
         btn_frame.pack(pady=20)
         
         def add_car():
-            car_name = car_name_entry.get().strip()
-            plate_number = plate_entry.get().strip()
-            
-            if not car_name or not plate_number:
-                messagebox.showerror("Error", "Please fill in all required fields")
+            try:
+                fields = new_car(car_name_entry.get(), plate_entry.get(), self.current_employee['name'])
+            except CarwashError as e:
+                messagebox.showerror("Error", str(e))
                 return
             
-            # Generate unique ID
-            car_id = f"car_{len(self.cars_data) + 1}_{datetime.now().strftime('%H%M%S')}"
-            
             # Handle photo upload if selected
             photo_filename = None
             if hasattr(browse_photo, 'file_path'):
@@ -403,22 +655,14 @@ class CarwashApp:
                 except Exception as e:
                     messagebox.showwarning("Warning", f"Failed to save photo: {e}")
             
-            # Add car data
-            self.cars_data[car_id] = {
-                'car_name': car_name,
-                'plate_number': plate_number,
-                'status': self.STATUS_WASHING,
-                'timestamp': datetime.now(),
-                'washer_name': self.current_employee['name'],
-                'cashier_name': None,
-                'payment_amount': None,
-                'completion_time': None,
-                'photo_filename': photo_filename
-            }
+            # Add car data (the store assigns a time-ordered ID shared with the web app)
+            fields['photo_filename'] = photo_filename
+            car_id = self.store.add(fields)
+            self.record_change(car_id, SYNC_FIELDS)
             
             self.refresh_dashboard()
             dialog.destroy()
-            messagebox.showinfo("Success", f"Car '{car_name}' added to washing queue")
+            messagebox.showinfo("Success", f"Car '{fields['car_name']}' added to washing queue")
         
         ttk.Button(btn_frame, text="Add Car", 
                   command=add_car).pack(side='left', padx=5)
@@ -432,13 +676,8 @@ class CarwashApp:
         """Export daily data to Excel"""
         today = datetime.now().date()
         
-        # Filter finished cars from today
-        finished_today = []
-        for car in self.cars_data.values():
-            if (car['status'] == self.STATUS_FINISHED and 
-                car.get('completion_time') and 
-                car['completion_time'].date() == today):
-                finished_today.append(car)
+        # Finished cars from today, including any already archived by a reset
+        finished_today = list(self.iter_cars(STATUS_FINISHED, today))
         
         if not finished_today:
             messagebox.showinfo("Info", "No completed cars found for today.")
@@ -456,63 +695,7 @@ class CarwashApp:
         
         try:
             # Create Excel workbook
-            wb = Workbook()
-            ws = wb.active
-            ws.title = f"Carwash Report {today.strftime('%Y-%m-%d')}"
-            
-            # Define styles
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # Headers
-            headers = ['Car Name', 'Plate Number', 'Washer', 'Cashier', 'Payment Amount (₱)', 'Start Time', 'Completion Time']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-            
-            # Data rows
-            total_payment = 0
-            for row, car in enumerate(finished_today, 2):
-                data = [
-                    car['car_name'],
-                    car['plate_number'],
-                    car.get('washer_name', ''),
-                    car.get('cashier_name', ''),
-                    car.get('payment_amount', 0),
-                    car['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                    car['completion_time'].strftime('%Y-%m-%d %H:%M:%S') if car.get('completion_time') else ''
-                ]
-                
-                for col, value in enumerate(data, 1):
-                    cell = ws.cell(row=row, column=col, value=value)
-                    cell.border = border
-                
-                if car.get('payment_amount'):
-                    total_payment += car['payment_amount']
-            
-            # Summary row
-            summary_row = len(finished_today) + 3
-            ws.cell(row=summary_row, column=1, value="TOTAL CARS:").font = Font(bold=True)
-            ws.cell(row=summary_row, column=2, value=len(finished_today)).font = Font(bold=True)
-            ws.cell(row=summary_row + 1, column=1, value="TOTAL REVENUE:").font = Font(bold=True)
-            ws.cell(row=summary_row + 1, column=2, value=f"₱{total_payment:.2f}").font = Font(bold=True)
-            
-            # Auto-adjust column widths
-            for col in range(1, len(headers) + 1):
-                column_letter = get_column_letter(col)
-                max_length = 0
-                for row in range(1, len(finished_today) + 2):
-                    cell_value = str(ws[f"{column_letter}{row}"].value)
-                    max_length = max(max_length, len(cell_value))
-                ws.column_dimensions[column_letter].width = min(max_length + 2, 30)
+            wb = build_workbook(finished_today, today)
             
             # Save file
             wb.save(filename)
@@ -525,13 +708,8 @@ class CarwashApp:
         """Export daily data to CSV"""
         today = datetime.now().date()
         
-        # Filter finished cars from today
-        finished_today = []
-        for car in self.cars_data.values():
-            if (car['status'] == self.STATUS_FINISHED and 
-                car.get('completion_time') and 
-                car['completion_time'].date() == today):
-                finished_today.append(car)
+        # Finished cars from today, including any already archived by a reset
+        finished_today = list(self.iter_cars(STATUS_FINISHED, today))
         
         if not finished_today:
             messagebox.showinfo("Info", "No completed cars found for today.")
@@ -549,32 +727,7 @@ class CarwashApp:
         
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write headers
-                writer.writerow(['Car Name', 'Plate Number', 'Washer', 'Cashier', 
-                               'Payment Amount (₱)', 'Start Time', 'Completion Time'])
-                
-                # Write data
-                total_payment = 0
-                for car in finished_today:
-                    writer.writerow([
-                        car['car_name'],
-                        car['plate_number'],
-                        car.get('washer_name', ''),
-                        car.get('cashier_name', ''),
-                        car.get('payment_amount', 0),
-                        car['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                        car['completion_time'].strftime('%Y-%m-%d %H:%M:%S') if car.get('completion_time') else ''
-                    ])
-                    
-                    if car.get('payment_amount'):
-                        total_payment += car['payment_amount']
-                
-                # Write summary
-                writer.writerow([])
-                writer.writerow(['TOTAL CARS:', len(finished_today)])
-                writer.writerow(['TOTAL REVENUE:', f'₱{total_payment:.2f}'])
+                write_csv(finished_today, csvfile)
             
             messagebox.showinfo("Success", f"CSV report exported successfully!\nSaved as: {filename}")
             
@@ -582,50 +735,52 @@ class CarwashApp:
             messagebox.showerror("Error", f"Failed to export CSV: {e}")
     
     def reset_daily_data(self):
-        """Reset all daily data"""
-        total_cars = len(self.cars_data)
-        finished_cars = len([car for car in self.cars_data.values() if car['status'] == self.STATUS_FINISHED])
+        """Archive finished cars and start a fresh working day"""
+        finished_ids = [car['id'] for car in self.iter_cars(STATUS_FINISHED)]
+        in_progress = len(self.cars_data) - len(finished_ids)
         
-        if total_cars == 0:
-            messagebox.showinfo("Info", "No data to reset.")
+        if not finished_ids:
+            messagebox.showinfo("Info", "No finished cars to reset.")
             return
         
         # Confirmation dialog
         result = messagebox.askyesno(
             "Confirm Reset", 
             f"Are you sure you want to reset all daily data?\n\n"
-            f"This will clear {total_cars} cars ({finished_cars} finished cars).\n"
-            f"This action cannot be undone!"
+            f"{len(finished_ids)} finished cars will be moved to the history archive.\n"
+            f"{in_progress} cars still in progress will stay on the dashboard."
         )
         
         if result:
-            self.cars_data.clear()
+            try:
+                self.archive_cars(finished_ids)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to archive data: {e}")
+                return
             self.save_data()
             self.refresh_dashboard()
-            messagebox.showinfo("Success", f"Daily data reset completed. Cleared {total_cars} cars.")
+            messagebox.showinfo("Success", f"Daily data reset completed. Archived {len(finished_ids)} cars.")
     
     def refresh_dashboard(self):
         """Refresh the dashboard display"""
         if hasattr(self, 'washing_tree'):
-            self.populate_car_list(self.washing_tree, self.STATUS_WASHING)
+            self.populate_car_list(self.washing_tree, STATUS_WASHING)
         if hasattr(self, 'awaiting_payment_tree'):
-            self.populate_car_list(self.awaiting_payment_tree, self.STATUS_AWAITING_PAYMENT)
+            self.populate_car_list(self.awaiting_payment_tree, STATUS_AWAITING_PAYMENT)
         if hasattr(self, 'finished_tree'):
-            self.populate_car_list(self.finished_tree, self.STATUS_FINISHED)
+            self.populate_car_list(self.finished_tree, STATUS_FINISHED)
         
         self.update_status()
     
     def update_status(self):
         """Update status bar"""
-        washing_count = len([c for c in self.cars_data.values() if c['status'] == self.STATUS_WASHING])
-        payment_count = len([c for c in self.cars_data.values() if c['status'] == self.STATUS_AWAITING_PAYMENT])
-        finished_count = len([c for c in self.cars_data.values() if c['status'] == self.STATUS_FINISHED])
-        
-        today_revenue = sum(c.get('payment_amount', 0) for c in self.cars_data.values() 
-                           if c['status'] == self.STATUS_FINISHED and c.get('completion_time') 
-                           and c['completion_time'].date() == datetime.now().date())
+        counts = self.store.count_by_status()
+        _, today_revenue = report_totals(self.store.iter_finished_on(datetime.now().date()))
         
-        status_text = f"Washing: {washing_count} | Awaiting Payment: {payment_count} | Finished: {finished_count} | Today's Revenue: ₱{today_revenue:.2f}"
+        status_text = (f"Washing: {counts[STATUS_WASHING]} | Awaiting Payment: {counts[STATUS_AWAITING_PAYMENT]} | "
+                       f"Finished: {counts[STATUS_FINISHED]} | Today's Revenue: ₱{today_revenue:.2f}")
+        if self.sync_status:
+            status_text += f" | {self.sync_status}"
         self.status_var.set(status_text)
     
     def auto_refresh(self):
@@ -633,6 +788,66 @@ class CarwashApp:
         self.refresh_dashboard()
         self.root.after(10000, self.auto_refresh)  # 10 seconds
     
+    def record_change(self, car_id, fields):
+        """Queue a local change for the next sync with the server"""
+        if self.sync_client:
+            self.sync_client.queue.record(car_id, list(fields))
+    
+    def auto_sync(self):
+        """Start a background sync round every minute"""
+        if self.sync_client and (self.sync_thread is None or not self.sync_thread.is_alive()):
+            self.start_sync()
+        self.root.after(60000, self.auto_sync)  # 60 seconds
+    
+    def start_sync(self):
+        """Push queued changes and pull server changes on a worker thread"""
+        batch = self.sync_client.queue.next_batch(self.cars_data)
+        cursor = self.sync_client.queue.cursor
+        result = {'batch': batch}
+        
+        def worker():
+            try:
+                result['exchanged'] = self.sync_client.exchange(batch, cursor)
+            except Exception as e:
+                result['error'] = e
+        
+        self.sync_result = result
+        self.sync_thread = threading.Thread(target=worker, daemon=True)
+        self.sync_thread.start()
+        self.root.after(500, self.finish_sync)
+    
+    def finish_sync(self):
+        """Apply the results of a finished sync round on the UI thread"""
+        if self.sync_thread.is_alive():
+            self.root.after(500, self.finish_sync)
+            return
+        
+        result = self.sync_result
+        queue = self.sync_client.queue
+        if 'error' in result:
+            # Keep the batch in flight; it is retried with the same idempotency key
+            pending = len(queue.pending) + (len(queue.in_flight['changes']) if queue.in_flight else 0)
+            if is_offline_error(result['error']):
+                self.sync_status = f"Offline ({pending} changes queued)"
+            else:
+                self.sync_status = f"Sync error: {result['error']}"
+            return
+        
+        pushed, records, cursor = result['exchanged']
+        rejected = pushed['errors'] if pushed else []
+        if result['batch']:
+            queue.acknowledge()
+        # Rejected edits can't be retried as they are: take the server's version instead
+        reset = self.sync_client.apply_rejected(self.cars_data, rejected)
+        self.sync_client.apply_pulled(self.cars_data, records, cursor)
+        self.store.reindex()
+        self.sync_status = f"Synced {datetime.now().strftime('%H:%M')}"
+        if rejected:
+            self.sync_status += f" ({len(rejected)} changes rejected: {rejected[0]['error']})"
+        
+        if (records or reset) and self.current_employee:
+            self.refresh_dashboard()
+    
     def logout(self):
         """Logout current employee"""
         self.current_employee = None
@@ -643,8 +858,28 @@ class CarwashApp:
         """Clear all widgets from screen"""
         for widget in self.root.winfo_children():
             widget.destroy()
+    
+    # Widget factories, overridden by the styled variant in carwash_app_compatible.py
+    
+    def create_label(self, parent, text, style='body', **kwargs):
+        """Create a label; style is one of title, heading, body, detail, dialog_title, hint, status"""
+        if text is not None:
+            kwargs['text'] = text
+        return ttk.Label(parent, **kwargs)
+    
+    def create_entry(self, parent, width):
+        """Create a text entry"""
+        return ttk.Entry(parent, width=width)
+    
+    def create_radiobutton(self, parent, text, variable, value):
+        """Create a radio button"""
+        return ttk.Radiobutton(parent, text=text, variable=variable, value=value)
+    
+    def style_window(self, window):
+        """Apply window-level styling to a dialog"""
+        pass
 
-def main():
+def main(app_class=CarwashApp):
     """Main application entry point"""
     root = tk.Tk()
     
@@ -656,7 +891,7 @@ def main():
         # Fallback to default theme if clam is not available
         pass
     
-    app = CarwashApp(root)
+    app = app_class(root)
     
     # Handle window closing
     def on_closing():
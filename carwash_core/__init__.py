@@ -0,0 +1,15 @@
+"""
+Shared carwash domain core: car lifecycle rules, the repository interface
+with its local (desktop) and SQLAlchemy (web) implementations, and the
+daily and grouped report exports, and plate search.
+"""
+
+from .domain import (
+    STATUS_WASHING, STATUS_AWAITING_PAYMENT, STATUS_FINISHED, STATUSES,
+    ROLE_WASHER, ROLE_CASHIER, ROLES, CAR_FIELDS, REPORT_GROUPS, MAX_REPORT_DAYS,
+    CarwashError, can_add_car, new_car, status_change, sync_status_change, parse_payment_amount,
+    payment_change, is_finished_on, report_totals, parse_report_range,
+    report_group_key, summary_row,
+)
+from .repository import CarRepository, LocalCarRepository, day_bounds
+from .search import normalize_plate, similarity, PlateIndex
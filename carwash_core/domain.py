@@ -0,0 +1,144 @@
+"""
+Car lifecycle rules shared by the web app and the desktop apps.
+Cars are plain dicts with the fields in CAR_FIELDS (plus 'id' when they come
+from a repository); datetimes are datetime objects.
+"""
+
+import math
+from datetime import date, datetime
+
+# Car statuses
+STATUS_WASHING = "washing"
+STATUS_AWAITING_PAYMENT = "awaiting_payment"
+STATUS_FINISHED = "finished"
+STATUSES = (STATUS_WASHING, STATUS_AWAITING_PAYMENT, STATUS_FINISHED)
+
+# Employee roles
+ROLE_WASHER = "washer"
+ROLE_CASHIER = "cashier"
+ROLES = (ROLE_WASHER, ROLE_CASHIER)
+
+# Ways a performance report over finished cars can be grouped
+REPORT_GROUPS = ('day', 'washer', 'cashier', 'hour')
+MAX_REPORT_DAYS = 366
+
+CAR_FIELDS = (
+    'car_name', 'plate_number', 'status', 'timestamp', 'washer_name',
+    'cashier_name', 'payment_amount', 'completion_time', 'photo_filename',
+)
+
+class CarwashError(Exception):
+    """An action that breaks a business rule; the message is shown to the user"""
+
+def can_add_car(role):
+    return role == ROLE_WASHER
+
+def new_car(car_name, plate_number, washer_name, photo_filename=None, now=None):
+    """Return the fields of a car that has just started washing"""
+    car_name = (car_name or '').strip()
+    plate_number = (plate_number or '').strip()
+    if not car_name or not plate_number:
+        raise CarwashError("Please enter both car name and plate number.")
+
+    return {
+        'car_name': car_name,
+        'plate_number': plate_number,
+        'status': STATUS_WASHING,
+        'timestamp': now or datetime.now(),
+        'washer_name': washer_name,
+        'cashier_name': None,
+        'payment_amount': None,
+        'completion_time': None,
+        'photo_filename': photo_filename,
+    }
+
+def status_change(car, role, employee_name, new_status):
+    """Return the field changes for moving a car to new_status"""
+    if car['status'] == STATUS_WASHING and new_status == STATUS_AWAITING_PAYMENT:
+        changes = {'status': STATUS_AWAITING_PAYMENT}
+        # Credit the washer who finished the wash
+        if role == ROLE_WASHER:
+            changes['washer_name'] = employee_name
+        return changes
+
+    if role == ROLE_WASHER and new_status == STATUS_WASHING and car['status'] != STATUS_FINISHED:
+        return {'status': STATUS_WASHING, 'washer_name': employee_name}
+
+    raise CarwashError("Invalid status update.")
+
+def sync_status_change(current_status, new_status):
+    """Check a status pushed by a desktop app against the car's status on the server"""
+    if new_status not in STATUSES:
+        raise CarwashError(f"Unknown status {new_status!r}.")
+    # Offline changes are coalesced, so any move is allowed except out of finished
+    if current_status == STATUS_FINISHED and new_status != STATUS_FINISHED:
+        raise CarwashError("Finished cars can't change status.")
+
+def parse_payment_amount(value):
+    """Return a positive, finite payment amount parsed from user input"""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise CarwashError("Please enter a valid payment amount.")
+    if not amount > 0 or not math.isfinite(amount):
+        raise CarwashError("Please enter a valid payment amount.")
+    return amount
+
+def payment_change(car, amount, cashier_name, now=None):
+    """Return the field changes for taking payment on a car"""
+    if car['status'] != STATUS_AWAITING_PAYMENT:
+        raise CarwashError("This car is not awaiting payment.")
+
+    return {
+        'status': STATUS_FINISHED,
+        'payment_amount': parse_payment_amount(amount),
+        'cashier_name': cashier_name,
+        'completion_time': now or datetime.now(),
+    }
+
+def is_finished_on(car, day):
+    completion_time = car.get('completion_time')
+    return car['status'] == STATUS_FINISHED and completion_time is not None and completion_time.date() == day
+
+def report_totals(cars):
+    """Return (number of cars, total revenue) for a list of finished cars"""
+    count = 0
+    revenue = 0.0
+    for car in cars:
+        count += 1
+        revenue += car.get('payment_amount') or 0
+    return count, revenue
+
+def parse_report_range(first_text, last_text, today):
+    """Return the (first, last) days of a report from YYYY-MM-DD input; both default to today"""
+    try:
+        first_day = date.fromisoformat(first_text) if first_text else today
+        last_day = date.fromisoformat(last_text) if last_text else today
+    except ValueError:
+        raise CarwashError("Dates must be in YYYY-MM-DD format.")
+    if last_day < first_day:
+        raise CarwashError("The end date must not be before the start date.")
+    if (last_day - first_day).days >= MAX_REPORT_DAYS:
+        raise CarwashError(f"Reports can cover at most {MAX_REPORT_DAYS} days.")
+    return first_day, last_day
+
+def report_group_key(car, group_by):
+    """Return the report group of a finished car (see REPORT_GROUPS)"""
+    if group_by == 'day':
+        return car['completion_time'].date().isoformat()
+    if group_by == 'hour':
+        return car['completion_time'].hour
+    if group_by == 'washer':
+        return car.get('washer_name') or ''
+    if group_by == 'cashier':
+        return car.get('cashier_name') or ''
+    raise CarwashError(f"Reports can be grouped by {', '.join(REPORT_GROUPS)}.")
+
+def summary_row(group, cars, revenue):
+    """Return one row of a grouped report"""
+    return {
+        'group': group,
+        'cars': cars,
+        'revenue': revenue,
+        'average': revenue / cars if cars else 0.0,
+    }
@@ -0,0 +1,124 @@
+"""
+Daily and grouped report exports (CSV and Excel) shared by the web and desktop apps.
+"""
+
+import csv
+
+from .domain import report_totals
+
+REPORT_HEADERS = ['Car Name', 'Plate Number', 'Washer', 'Cashier', 'Payment Amount (₱)', 'Start Time', 'Completion Time']
+
+# Column heading for the group of each grouped report (see REPORT_GROUPS)
+GROUP_HEADERS = {'day': 'Date', 'washer': 'Washer', 'cashier': 'Cashier', 'hour': 'Hour'}
+SUMMARY_HEADERS = ['Cars', 'Revenue (₱)', 'Average (₱)']
+
+def report_row(car, default_cashier=''):
+    """Return the report columns for one finished car"""
+    return [
+        car['car_name'],
+        car['plate_number'],
+        car.get('washer_name') or '',
+        car.get('cashier_name') or default_cashier,
+        car.get('payment_amount') or 0,
+        car['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+        car['completion_time'].strftime('%Y-%m-%d %H:%M:%S') if car.get('completion_time') else ''
+    ]
+
+def write_csv(cars, csvfile, default_cashier=''):
+    """Write the daily report for finished cars to an open text file"""
+    writer = csv.writer(csvfile)
+    writer.writerow(REPORT_HEADERS)
+    for car in cars:
+        writer.writerow(report_row(car, default_cashier))
+
+    total_cars, total_payment = report_totals(cars)
+    writer.writerow([])
+    writer.writerow(['TOTAL CARS:', total_cars])
+    writer.writerow(['TOTAL REVENUE:', f'₱{total_payment:.2f}'])
+
+def summary_headers(group_by):
+    return [GROUP_HEADERS[group_by]] + SUMMARY_HEADERS
+
+def summary_values(row, group_by):
+    """Return the report columns for one summary_row()"""
+    group = f"{row['group']:02d}:00" if group_by == 'hour' else row['group']
+    return [group, row['cars'], round(row['revenue'], 2), round(row['average'], 2)]
+
+def summary_totals(rows):
+    """Return (number of cars, total revenue) over summary rows"""
+    return sum(row['cars'] for row in rows), sum(row['revenue'] for row in rows)
+
+def write_summary_csv(rows, group_by, csvfile):
+    """Write a grouped report to an open text file"""
+    writer = csv.writer(csvfile)
+    writer.writerow(summary_headers(group_by))
+    for row in rows:
+        writer.writerow(summary_values(row, group_by))
+
+    total_cars, total_payment = summary_totals(rows)
+    writer.writerow([])
+    writer.writerow(['TOTAL CARS:', total_cars])
+    writer.writerow(['TOTAL REVENUE:', f'₱{total_payment:.2f}'])
+
+def build_workbook(cars, day, default_cashier=''):
+    """Return an openpyxl Workbook with the daily report for finished cars"""
+    rows = [report_row(car, default_cashier) for car in cars]
+    return _build_report_workbook(f"Carwash Report {day.strftime('%Y-%m-%d')}",
+                                  REPORT_HEADERS, rows, report_totals(cars))
+
+def build_summary_workbook(rows, group_by, first_day, last_day):
+    """Return an openpyxl Workbook with a grouped report"""
+    values = [summary_values(row, group_by) for row in rows]
+    # Sheet titles are limited to 31 characters
+    title = f"By {group_by} {first_day.strftime('%Y-%m-%d')} to {last_day.strftime('%Y-%m-%d')}"[:31]
+    return _build_report_workbook(title, summary_headers(group_by), values, summary_totals(rows))
+
+def _build_report_workbook(title, headers, rows, totals):
+    # openpyxl takes longer to import than the rest of the desktop app together;
+    # only load it when an Excel report is actually requested
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = title
+
+    # Define styles
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    # Headers
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.border = border
+
+    # Data rows, tracking column widths as we go
+    widths = [len(header) for header in headers]
+    for row, values in enumerate(rows, 2):
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=row, column=col, value=value)
+            cell.border = border
+            widths[col - 1] = max(widths[col - 1], len(str(value)))
+
+    # Summary row
+    total_cars, total_payment = totals
+    summary_row = len(rows) + 3
+    ws.cell(row=summary_row, column=1, value="TOTAL CARS:").font = Font(bold=True)
+    ws.cell(row=summary_row, column=2, value=total_cars).font = Font(bold=True)
+    ws.cell(row=summary_row + 1, column=1, value="TOTAL REVENUE:").font = Font(bold=True)
+    ws.cell(row=summary_row + 1, column=2, value=f"₱{total_payment:.2f}").font = Font(bold=True)
+
+    # Auto-adjust column widths
+    for col, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = min(width + 2, 30)
+
+    return wb
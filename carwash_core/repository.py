@@ -0,0 +1,188 @@
+"""
+Storage interface for cars and the in-memory implementation used by the
+desktop apps. Repositories return car records: dicts of CAR_FIELDS plus 'id'.
+"""
+
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from ids import new_id
+from .domain import STATUSES, STATUS_FINISHED, report_group_key, summary_row
+from .search import MIN_FUZZY_LENGTH, PlateIndex, normalize_plate
+
+def day_bounds(day):
+    """Return the [start, end) datetimes of a calendar day"""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+class CarRepository:
+    """Interface implemented by every car store"""
+
+    def get(self, car_id):
+        """Return the car record with this id, or None"""
+        raise NotImplementedError
+
+    def add(self, fields, car_id=None):
+        """Store a new car and return its id"""
+        raise NotImplementedError
+
+    def update(self, car_id, changes):
+        """Apply field changes to a car and return the updated record"""
+        raise NotImplementedError
+
+    def list_by_status(self, status):
+        """Return the records of all cars with a status, oldest first"""
+        raise NotImplementedError
+
+    def count_by_status(self):
+        """Return {status: number of cars} for every status"""
+        raise NotImplementedError
+
+    def finished_on(self, day):
+        """Return the records of cars finished on a calendar day"""
+        raise NotImplementedError
+
+    def summarize(self, first_day, last_day, group_by):
+        """Return summary_row()s of cars finished between two days (inclusive), by group"""
+        raise NotImplementedError
+
+    def search(self, query, limit=20):
+        """Return up to limit records matching a plate or car name, best first.
+
+        Each record gets a 'match' key: 'plate' (plate starts with the query),
+        'similar_plate' (trigram match, e.g. a misread plate) or 'car_name'.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all cars and return how many were removed"""
+        raise NotImplementedError
+
+class LocalCarRepository(CarRepository):
+    """Car store over the desktop app's car_id -> fields dict.
+
+    Keeps a per-status index, a per-day index of finished cars and a plate
+    index so the dashboard, reports and search never scan the whole store. Code that changes the
+    underlying dict directly must call reindex() afterwards.
+    """
+
+    def __init__(self, cars_data):
+        self.cars_data = cars_data
+        self.reindex()
+
+    def reindex(self):
+        self._by_status = {status: {} for status in STATUSES}
+        self._finished_by_day = {}
+        self._plates = PlateIndex()
+        for car_id, car in self.cars_data.items():
+            self._index(car_id, car)
+
+    def _index(self, car_id, car, plate=True):
+        self._by_status.setdefault(car['status'], {})[car_id] = None
+        if car['status'] == STATUS_FINISHED and car.get('completion_time'):
+            self._finished_by_day.setdefault(car['completion_time'].date(), {})[car_id] = None
+        if plate:
+            self._plates.add(car.get('plate_number'), car_id)
+
+    def _unindex(self, car_id, car, plate=True):
+        if plate:
+            self._plates.remove(car.get('plate_number'), car_id)
+        self._by_status.get(car['status'], {}).pop(car_id, None)
+        if car['status'] == STATUS_FINISHED and car.get('completion_time'):
+            day_ids = self._finished_by_day.get(car['completion_time'].date())
+            if day_ids is not None:
+                day_ids.pop(car_id, None)
+                if not day_ids:
+                    del self._finished_by_day[car['completion_time'].date()]
+
+    def _record(self, car_id):
+        return dict(self.cars_data[car_id], id=car_id)
+
+    def get(self, car_id):
+        if car_id not in self.cars_data:
+            return None
+        return self._record(car_id)
+
+    def add(self, fields, car_id=None):
+        car_id = car_id or new_id()
+        self.cars_data[car_id] = dict(fields)
+        self._index(car_id, self.cars_data[car_id])
+        return car_id
+
+    def update(self, car_id, changes):
+        car = self.cars_data[car_id]
+        # Status changes are frequent; only touch the plate index for new plates
+        plate_changed = 'plate_number' in changes
+        self._unindex(car_id, car, plate_changed)
+        car.update(changes)
+        self._index(car_id, car, plate_changed)
+        return self._record(car_id)
+
+    def remove(self, car_ids):
+        """Remove cars (e.g. after archiving them) and return how many were removed"""
+        removed = 0
+        for car_id in car_ids:
+            car = self.cars_data.pop(car_id, None)
+            if car is not None:
+                self._unindex(car_id, car)
+                removed += 1
+        return removed
+
+    def iter_by_status(self, status):
+        """Lazily yield the records of cars with a status"""
+        for car_id in list(self._by_status.get(status, ())):
+            yield self._record(car_id)
+
+    def list_by_status(self, status):
+        return list(self.iter_by_status(status))
+
+    def count_by_status(self):
+        return {status: len(self._by_status.get(status, ())) for status in STATUSES}
+
+    def iter_finished_on(self, day):
+        """Lazily yield the records of cars finished on a day"""
+        for car_id in list(self._finished_by_day.get(day, ())):
+            yield self._record(car_id)
+
+    def finished_on(self, day):
+        return list(self.iter_finished_on(day))
+
+    def summarize(self, first_day, last_day, group_by):
+        totals = {}
+        for day in sorted(self._finished_by_day):
+            if first_day <= day <= last_day:
+                for car in self.iter_finished_on(day):
+                    key = report_group_key(car, group_by)
+                    count, revenue = totals.get(key, (0, 0.0))
+                    totals[key] = (count + 1, revenue + (car.get('payment_amount') or 0))
+        return [summary_row(key, count, revenue) for key, (count, revenue) in sorted(totals.items())]
+
+    def finished_before(self, day):
+        """Return the ids of finished cars completed before a day"""
+        return [car_id for finished_day, car_ids in self._finished_by_day.items()
+                if finished_day < day for car_id in car_ids]
+
+    def search(self, query, limit=20):
+        matches = {}  # car_id -> match kind, best first
+        plate = normalize_plate(query)
+        if plate:
+            for car_id in self._plates.prefix(plate):
+                matches.setdefault(car_id, 'plate')
+            if len(matches) < limit and len(plate) >= MIN_FUZZY_LENGTH:
+                for _, similar in self._plates.fuzzy(plate):
+                    for car_id in self._plates.car_ids(similar):
+                        matches.setdefault(car_id, 'similar_plate')
+
+        text = (query or '').strip().lower()
+        if text and len(matches) < limit:
+            for car_id, car in self.cars_data.items():
+                if text in car['car_name'].lower():
+                    matches.setdefault(car_id, 'car_name')
+
+        return [dict(self._record(car_id), match=match) for car_id, match in islice(matches.items(), limit)]
+
+    def clear(self):
+        removed = len(self.cars_data)
+        self.cars_data.clear()
+        self.reindex()
+        return removed
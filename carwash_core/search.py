@@ -0,0 +1,88 @@
+"""
+Plate search helpers shared by the web and desktop apps: plate
+normalization, pg_trgm-compatible trigram similarity and an in-memory
+prefix/trigram index for the desktop store.
+"""
+
+from bisect import bisect_left, insort
+
+# Same default cut-off as PostgreSQL's pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+# Fuzzy matching on shorter input matches almost everything
+MIN_FUZZY_LENGTH = 3
+
+def normalize_plate(plate):
+    """Uppercase a plate number and drop spaces and dashes ("abc-1 23" -> "ABC123")"""
+    return ''.join((plate or '').upper().replace('-', ' ').split())
+
+def prefix_end(prefix):
+    """Smallest string greater than every string starting with prefix, in code point order.
+
+    Only for Python-side ordering (PlateIndex); database collations may sort
+    differently, so SQL prefix matches use LIKE (see sql_repository.plate_prefix).
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def trigrams(text):
+    """Trigrams of a word, padded like pg_trgm (two spaces before, one after)"""
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(a, b):
+    """Share of trigrams two words have in common (0-1), as pg_trgm's similarity()"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+class PlateIndex:
+    """Normalized plates -> car ids, with sorted prefix lookup and a trigram index"""
+
+    def __init__(self):
+        self.ids_by_plate = {}
+        self.sorted_plates = []
+        self.plates_by_trigram = {}
+
+    def add(self, plate, car_id):
+        plate = normalize_plate(plate)
+        if not plate:
+            return
+        car_ids = self.ids_by_plate.get(plate)
+        if car_ids is None:
+            car_ids = self.ids_by_plate[plate] = {}
+            insort(self.sorted_plates, plate)
+            for gram in trigrams(plate):
+                self.plates_by_trigram.setdefault(gram, set()).add(plate)
+        car_ids[car_id] = None
+
+    def remove(self, plate, car_id):
+        plate = normalize_plate(plate)
+        car_ids = self.ids_by_plate.get(plate)
+        if car_ids is None:
+            return
+        car_ids.pop(car_id, None)
+        if not car_ids:
+            del self.ids_by_plate[plate]
+            del self.sorted_plates[bisect_left(self.sorted_plates, plate)]
+            for gram in trigrams(plate):
+                plates = self.plates_by_trigram.get(gram)
+                plates.discard(plate)
+                if not plates:
+                    del self.plates_by_trigram[gram]
+
+    def prefix(self, prefix):
+        """Car ids whose plate starts with a normalized prefix, in plate order"""
+        start = bisect_left(self.sorted_plates, prefix)
+        end = bisect_left(self.sorted_plates, prefix_end(prefix))
+        return [car_id for plate in self.sorted_plates[start:end] for car_id in self.ids_by_plate[plate]]
+
+    def fuzzy(self, plate, threshold=SIMILARITY_THRESHOLD):
+        """(similarity, plate) pairs for plates similar to a normalized plate, best first"""
+        candidates = set()
+        for gram in trigrams(plate):
+            candidates.update(self.plates_by_trigram.get(gram, ()))
+        scored = [(similarity(plate, candidate), candidate) for candidate in candidates]
+        return sorted((item for item in scored if item[0] >= threshold), reverse=True)
+
+    def car_ids(self, plate):
+        return list(self.ids_by_plate.get(plate, ()))
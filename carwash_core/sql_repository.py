@@ -0,0 +1,298 @@
+"""
+SQLAlchemy implementation of the car repository used by the web app.
+"""
+
+from sqlalchemy import String, and_, extract, func, insert, or_, select, text, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from .domain import CAR_FIELDS, REPORT_GROUPS, STATUSES, STATUS_FINISHED, CarwashError, summary_row
+from .repository import CarRepository, day_bounds
+from .search import MIN_FUZZY_LENGTH, SIMILARITY_THRESHOLD, normalize_plate, similarity
+
+# pg_trgm GIN index created by `flask init-db` on PostgreSQL
+TRIGRAM_INDEX = 'ix_cars_plate_trgm'
+
+# Columns only the web app tracks, added to its records
+SERVER_FIELDS = ('ready_time', 'business_day')
+
+def plate_prefix(column, prefix):
+    """Condition for plates starting with prefix.
+
+    LIKE 'prefix%' rather than a >= / < range, which is only right under
+    code point ordering; on PostgreSQL it is served by varchar_pattern_ops
+    or COLLATE "C" indexes whatever the database collation.
+    """
+    return column.startswith(prefix, autoescape=True)
+
+class code_point_order(FunctionElement):
+    """A string column compared in code point order: COLLATE "C" on PostgreSQL.
+
+    Other databases (SQLite's BINARY collation) already compare that way.
+    An index on it serves both LIKE 'prefix%' and ORDER BY of the column.
+    """
+    type = String()
+    name = 'code_point_order'
+    inherit_cache = True
+
+@compiles(code_point_order)
+def compile_code_point_order(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+@compiles(code_point_order, 'postgresql')
+def compile_code_point_order_postgresql(element, compiler, **kw):
+    return f'{compiler.process(element.clauses, **kw)} COLLATE "C"'
+
+def similar_plate_candidates(column, plate):
+    """Condition for plates sharing enough trigrams with plate to be similar to it.
+
+    Two plates sharing only their first letter are never similar enough, so
+    a similar plate contains one of plate's inner trigrams or has its first
+    or last two characters.
+    """
+    inner = {plate[i:i + 3] for i in range(len(plate) - 2)}
+    return or_(column.startswith(plate[:2], autoescape=True),
+               column.endswith(plate[-2:], autoescape=True),
+               *[column.contains(gram, autoescape=True) for gram in sorted(inner)])
+
+def car_record(car):
+    """Return the repository record (dict with datetimes) for a Car row"""
+    record = {field: getattr(car, field) for field in CAR_FIELDS + SERVER_FIELDS}
+    record['id'] = car.id
+    return record
+
+class SqlCarRepository(CarRepository):
+    """Car store backed by the models.Car table.
+
+    With autocommit=False, changes are only flushed and the caller commits
+    (the web app commits once per request). Cars belong to a business day
+    (model.business_day, an id of day_model) and the daily reset opens a new
+    day instead of touching car rows: status lists and counts only cover
+    the current day's (live) cars, while reports and search see them all.
+    """
+
+    def __init__(self, session, model, day_model, autocommit=True):
+        self.session = session
+        self.model = model
+        self.day_model = day_model
+        self.autocommit = autocommit
+        self._trigram_index = None
+
+    def _commit(self):
+        if self.autocommit:
+            self.session.commit()
+        else:
+            self.session.flush()
+
+    def get(self, car_id):
+        car = self.session.get(self.model, car_id)
+        return car_record(car) if car else None
+
+    def add(self, fields, car_id=None):
+        car = self.model(**fields)
+        if car_id:
+            car.id = car_id
+        self.session.add(car)
+        self._commit()
+        return car.id
+
+    def update(self, car_id, changes):
+        car = self.session.get(self.model, car_id)
+        for field, value in changes.items():
+            setattr(car, field, value)
+        self._commit()
+        return car_record(car)
+
+    def get_live(self, car_id):
+        """The record of a car of the current business day, or None"""
+        car = self.live().filter(self.model.id == car_id).first()
+        return car_record(car) if car else None
+
+    def transition(self, car_id, expected_status, changes, live=True):
+        """Apply changes with one UPDATE guarded by the car's current status.
+
+        Returns the updated record, or None if another request (possibly in
+        another worker) changed its status first or, with live set, the car
+        belongs to a past business day.
+        """
+        guard = [self.model.id == car_id, self.model.status == expected_status]
+        if live:
+            guard.append(self.is_live())
+        result = self.session.execute(
+            update(self.model)
+            .where(*guard)
+            .values(**changes)
+        )
+        if result.rowcount == 0:
+            return None
+        self._commit()
+        return self.get(car_id)
+
+    def current_day(self):
+        """SQL subquery for the current business day: the latest one opened"""
+        return select(func.max(self.day_model.id)).scalar_subquery()
+
+    def is_live(self):
+        # The arrival bound is redundant with the day but lets PostgreSQL
+        # skip the partitions of older months (see partitions.py)
+        cars_since = (select(self.day_model.cars_since)
+                      .where(self.day_model.id == self.current_day())
+                      .scalar_subquery())
+        return and_(self.model.business_day == self.current_day(),
+                    self.model.timestamp >= cars_since)
+
+    def arrived_before(self, end):
+        """Condition for cars that arrived before end (any car finished before end did)"""
+        # A bound on the partition key keeps PostgreSQL out of later months' partitions
+        return self.model.timestamp < end
+
+    def live(self):
+        """Query of the current business day's cars"""
+        return self.session.query(self.model).filter(self.is_live())
+
+    def list_by_status(self, status):
+        cars = (self.live()
+                .filter(self.model.status == status)
+                .order_by(self.model.timestamp))
+        return [car_record(car) for car in cars]
+
+    def count_by_status(self):
+        counts = dict.fromkeys(STATUSES, 0)
+        rows = (self.session.query(self.model.status, func.count(self.model.id))
+                .filter(self.is_live())
+                .group_by(self.model.status))
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+    def finished_on(self, day, live=False):
+        """Cars finished on a day, only the current business day's if live is set"""
+        # Range predicate instead of date(completion_time) so an index can be used
+        start, end = day_bounds(day)
+        cars = (self.live() if live else self.session.query(self.model))
+        cars = (cars.filter(self.model.status == STATUS_FINISHED,
+                            self.model.completion_time >= start,
+                            self.model.completion_time < end,
+                            self.arrived_before(end))
+                .order_by(self.model.completion_time))
+        return [car_record(car) for car in cars]
+
+    def group_column(self, group_by):
+        """SQL expression for a report group (see REPORT_GROUPS)"""
+        completion_time = self.model.completion_time
+        if group_by == 'day':
+            return func.date(completion_time)
+        if group_by == 'hour':
+            return extract('hour', completion_time)
+        if group_by == 'washer':
+            return func.coalesce(self.model.washer_name, '')
+        if group_by == 'cashier':
+            return func.coalesce(self.model.cashier_name, '')
+        raise CarwashError(f"Reports can be grouped by {', '.join(REPORT_GROUPS)}.")
+
+    def summarize(self, first_day, last_day, group_by):
+        # GROUP BY in the database; only one row per group comes back
+        start, _ = day_bounds(first_day)
+        _, end = day_bounds(last_day)
+        group = self.group_column(group_by)
+        rows = (self.session.query(group, func.count(self.model.id),
+                                   func.coalesce(func.sum(self.model.payment_amount), 0))
+                .filter(self.model.status == STATUS_FINISHED,
+                        self.model.completion_time >= start,
+                        self.model.completion_time < end,
+                        self.arrived_before(end))
+                .group_by(group)
+                .order_by(group))
+
+        summary = []
+        for key, count, revenue in rows:
+            if group_by == 'day':
+                # SQLite returns 'YYYY-MM-DD' strings, PostgreSQL date objects
+                key = str(key)[:10]
+            elif group_by == 'hour':
+                key = int(key)
+            summary.append(summary_row(key, count, float(revenue)))
+        return summary
+
+    def has_trigram_index(self):
+        """True when fuzzy plate matching can use pg_trgm (checked once per process)"""
+        if self._trigram_index is None:
+            if self.session.get_bind().dialect.name != 'postgresql':
+                self._trigram_index = False
+            else:
+                found = self.session.execute(text('SELECT 1 FROM pg_indexes WHERE indexname = :name'),
+                                             {'name': TRIGRAM_INDEX}).first()
+                self._trigram_index = found is not None
+        return self._trigram_index
+
+    def similar_plates(self, plate, limit):
+        """Cars whose normalized plate is trigram-similar to plate, best first"""
+        model = self.model
+        if self.has_trigram_index():
+            # '%' is pg_trgm's similarity operator and can use the GIN index
+            score = func.similarity(model.plate_normalized, plate)
+            return (self.session.query(model)
+                    .filter(model.plate_normalized.op('%')(plate))
+                    .order_by(score.desc(), model.timestamp.desc())
+                    .limit(limit)
+                    .all())
+
+        # Fallback without pg_trgm (e.g. SQLite in development): score the
+        # distinct plates sharing trigrams with it in Python
+        plates = [value for (value,) in (self.session.query(model.plate_normalized)
+                                         .filter(similar_plate_candidates(model.plate_normalized, plate))
+                                         .distinct())]
+        scored = sorted(((similarity(plate, value), value) for value in plates), reverse=True)
+        best = [value for score, value in scored[:limit] if score >= SIMILARITY_THRESHOLD]
+        if not best:
+            return []
+        rank = {value: position for position, value in enumerate(best)}
+        cars = (self.session.query(model)
+                .filter(model.plate_normalized.in_(best))
+                .order_by(model.timestamp.desc())
+                .limit(limit)
+                .all())
+        return sorted(cars, key=lambda car: rank[car.plate_normalized])
+
+    def search(self, query, limit=20):
+        model = self.model
+        matches = {}  # car_id -> (car, match kind), best first
+
+        plate = normalize_plate(query)
+        if plate:
+            # Prefix lookup on the indexed normalized plate; filtered and
+            # ordered in the index's code point order, so only limit rows are read
+            plate_order = code_point_order(model.plate_normalized)
+            cars = (self.session.query(model)
+                    .filter(plate_prefix(plate_order, plate))
+                    .order_by(plate_order, model.timestamp.desc())
+                    .limit(limit))
+            for car in cars:
+                matches.setdefault(car.id, (car, 'plate'))
+            if len(matches) < limit and len(plate) >= MIN_FUZZY_LENGTH:
+                for car in self.similar_plates(plate, limit):
+                    matches.setdefault(car.id, (car, 'similar_plate'))
+
+        name = (query or '').strip().lower()
+        if name and len(matches) < limit:
+            cars = (self.session.query(model)
+                    .filter(func.lower(model.car_name).contains(name, autoescape=True))
+                    .order_by(model.timestamp.desc())
+                    .limit(limit))
+            for car in cars:
+                matches.setdefault(car.id, (car, 'car_name'))
+
+        return [dict(car_record(car), match=match) for car, match in list(matches.values())[:limit]]
+
+    def clear(self):
+        removed = self.session.query(self.model).delete()
+        self._commit()
+        return removed
+
+    def roll_over(self, now, opened_by=None):
+        """Start a new business day (one INSERT, no car rows touched); returns its id"""
+        result = self.session.execute(
+            insert(self.day_model).values(opened_at=now, opened_by=opened_by)
+        )
+        self._commit()
+        return result.inserted_primary_key[0]
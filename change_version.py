@@ -0,0 +1,61 @@
+"""
+Change version of the cars table.
+Every car mutation bumps it after committing, and responses built from cars
+(dashboard, counters, car listing) use it in their ETag so polls that find
+nothing changed get a bodiless 304 after a single primary-key lookup.
+
+The tokens live in the data_versions table, so every worker on every host
+(the app is deployed on autoscale) sees each other's bumps. Each car status
+also has its own version, bumped only by changes that affect the cars shown
+with that status; the dashboard's section cache is keyed on those.
+"""
+
+import uuid
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, DataVersion
+
+GLOBAL_SCOPE = '*'
+
+class ChangeVersion:
+    """Tokens that change whenever any car, or any car of a status, changes"""
+
+    def current(self, scope=None):
+        scope = scope or GLOBAL_SCOPE
+        token = db.session.execute(select(DataVersion.token).where(DataVersion.scope == scope)).scalar()
+        if token is None:
+            # Scope not seeded yet (init-db adds the rows up front)
+            self.ensure(scope)
+            token = db.session.execute(select(DataVersion.token).where(DataVersion.scope == scope)).scalar()
+        return token
+
+    def bump(self, *scopes):
+        """Start new versions (global plus the given statuses); call after the change is committed"""
+        token = uuid.uuid4().hex
+        # Own short transaction: after_commit callbacks can't use the request's session
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(DataVersion)
+                .where(DataVersion.scope.in_((GLOBAL_SCOPE,) + scopes))
+                .values(token=token)
+            )
+        return token
+
+    def ensure(self, *scopes):
+        """Add the rows of scopes that don't have a version yet"""
+        scopes = (GLOBAL_SCOPE,) + tuple(scope for scope in scopes if scope != GLOBAL_SCOPE)
+        with db.engine.begin() as connection:
+            existing = set(connection.execute(
+                select(DataVersion.scope).where(DataVersion.scope.in_(scopes))).scalars())
+            for scope in scopes:
+                if scope in existing:
+                    continue
+                try:
+                    with connection.begin_nested():
+                        connection.execute(insert(DataVersion).values(scope=scope, token=uuid.uuid4().hex))
+                except IntegrityError:
+                    pass  # another worker added it first
+
+version = ChangeVersion()
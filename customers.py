@@ -0,0 +1,154 @@
+"""
+Repeat-customer profiles keyed by normalized plate.
+Each visit upserts the customer's car name and visit count and each payment
+folds into a rolling typical price, so the intake form can fill in a
+regular's car name (and the payment form their usual price) from a plate.
+Autocomplete lookups go through a small per-worker LRU cache.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import case, func, insert, select, update
+
+from carwash_core import normalize_plate
+from carwash_core.sql_repository import code_point_order, plate_prefix
+from models import Car, Customer
+from unit_of_work import after_commit
+
+# Weight of the newest payment in the typical price
+PRICE_ALPHA = 0.3
+AUTOCOMPLETE_LIMIT = 5
+MIN_PREFIX_LENGTH = 2
+
+def upsert_statement(session):
+    """INSERT ... ON CONFLICT for the session's database"""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(Customer)
+
+def record_visit(session, plate_number, car_name, now=None):
+    """Count a visit and remember the latest car name; the caller commits"""
+    plate = normalize_plate(plate_number)
+    if not plate:
+        return
+    stmt = upsert_statement(session).values(
+        plate_normalized=plate,
+        plate_number=plate_number,
+        car_name=car_name,
+        visits=1,
+        last_visit=now or datetime.utcnow(),
+    )
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=['plate_normalized'],
+        set_={
+            'plate_number': stmt.excluded.plate_number,
+            'car_name': stmt.excluded.car_name,
+            'visits': Customer.visits + 1,
+            'last_visit': stmt.excluded.last_visit,
+        },
+    ))
+    after_commit(session, lambda: cache.invalidate(plate))
+
+def record_payment(session, plate_number, amount):
+    """Fold a payment into the customer's typical price; the caller commits"""
+    plate = normalize_plate(plate_number)
+    session.execute(
+        update(Customer)
+        .where(Customer.plate_normalized == plate)
+        .values(typical_price=case(
+            (Customer.typical_price.is_(None), amount),
+            else_=Customer.typical_price + PRICE_ALPHA * (amount - Customer.typical_price),
+        ))
+    )
+    after_commit(session, lambda: cache.invalidate(plate))
+
+def customer_dict(customer):
+    return {
+        'plate_number': customer.plate_number,
+        'car_name': customer.car_name,
+        'visits': customer.visits,
+        'typical_price': round(customer.typical_price, 2) if customer.typical_price is not None else None,
+    }
+
+def find_customers(session, prefix, limit=AUTOCOMPLETE_LIMIT):
+    """Customers whose normalized plate starts with prefix, exact match and regulars first"""
+    customers = (session.query(Customer)
+                 .filter(plate_prefix(Customer.plate_normalized, prefix))
+                 .order_by((Customer.plate_normalized == prefix).desc(), Customer.visits.desc())
+                 .limit(limit))
+    return [customer_dict(customer) for customer in customers]
+
+def find_customer(session, plate_number):
+    """The profile for one plate, or None"""
+    plate = normalize_plate(plate_number)
+    matches = cache.get(session, plate)
+    if matches and normalize_plate(matches[0]['plate_number']) == plate:
+        return matches[0]
+    return None
+
+def rebuild_customers(session):
+    """Recreate every profile from the cars table; returns the number of customers"""
+    session.query(Customer).delete()
+    grouped = (select(Car.plate_normalized, func.max(Car.plate_number), func.max(Car.car_name),
+                      func.count(Car.id), func.avg(Car.payment_amount), func.max(Car.timestamp))
+               .where(Car.plate_normalized.is_not(None), Car.plate_normalized != '')
+               .group_by(Car.plate_normalized))
+    session.execute(insert(Customer).from_select(
+        ['plate_normalized', 'plate_number', 'car_name', 'visits', 'typical_price', 'last_visit'], grouped))
+
+    # Name and plate spelling from the most recent visit (served by ix_cars_plate_order)
+    def latest(column):
+        return (select(column)
+                .where(code_point_order(Car.plate_normalized) == Customer.plate_normalized)
+                .order_by(Car.timestamp.desc())
+                .limit(1)
+                .scalar_subquery())
+    session.execute(update(Customer).values(car_name=latest(Car.car_name), plate_number=latest(Car.plate_number)))
+    session.commit()
+    return session.query(Customer).count()
+
+class CustomerCache:
+    """LRU cache of autocomplete results per plate prefix.
+
+    Entries expire after ttl seconds so changes made by other workers show
+    up; changes made by this worker invalidate affected prefixes as they commit.
+    """
+
+    def __init__(self, size=1024, ttl=300):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # prefix -> (stored_at, results)
+        self.lock = threading.Lock()
+
+    def get(self, session, prefix):
+        with self.lock:
+            entry = self.entries.get(prefix)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.entries.move_to_end(prefix)
+                return entry[1]
+
+        results = find_customers(session, prefix)
+        with self.lock:
+            self.entries[prefix] = (time.monotonic(), results)
+            self.entries.move_to_end(prefix)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return results
+
+    def invalidate(self, plate):
+        """Drop cached results for every prefix of a plate"""
+        with self.lock:
+            for prefix in [prefix for prefix in self.entries if plate.startswith(prefix)]:
+                del self.entries[prefix]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+cache = CustomerCache()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Dashboard rendering benchmark for the web app.
+Fills a scratch SQLite database with the same number of cars in each status
+(all finished today) and times full GET /dashboard renders with every
+section rendered from scratch, with all sections served from the fragment
+cache, and with one section re-rendered after a change to its cars.
+
+Usage:
+    python dashboard_bench.py [--cars N] [--runs N]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from carwash_core import STATUS_WASHING, STATUS_AWAITING_PAYMENT, STATUS_FINISHED, STATUSES
+from change_version import version as change_version
+from fragments import cache as fragment_cache
+from models import db, Car, Employee
+from schema import upgrade_schema
+
+CARS_PER_SECTION = 500
+RUNS = 20
+
+def fill_database(cars_per_section, now):
+    """Insert cars_per_section cars in each status plus a signed-in washer"""
+    rows = []
+    for status in STATUSES:
+        for i in range(cars_per_section):
+            arrived = now - timedelta(minutes=i % 600)
+            rows.append({
+                'car_name': f'Bench car {i}',
+                'plate_number': f'BEN {status[:2].upper()}{i:04d}',
+                'status': status,
+                'timestamp': arrived,
+                'ready_time': arrived if status != STATUS_WASHING else None,
+                'completion_time': now if status == STATUS_FINISHED else None,
+                'washer_name': 'Bench washer',
+                'cashier_name': 'Bench cashier' if status == STATUS_FINISHED else None,
+                'payment_amount': 250.0 if status == STATUS_FINISHED else None,
+            })
+    db.session.execute(insert(Car), rows)
+    employee = Employee(session_id='dashboard-bench', name='Bench washer', role='washer')
+    db.session.add(employee)
+    db.session.commit()
+    return employee.session_id
+
+def bump(app, status):
+    with app.app_context():
+        change_version.bump(status)
+
+def time_dashboard(client, runs, before=None):
+    """Median milliseconds of a full dashboard render"""
+    timings = []
+    for _ in range(runs):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get('/dashboard')
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"Dashboard returned {response.status_code}")
+    return statistics.median(timings)
+
+def run(cars_per_section=CARS_PER_SECTION, runs=RUNS):
+    """Print dashboard render times per scenario"""
+    with tempfile.TemporaryDirectory() as folder:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(folder, 'bench.sqlite')}",
+        })
+        with app.app_context():
+            upgrade_schema()
+            session_id = fill_database(cars_per_section, datetime.utcnow())
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['session_id'] = session_id
+
+        print(f"Dashboard with {cars_per_section} cars per section (median of {runs} renders):")
+        scenarios = [
+            ("all sections rendered", fragment_cache.clear),
+            ("all sections cached", None),
+            ("awaiting payment changed", lambda: bump(app, STATUS_AWAITING_PAYMENT)),
+        ]
+        for name, before in scenarios:
+            print(f"  {name:<26} {time_dashboard(client, runs, before):8.1f} ms")
+
+def main(argv):
+    """Command line entry point"""
+    args = argv[1:]
+    options = {'--cars': CARS_PER_SECTION, '--runs': RUNS}
+    for option in options:
+        if option in args:
+            index = args.index(option)
+            options[option] = int(args[index + 1])
+    run(options['--cars'], options['--runs'])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
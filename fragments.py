@@ -0,0 +1,47 @@
+"""
+Rendered HTML of the dashboard's status sections, cached per worker.
+Keys include the status's change version (see change_version.py), so a
+section is only re-rendered after a change to its cars, or when the
+estimate clock or the day moves on; unchanged sections are reused as-is.
+The versions are read from the database on every render, so a change made
+through any worker or autoscaled instance invalidates the sections here too.
+"""
+
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = 64
+
+class FragmentCache:
+    """LRU cache of render results; stale versions simply age out"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()  # key -> render result
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        """Cached result for key, or render() and cache it"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        # Rendered outside the lock; concurrent misses for one key just both render
+        result = render()
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+cache = FragmentCache()
@@ -0,0 +1,50 @@
+"""
+Time-ordered unique ID generation shared by the desktop and web apps.
+IDs follow the ULID layout: 48-bit millisecond timestamp + 80 random bits,
+encoded as 26 Crockford base32 characters so they sort by creation time.
+"""
+
+import os
+import threading
+import time
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+def _encode(value, length):
+    """Encode an integer as fixed-length Crockford base32"""
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def new_id():
+    """Return a new ULID-style ID, monotonic within this process"""
+    global _last_ms, _last_random
+
+    with _lock:
+        now_ms = int(time.time() * 1000)
+        if now_ms <= _last_ms:
+            # Same millisecond (or clock went back): bump the random part so
+            # IDs stay unique and ordered
+            now_ms = _last_ms
+            random_part = (_last_random + 1) & ((1 << 80) - 1)
+            if random_part == 0:
+                now_ms += 1
+        else:
+            random_part = int.from_bytes(os.urandom(10), 'big')
+        _last_ms = now_ms
+        _last_random = random_part
+
+    return _encode(now_ms, 10) + _encode(random_part, 16)
+
+def id_timestamp(value):
+    """Return the creation time (epoch seconds) encoded in an ID"""
+    ms = 0
+    for char in value[:10].upper():
+        ms = (ms << 5) | CROCKFORD_ALPHABET.index(char)
+    return ms / 1000.0
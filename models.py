@@ -1,18 +1,82 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy.orm import validates
+from datetime import datetime, timedelta
 import uuid
+from ids import new_id
+from carwash_core.search import normalize_plate
+from carwash_core.sql_repository import code_point_order
 
 db = SQLAlchemy()
 
+# How far a car's arrival time may precede its business day's opening
+# (clock differences between workers, desktop cars pushed late)
+ARRIVAL_SLACK = timedelta(days=1)
+
+def arrival_floor(opened_at):
+    """Earliest arrival time of the cars of a business day opened at opened_at"""
+    return opened_at - ARRIVAL_SLACK
+
+def default_cars_since(context):
+    return arrival_floor(context.get_current_parameters()['opened_at'])
+
+class BusinessDay(db.Model):
+    """One row per business day; the latest is the day the dashboard shows.
+    The daily reset opens a new day instead of archiving or deleting cars."""
+    __tablename__ = 'business_days'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    opened_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    opened_by = db.Column(db.String(100))
+    # No car of this day arrived earlier; bounds live queries on cars.timestamp
+    # so PostgreSQL only scans the recent partitions (see partitions.py)
+    cars_since = db.Column(db.DateTime, nullable=False, default=default_cars_since)
+
+def current_business_day():
+    """SQL subquery for the id of the current (latest) business day"""
+    return db.select(db.func.max(BusinessDay.id)).scalar_subquery()
+
+def business_day_at(when):
+    """SQL expression for the id of the business day open at when.
+
+    Cars from before the first business day (e.g. recorded offline before the
+    first reset) join the current day instead; see admit_arrival.
+    """
+    opened = db.select(db.func.max(BusinessDay.id)).where(BusinessDay.opened_at <= when).scalar_subquery()
+    return db.func.coalesce(opened, current_business_day())
+
+def admit_arrival(when):
+    """UPDATE keeping a car from before the first business day visible in the current day.
+
+    Lowers the current day's cars_since to when, if no day was open yet at when.
+    """
+    earlier_day = db.aliased(BusinessDay)
+    return (db.update(BusinessDay)
+            .where(BusinessDay.id == current_business_day(),
+                   BusinessDay.cars_since > when,
+                   ~db.select(earlier_day.id).where(earlier_day.opened_at <= when).exists())
+            .values(cars_since=when))
+
 class Car(db.Model):
     __tablename__ = 'cars'
+    __table_args__ = (
+        # Keyset pagination of /api/cars
+        db.Index('ix_cars_timestamp_id', 'timestamp', 'id'),
+        # Dashboard lists: the current business day's cars by status, oldest first
+        db.Index('ix_cars_business_day_status', 'business_day', 'status', 'timestamp'),
+    )
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Time-ordered ULID-style IDs, shared with the desktop app
+    id = db.Column(db.String(36), primary_key=True, default=new_id)
     car_name = db.Column(db.String(100), nullable=False)
     plate_number = db.Column(db.String(20), nullable=False)
+    # Uppercase, no spaces/dashes; kept in sync by normalize_plate_number
+    plate_normalized = db.Column(db.String(20))
     status = db.Column(db.String(20), nullable=False, default='washing')  # washing, awaiting_payment, finished
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    completion_time = db.Column(db.DateTime)
+    completion_time = db.Column(db.DateTime, index=True)  # range scans for reports
+    ready_time = db.Column(db.DateTime)  # when washing finished (web only)
+    # Business day the car arrived in; set in the INSERT itself (web only)
+    business_day = db.Column(db.Integer, default=current_business_day())
     
     # Employee tracking
     washer_name = db.Column(db.String(100))
@@ -26,7 +90,12 @@ class Car(db.Model):
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    @validates('plate_number')
+    def normalize_plate_number(self, key, value):
+        self.plate_normalized = normalize_plate(value)
+        return value
     
     def to_dict(self):
         return {
@@ -36,6 +105,7 @@ class Car(db.Model):
             'status': self.status,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None,
             'completion_time': self.completion_time.isoformat() if self.completion_time else None,
+            'ready_time': self.ready_time.isoformat() if self.ready_time else None,
             'washer_name': self.washer_name,
             'cashier_name': self.cashier_name,
             'payment_amount': self.payment_amount,
@@ -44,6 +114,17 @@ class Car(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+# Plate prefix search: LIKE 'ABC%' and ORDER BY plate under any database
+# collation, newest visit first within a plate
+db.Index('ix_cars_plate_order', code_point_order(Car.plate_normalized), Car.timestamp.desc())
+
+class DataVersion(db.Model):
+    """Change tokens of the cars (scope '*') and of each status (see change_version.py)"""
+    __tablename__ = 'data_versions'
+    
+    scope = db.Column(db.String(20), primary_key=True)
+    token = db.Column(db.String(32), nullable=False)
+
 class Employee(db.Model):
     __tablename__ = 'employees'
     
@@ -51,7 +132,7 @@ class Employee(db.Model):
     session_id = db.Column(db.String(36), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # washer, cashier
-    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -60,4 +141,39 @@ class Employee(db.Model):
             'name': self.name,
             'role': self.role,
             'last_activity': self.last_activity.isoformat() if self.last_activity else None
-        }
\ No newline at end of file
+        }
+
+class SyncBatch(db.Model):
+    """Change batches already applied from desktop clients (idempotency keys)"""
+    __tablename__ = 'sync_batches'
+    
+    batch_id = db.Column(db.String(36), primary_key=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    applied_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text)  # JSON list of the changes rejected, reported again on retries
+
+class StageStat(db.Model):
+    """Rolling (exponentially weighted) average duration of each car stage"""
+    __tablename__ = 'stage_stats'
+    
+    stage = db.Column(db.String(20), primary_key=True)  # washing, awaiting_payment
+    average_seconds = db.Column(db.Float, nullable=False, default=0)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Customer(db.Model):
+    """Repeat-customer profile, one per normalized plate"""
+    __tablename__ = 'customers'
+    __table_args__ = (
+        # Autocomplete by plate prefix (LIKE 'ABC%'); the primary key index can't serve
+        # LIKE under a non-C PostgreSQL collation
+        db.Index('ix_customers_plate_prefix', 'plate_normalized',
+                 postgresql_ops={'plate_normalized': 'varchar_pattern_ops'}),
+    )
+    
+    plate_normalized = db.Column(db.String(20), primary_key=True)
+    plate_number = db.Column(db.String(20), nullable=False)  # as last entered
+    car_name = db.Column(db.String(100), nullable=False)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+    typical_price = db.Column(db.Float)  # rolling average of payments
+    last_visit = db.Column(db.DateTime)
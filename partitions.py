@@ -0,0 +1,165 @@
+"""
+Monthly range partitions of the cars table on PostgreSQL.
+
+With CARS_MONTHLY_PARTITIONS set, `flask --app main init-db` creates cars as
+a table partitioned by RANGE (timestamp), one partition per month
+(cars_YYYY_MM) plus cars_default for anything outside them, so vacuum and
+index maintenance only work on the recent months and old months can be
+detached or dropped as a whole. Partitions are created PARTITION_MONTHS_AHEAD
+months in advance by init-db and by a background thread in each worker.
+Queries that bound cars.timestamp (the dashboard's live cars, reports,
+exports, /api/cars, analytics) only scan the partitions they need.
+
+An existing unpartitioned cars table is converted with
+`flask --app main partition-cars` after an init-db, which copies every car
+in one transaction (cars are locked meanwhile; run it outside opening
+hours); a second init-db then restores the trigram search indexes.
+
+PostgreSQL requires the partition key in the primary key, so the
+partitioned table's key is (id, timestamp); car ids are unique ULIDs either
+way. On SQLite, or with the setting off, cars stays a plain table.
+"""
+
+import logging
+from datetime import date, datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import MetaData, PrimaryKeyConstraint, inspect, text
+
+from models import db, Car
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MONTHS_AHEAD = 3
+DEFAULT_PARTITION = 'cars_default'
+
+def enabled(engine):
+    return bool(current_app.config.get('CARS_MONTHLY_PARTITIONS')) and engine.dialect.name == 'postgresql'
+
+def is_partitioned(connection):
+    """True when cars already is a partitioned table"""
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('cars')")).first() is not None
+
+def partitioned_table():
+    """The cars table, keyed by (id, timestamp) and partitioned by month of timestamp"""
+    table = Car.__table__.to_metadata(MetaData())
+    table.c.timestamp.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint(table.c.id, table.c.timestamp, name='cars_pkey'))
+    table.dialect_options['postgresql']['partition_by'] = 'RANGE (timestamp)'
+    return table
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def partition_name(month):
+    return f'cars_{month:%Y_%m}'
+
+def existing_partitions(connection):
+    return {name for (name,) in connection.execute(text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass('cars')"))}
+
+def create_partition(connection, month):
+    """Partition for one month; cars already in the default partition for it move in"""
+    start, end = month_start(month), next_month(month)
+    bounds = {'start': start, 'end': end}
+    stray = connection.execute(text(
+        f'SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end LIMIT 1'),
+        bounds).first()
+    if stray:
+        # PostgreSQL refuses a partition whose rows sit in the default one; move them through a temp table
+        connection.execute(text('CREATE TEMP TABLE moving_cars (LIKE cars)'))
+        connection.execute(text(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end '
+            'RETURNING *) INSERT INTO moving_cars SELECT * FROM moved'), bounds)
+    connection.execute(text(
+        f"CREATE TABLE {partition_name(start)} PARTITION OF cars "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"))
+    if stray:
+        connection.execute(text('INSERT INTO cars SELECT * FROM moving_cars'))
+        connection.execute(text('DROP TABLE moving_cars'))
+
+def ensure_partitions(connection, first_month, today, ahead=PARTITION_MONTHS_AHEAD):
+    """Create the missing partitions from first_month to ahead months after today; returns their names"""
+    existing = existing_partitions(connection)
+    if DEFAULT_PARTITION not in existing:
+        connection.execute(text(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF cars DEFAULT'))
+        existing.add(DEFAULT_PARTITION)
+
+    last = month_start(today)
+    for _ in range(ahead):
+        last = next_month(last)
+    created = []
+    month = month_start(first_month)
+    while month <= last:
+        if partition_name(month) not in existing:
+            create_partition(connection, month)
+            created.append(partition_name(month))
+        month = next_month(month)
+    return created
+
+def create_partitioned_cars(today):
+    """Create cars as a partitioned table if it doesn't exist yet; returns the partitions created"""
+    with db.engine.begin() as connection:
+        if inspect(connection).has_table('cars'):
+            return []
+        partitioned_table().create(connection)
+        return ensure_partitions(connection, today, today)
+
+def add_partitions(today):
+    """Keep partitions ahead of the calendar; returns the partitions created"""
+    with db.engine.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        return ensure_partitions(connection, today, today)
+
+def partition_cars(today):
+    """Convert an unpartitioned cars table, copying every car; returns the partitions created"""
+    with db.engine.begin() as connection:
+        if is_partitioned(connection):
+            return None
+        columns = ', '.join(column.name for column in Car.__table__.columns)
+        first = connection.execute(text('SELECT min(timestamp) FROM cars')).scalar() or today
+        index_names = [name for (name,) in connection.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'cars'"))]
+        pkey = inspect(connection).get_pk_constraint('cars')['name']
+
+        # Index names are schema-wide: free them for the new table's indexes
+        connection.execute(text('ALTER TABLE cars RENAME TO cars_unpartitioned'))
+        for name in index_names:
+            if name != pkey:
+                connection.execute(text(f'DROP INDEX {name}'))
+        connection.execute(text(f'ALTER TABLE cars_unpartitioned RENAME CONSTRAINT {pkey} TO cars_unpartitioned_pkey'))
+
+        partitioned_table().create(connection)
+        created = ensure_partitions(connection, first, today)
+        # Model columns only; columns the app no longer uses are left behind
+        connection.execute(text(f'INSERT INTO cars ({columns}) SELECT {columns} FROM cars_unpartitioned'))
+        connection.execute(text('DROP TABLE cars_unpartitioned'))
+        return created
+
+def run_partition_maintenance(app):
+    if not enabled(db.engine):
+        return
+    created = add_partitions(datetime.utcnow().date())
+    if created:
+        logger.info("Created cars partitions %s", ', '.join(created))
+
+@click.command('partition-cars')
+@with_appcontext
+def partition_cars_command():
+    """Convert the cars table to monthly partitions (PostgreSQL)"""
+    if db.engine.dialect.name != 'postgresql':
+        click.echo('Partitioning needs PostgreSQL; cars stays a plain table.')
+        return
+    created = partition_cars(datetime.utcnow().date())
+    if created is None:
+        click.echo('The cars table is already partitioned.')
+        return
+    click.echo(f'Converted cars to {len(created)} monthly partitions.')
+    click.echo('Run `flask --app main init-db` to restore the search indexes.')
@@ -0,0 +1,106 @@
+"""
+Read replica routing for reporting queries.
+
+With REPLICA_DATABASE_URL set, the read-only reporting paths (reports,
+CSV/Excel exports, analytics) query that database, configured as the
+'replica' bind, so they don't compete with the washers' and cashiers'
+writes on the primary. Everything else, including the live dashboard and
+the ETagged APIs, always reads the primary.
+
+Queries fall back to the primary when no replica is configured, when it
+can't be reached, or when it lags: the newest cars.updated_at and business
+day on both databases are compared at most every LAG_CHECK_SECONDS per
+worker. Reads that include today (the dashboard's exports, today's
+analytics and reports) only use the replica within REPLICA_MAX_LAG_SECONDS
+of the primary; past days have settled and may be read from a lagging one.
+"""
+
+import logging
+import threading
+import time
+
+from flask import g
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import db, BusinessDay, Car
+
+logger = logging.getLogger(__name__)
+
+BIND_KEY = 'replica'
+LAG_CHECK_SECONDS = 10
+DEFAULT_MAX_LAG_SECONDS = 30
+
+class ReplicaRouter:
+    """Chooses the database for reporting reads and tracks the replica's lag"""
+
+    def __init__(self):
+        self.max_lag = DEFAULT_MAX_LAG_SECONDS
+        self.lag = None  # seconds behind the primary at the last check; None if unreachable
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        url = app.config.get('REPLICA_DATABASE_URL')
+        if url:
+            app.config.setdefault('SQLALCHEMY_BINDS', {})[BIND_KEY] = url
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', DEFAULT_MAX_LAG_SECONDS)
+        app.teardown_appcontext(close_session)
+
+    def configured(self):
+        return BIND_KEY in db.engines
+
+    def measure_lag(self):
+        """Seconds the replica's cars are behind the primary's (inf on another business day)"""
+        latest = select(select(func.max(Car.updated_at)).scalar_subquery(),
+                        select(func.max(BusinessDay.id)).scalar_subquery())
+        with db.engines[BIND_KEY].connect() as connection:
+            replica_updated, replica_day = connection.execute(latest).one()
+        with db.engine.connect() as connection:
+            primary_updated, primary_day = connection.execute(latest).one()
+        if replica_day != primary_day:
+            return float('inf')
+        if primary_updated is None or replica_updated is None:
+            return 0.0 if primary_updated == replica_updated else float('inf')
+        return max((primary_updated - replica_updated).total_seconds(), 0.0)
+
+    def current_lag(self):
+        """The replica's lag, re-measured at most every LAG_CHECK_SECONDS"""
+        with self.lock:
+            now = time.monotonic()
+            if self.checked_at is not None and now - self.checked_at < LAG_CHECK_SECONDS:
+                return self.lag
+            # Claim the check so concurrent requests use the last result meanwhile
+            self.checked_at = now
+        try:
+            lag = self.measure_lag()
+        except SQLAlchemyError:
+            logger.warning("Read replica unavailable; reporting from the primary", exc_info=True)
+            lag = None
+        self.lag = lag
+        return lag
+
+    def use_replica(self, fresh):
+        """True if reporting reads (of today's data, if fresh) can go to the replica"""
+        if not self.configured():
+            return False
+        lag = self.current_lag()
+        if lag is None:
+            return False
+        return not fresh or lag <= self.max_lag
+
+router = ReplicaRouter()
+
+def reporting_session(fresh=True):
+    """Session for read-only reporting queries: the replica when it can serve them, else the primary"""
+    if not router.use_replica(fresh):
+        return db.session
+    if 'replica_session' not in g:
+        g.replica_session = Session(db.engines[BIND_KEY])
+    return g.replica_session
+
+def close_session(exc=None):
+    session = g.pop('replica_session', None)
+    if session is not None:
+        session.close()
@@ -0,0 +1,183 @@
+"""
+Explicit database schema setup for the web app.
+Run `flask --app main init-db` once per deploy instead of creating tables on
+every worker boot. Safe to repeat: missing tables are created and columns or
+indexes added to existing models since the last run are applied in place.
+"""
+
+import os
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from carwash_core import STATUSES
+from carwash_core.sql_repository import TRIGRAM_INDEX
+from change_version import version as change_version
+from customers import rebuild_customers
+from models import db, arrival_floor, BusinessDay, Car, Customer, StageStat
+from partitions import add_partitions, create_partitioned_cars, enabled as partitioning_enabled, is_partitioned
+from wait_times import STAGES
+
+def add_missing_columns(inspector):
+    """ALTER existing tables to add model columns they don't have yet"""
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            added.append(f'{table.name}.{column.name}')
+    db.session.commit()
+    return added
+
+# Indexes replaced by newer ones; dropped so writes stop maintaining them
+OBSOLETE_INDEXES = {
+    'cars': (
+        'ix_cars_live_status',  # live cars are now the current business day's
+        'ix_cars_plate_search',  # replaced by ix_cars_plate_order (LIKE-friendly on PostgreSQL)
+        'ix_cars_plate_prefix',  # replaced by ix_cars_plate_order, which also serves the ORDER BY
+    ),
+}
+
+def drop_obsolete_indexes(inspector):
+    dropped = []
+    for table_name, index_names in OBSOLETE_INDEXES.items():
+        if not inspector.has_table(table_name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table_name)}
+        for name in index_names:
+            if name in existing:
+                db.session.execute(text(f'DROP INDEX {name}'))
+                dropped.append(name)
+    db.session.commit()
+    return dropped
+
+def add_missing_indexes(inspector):
+    """Create model indexes that don't exist in the database yet"""
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                added.append(index.name)
+    return added
+
+def add_trigram_indexes():
+    """PostgreSQL only: pg_trgm GIN indexes for fuzzy plate and car name search"""
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    trigram_indexes = (TRIGRAM_INDEX, 'ix_cars_car_name_trgm')
+    existing = {name for (name,) in db.session.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = 'cars'"))}
+    try:
+        db.session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        db.session.execute(text(f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} '
+                                'ON cars USING gin (plate_normalized gin_trgm_ops)'))
+        db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_cars_car_name_trgm '
+                                'ON cars USING gin (lower(car_name) gin_trgm_ops)'))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        # Search still works without them, just without index support
+        db.session.rollback()
+        click.echo(f'Skipped trigram indexes: {e.__class__.__name__}: {e}')
+        return []
+    return [name for name in trigram_indexes if name not in existing]
+
+def add_missing_rows():
+    """Insert the fixed rows the app updates in place and fill new derived columns"""
+    existing = {stat.stage for stat in StageStat.query}
+    for stage in STAGES:
+        if stage not in existing:
+            db.session.add(StageStat(stage=stage))
+    
+    # The first business day; cars from before business days existed join it,
+    # except those a reset had already archived
+    first_day = None
+    if db.session.query(BusinessDay.id).first() is None:
+        first_day = BusinessDay()
+        db.session.add(first_day)
+        db.session.flush()
+    unassigned = Car.__table__.update().where(Car.business_day.is_(None))
+    if 'archived_at' in {column['name'] for column in inspect(db.engine).get_columns('cars')}:
+        unassigned = unassigned.where(text('archived_at IS NULL'))
+    db.session.execute(unassigned.values(business_day=db.select(db.func.max(BusinessDay.id)).scalar_subquery()))
+    
+    # A day's cars_since may not be later than any of its cars: recompute it for
+    # the first day (which took in older cars) and days from before the column
+    days = BusinessDay.query.filter(BusinessDay.cars_since.is_(None)).all()
+    if first_day:
+        days.append(first_day)
+    if days:
+        earliest = dict(db.session.query(Car.business_day, db.func.min(Car.timestamp))
+                        .filter(Car.business_day.in_([day.id for day in days]))
+                        .group_by(Car.business_day))
+        for day in days:
+            floor = arrival_floor(day.opened_at)
+            day.cars_since = min(floor, earliest.get(day.id) or floor)
+    
+    # Same rule as carwash_core.normalize_plate, applied set-based in SQL
+    db.session.execute(
+        Car.__table__.update()
+        .where(Car.plate_normalized.is_(None))
+        .values(plate_normalized=db.func.upper(db.func.replace(db.func.replace(Car.plate_number, ' ', ''), '-', '')))
+    )
+    db.session.commit()
+    
+    change_version.ensure(*STATUSES)
+    
+    # First run with customer profiles: build them from history
+    if db.session.query(Customer.plate_normalized).first() is None:
+        rebuild_customers(db.session)
+
+def upgrade_schema():
+    """Bring the database up to date with the models; returns what was added"""
+    today = datetime.utcnow().date()
+    partitioned = partitioning_enabled(db.engine)
+    inspector = inspect(db.engine)
+    columns = add_missing_columns(inspector)
+    # Before create_all, which would create cars as a plain table
+    partitions = create_partitioned_cars(today) if partitioned else []
+    db.create_all()
+    # Fresh inspector: create_all may have just added tables and their indexes
+    drop_obsolete_indexes(inspect(db.engine))
+    indexes = add_missing_indexes(inspect(db.engine))
+    add_missing_rows()
+    indexes += add_trigram_indexes()
+    if partitioned:
+        partitions += add_partitions(today)
+    return columns, indexes, partitions
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create or upgrade the database schema and the upload folder"""
+    columns, indexes, partitions = upgrade_schema()
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    for name in columns:
+        click.echo(f'Added column {name}')
+    for name in indexes:
+        click.echo(f'Added index {name}')
+    for name in partitions:
+        click.echo(f'Added partition {name}')
+    if partitioning_enabled(db.engine):
+        with db.engine.connect() as connection:
+            if not is_partitioned(connection):
+                click.echo('The cars table is not partitioned yet: run `flask --app main partition-cars`.')
+    click.echo('Database schema is up to date.')
+
+@click.command('rebuild-customers')
+@with_appcontext
+def rebuild_customers_command():
+    """Recreate repeat-customer profiles from all recorded cars"""
+    count = rebuild_customers(db.session)
+    click.echo(f'Rebuilt {count} customer profiles.')
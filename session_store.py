@@ -0,0 +1,101 @@
+"""
+Server-side store of signed-in employees (name and role) by session id, so
+routes can authorize a request without querying the employees table.
+The employees table stays the record of who is signed in; the store is a
+cache in front of it, filled at login and on a miss, emptied at logout.
+
+Backends, chosen with the SESSION_STORE setting:
+    memory              per-worker LRU (single process, the default)
+    sqlite:///<path>    a SQLite file shared by all workers on a host
+Entries expire after SESSION_STORE_TTL seconds, so a worker with a memory
+store notices sign-outs made through another worker within that time.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_SIZE = 1024
+DEFAULT_TTL = 300
+
+class MemorySessionStore:
+    """LRU of employee dicts by session id, private to one worker"""
+
+    def __init__(self, size=DEFAULT_SIZE, ttl=DEFAULT_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # session_id -> (stored_at, employee)
+        self.lock = threading.Lock()
+
+    def get(self, session_id):
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self.entries[session_id]
+                return None
+            self.entries.move_to_end(session_id)
+            return entry[1]
+
+    def put(self, session_id, employee):
+        with self.lock:
+            self.entries[session_id] = (time.monotonic(), employee)
+            self.entries.move_to_end(session_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, session_id):
+        with self.lock:
+            self.entries.pop(session_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class SqliteSessionStore:
+    """Employee dicts by session id in a SQLite file, shared by workers on one host"""
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.local = threading.local()  # one connection per thread
+        self.connection().execute(
+            'CREATE TABLE IF NOT EXISTS sessions '
+            '(session_id TEXT PRIMARY KEY, employee TEXT NOT NULL, stored_at REAL NOT NULL)')
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # Autocommit; WAL lets readers in other workers carry on during a write
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.local.connection = connection
+        return connection
+
+    def get(self, session_id):
+        row = self.connection().execute(
+            'SELECT employee FROM sessions WHERE session_id = ? AND stored_at > ?',
+            (session_id, time.time() - self.ttl)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id, employee):
+        self.connection().execute(
+            'INSERT OR REPLACE INTO sessions (session_id, employee, stored_at) VALUES (?, ?, ?)',
+            (session_id, json.dumps(employee), time.time()))
+
+    def delete(self, session_id):
+        self.connection().execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+
+    def clear(self):
+        self.connection().execute('DELETE FROM sessions')
+
+def create_store(setting, ttl=DEFAULT_TTL):
+    """Session store for a SESSION_STORE setting ('memory' or 'sqlite:///<path>')"""
+    if not setting or setting == 'memory':
+        return MemorySessionStore(ttl=ttl)
+    if setting.startswith('sqlite:///'):
+        return SqliteSessionStore(setting[len('sqlite:///'):], ttl=ttl)
+    raise ValueError(f"Unknown SESSION_STORE {setting!r}: use 'memory' or 'sqlite:///<path>'")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Compact binary snapshot format for the desktop car store.
+Cars are stored column by column: timestamps and payments as packed doubles
+(epoch seconds), statuses as one byte each and all text fields in a single
+UTF-8 blob, so loading avoids JSON parsing and per-field string dates.
+Timestamps are the desktop app's naive local times, stored via .timestamp().
+
+Usage:
+    python snapshot.py convert [carwash_data.json] [carwash_data.snap]
+    python snapshot.py to-json [carwash_data.snap] [carwash_data.json]
+    python snapshot.py bench [N ...]
+"""
+
+import gc
+import json
+import math
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime, timedelta
+
+MAGIC = b'CWSNAP1\n'
+HEADER = struct.Struct('<II')  # car count, text blob length
+
+STATUSES = ('washing', 'awaiting_payment', 'finished')
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+TEXT_FIELDS = ('id', 'car_name', 'plate_number', 'washer_name', 'cashier_name', 'photo_filename')
+FIELD_SEP = '\x1f'
+NONE_MARK = '\x00'
+
+def _to_epoch(value):
+    """Naive local datetime -> epoch seconds (NaN for None)"""
+    return math.nan if value is None else value.timestamp()
+
+def _make_car(car_name, plate_number, status, timestamp, washer_name,
+              cashier_name, payment_amount, completion_time, photo_filename):
+    """Build one car dict (a dict literal is much faster than dict(zip(...)))"""
+    return {
+        'car_name': car_name,
+        'plate_number': plate_number,
+        'status': status,
+        'timestamp': timestamp,
+        'washer_name': washer_name,
+        'cashier_name': cashier_name,
+        'payment_amount': payment_amount,
+        'completion_time': completion_time,
+        'photo_filename': photo_filename,
+    }
+
+def _nullable(values, none_value):
+    """Replace the on-disk None marker in a column with None"""
+    return [None if value == none_value else value for value in values]
+
+def dump(cars_data, path):
+    """Write cars (car_id -> car dict with datetime values) to a snapshot file"""
+    timestamps = array('d')
+    completions = array('d')
+    payments = array('d')
+    statuses = bytearray()
+    texts = []
+
+    for car_id, car in cars_data.items():
+        timestamps.append(_to_epoch(car.get('timestamp')))
+        completions.append(_to_epoch(car.get('completion_time')))
+        payment = car.get('payment_amount')
+        payments.append(math.nan if payment is None else float(payment))
+        statuses.append(STATUS_CODES[car['status']])
+        texts.append(car_id)
+        for field in TEXT_FIELDS[1:]:
+            value = car.get(field)
+            texts.append(NONE_MARK if value is None else value)
+
+    blob = FIELD_SEP.join(texts).encode('utf-8')
+    if sys.byteorder != 'little':
+        for column in (timestamps, completions, payments):
+            column.byteswap()
+
+    # Write via a temp file so an interrupted save never truncates the snapshot
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(statuses), len(blob)))
+        f.write(timestamps.tobytes())
+        f.write(completions.tobytes())
+        f.write(payments.tobytes())
+        f.write(statuses)
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+def load(path):
+    """Read a snapshot file back into a car_id -> car dict"""
+    # Nothing loaded here can form reference cycles; skip GC passes while
+    # allocating hundreds of thousands of objects
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load(path)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def _load(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a carwash snapshot")
+    offset = len(MAGIC)
+    count, blob_length = HEADER.unpack_from(data, offset)
+    offset += HEADER.size
+
+    columns = []
+    for _ in range(3):
+        column = array('d')
+        column.frombytes(data[offset:offset + count * 8])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        columns.append(column)
+        offset += count * 8
+    timestamps, completions, payments = columns
+
+    statuses = data[offset:offset + count]
+    offset += count
+    texts = data[offset:offset + blob_length].decode('utf-8').split(FIELD_SEP) if count else []
+
+    # Build each column with C-level map/zip loops instead of per-car Python code
+    width = len(TEXT_FIELDS)
+    car_ids, car_names, plates, washers, cashiers, photos = (texts[i::width] for i in range(width))
+    return dict(zip(car_ids, map(
+        _make_car,
+        car_names,
+        plates,
+        map(STATUSES.__getitem__, statuses),
+        map(datetime.fromtimestamp, timestamps),
+        _nullable(washers, NONE_MARK),
+        _nullable(cashiers, NONE_MARK),
+        [None if value != value else value for value in payments],
+        [None if value != value else datetime.fromtimestamp(value) for value in completions],
+        _nullable(photos, NONE_MARK),
+    )))
+
+def load_json(path):
+    """Read carwash_data.json the same way the desktop app does"""
+    with open(path, 'r') as f:
+        cars_data = json.load(f).get('cars', {})
+    for car in cars_data.values():
+        if 'timestamp' in car:
+            car['timestamp'] = datetime.fromisoformat(car['timestamp'])
+        if car.get('completion_time'):
+            car['completion_time'] = datetime.fromisoformat(car['completion_time'])
+    return cars_data
+
+def dump_json(cars_data, path):
+    """Write cars in the desktop app's JSON format"""
+    data = {'cars': {}}
+    for car_id, car in cars_data.items():
+        car_copy = car.copy()
+        if car_copy.get('timestamp'):
+            car_copy['timestamp'] = car_copy['timestamp'].isoformat()
+        if car_copy.get('completion_time'):
+            car_copy['completion_time'] = car_copy['completion_time'].isoformat()
+        data['cars'][car_id] = car_copy
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def make_sample_cars(count):
+    """Generate a realistic mix of cars for benchmarking"""
+    start = datetime(2025, 1, 1, 8, 0, 0)
+    cars_data = {}
+    for i in range(count):
+        timestamp = start + timedelta(minutes=7 * i)
+        finished = i % 10 != 0
+        cars_data[f"car_{i:08d}"] = {
+            'car_name': f"Toyota Vios {i % 50}",
+            'plate_number': f"ABC {i % 10000:04d}",
+            'status': 'finished' if finished else 'washing',
+            'timestamp': timestamp,
+            'washer_name': f"Washer {i % 7}",
+            'cashier_name': f"Cashier {i % 3}" if finished else None,
+            'payment_amount': 150.0 + (i % 5) * 50 if finished else None,
+            'completion_time': timestamp + timedelta(minutes=35) if finished else None,
+            'photo_filename': None,
+        }
+    return cars_data
+
+def bench(sizes):
+    """Compare JSON and snapshot load times for several store sizes"""
+    print(f"{'cars':>10} {'json load':>12} {'snap load':>12} {'speedup':>9} {'json size':>11} {'snap size':>11}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in sizes:
+            cars_data = make_sample_cars(count)
+            json_path = os.path.join(tmp_dir, 'cars.json')
+            snap_path = os.path.join(tmp_dir, 'cars.snap')
+            dump_json(cars_data, json_path)
+            dump(cars_data, snap_path)
+
+            assert load(snap_path) == cars_data
+
+            results = []
+            for loader, path in ((load_json, json_path), (load, snap_path)):
+                best = math.inf
+                for _ in range(3):
+                    started = time.perf_counter()
+                    loader(path)
+                    best = min(best, time.perf_counter() - started)
+                results.append(best)
+
+            json_time, snap_time = results
+            print(f"{count:>10} {json_time * 1000:>10.1f}ms {snap_time * 1000:>10.1f}ms "
+                  f"{json_time / snap_time:>8.1f}x "
+                  f"{os.path.getsize(json_path) / 1024:>9.0f}KB {os.path.getsize(snap_path) / 1024:>9.0f}KB")
+
+def main(argv):
+    """Command line entry point"""
+    if len(argv) < 2 or argv[1] not in ('convert', 'to-json', 'bench'):
+        print(__doc__.strip())
+        return 1
+
+    command, args = argv[1], argv[2:]
+    if command == 'convert':
+        json_path = args[0] if len(args) > 0 else 'carwash_data.json'
+        snap_path = args[1] if len(args) > 1 else 'carwash_data.snap'
+        cars_data = load_json(json_path)
+        dump(cars_data, snap_path)
+        print(f"Converted {len(cars_data)} cars from {json_path} to {snap_path}")
+        print(f"The desktop app now loads and saves {snap_path}; {json_path} is kept as a backup.")
+    elif command == 'to-json':
+        snap_path = args[0] if len(args) > 0 else 'carwash_data.snap'
+        json_path = args[1] if len(args) > 1 else 'carwash_data.json'
+        cars_data = load(snap_path)
+        dump_json(cars_data, json_path)
+        print(f"Converted {len(cars_data)} cars from {snap_path} to {json_path}")
+        print(f"Delete {snap_path} to make the desktop app use {json_path} again.")
+    else:
+        bench([int(arg) for arg in args] or [10000, 100000])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
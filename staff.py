@@ -0,0 +1,160 @@
+"""
+Housekeeping for signed-in staff in the employees table.
+
+Activity: requests by signed-in employees are noted in memory and written
+to employees.last_activity every ACTIVITY_FLUSH_SECONDS with one bulk
+UPDATE per worker, instead of one write per request.
+
+Reaping: every login adds a row and only logout removes it, so employees
+who just close the browser would stay forever. The session reaper deletes
+rows idle for longer than SESSION_IDLE_MINUTES, in batches, and logs how
+many washers and cashiers are still signed in. With activity tracking off
+(ACTIVITY_FLUSH_SECONDS=0) last_activity stays at the login time, so rows
+are only reaped a whole shift (SHIFT_MINUTES) after it.
+
+Both run in background threads of each worker; reaping is also available
+as `flask --app main reap-sessions`.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, delete, func, update
+
+from carwash_core import ROLES
+from change_version import version as change_version
+from models import db, Employee
+
+logger = logging.getLogger(__name__)
+
+REAP_BATCH_SIZE = 500
+FLUSH_BATCH_SIZE = 500
+SHIFT_MINUTES = 12 * 60
+
+class ActivityTracker:
+    """Latest request time per session id, written to the database in bulk"""
+
+    def __init__(self):
+        self.seen = {}  # session_id -> datetime of the latest request
+        self.lock = threading.Lock()
+
+    def touch(self, session_id, now=None):
+        with self.lock:
+            self.seen[session_id] = now or datetime.utcnow()
+
+    def flush(self, session, batch_size=FLUSH_BATCH_SIZE):
+        """Write pending heartbeats with one UPDATE per batch; returns how many were written"""
+        with self.lock:
+            seen, self.seen = self.seen, {}
+        if not seen:
+            return 0
+        items = list(seen.items())
+        try:
+            for start in range(0, len(items), batch_size):
+                batch = dict(items[start:start + batch_size])
+                session.execute(
+                    update(Employee)
+                    .where(Employee.session_id.in_(batch))
+                    .values(last_activity=case(batch, value=Employee.session_id))
+                )
+            session.commit()
+        except Exception:
+            # Put the heartbeats back (unless newer ones arrived) for the next flush
+            session.rollback()
+            with self.lock:
+                for session_id, when in seen.items():
+                    self.seen.setdefault(session_id, when)
+            raise
+        return len(items)
+
+activity = ActivityTracker()
+
+def expire_sessions(session, cutoff, batch_size=REAP_BATCH_SIZE):
+    """Delete employees idle since before cutoff, one batch per transaction; returns their session ids"""
+    expired = []
+    while True:
+        batch = (session.query(Employee.id, Employee.session_id)
+                 .filter(Employee.last_activity < cutoff)
+                 .limit(batch_size)
+                 .all())
+        if not batch:
+            return expired
+        session.execute(delete(Employee).where(Employee.id.in_([row.id for row in batch])))
+        session.commit()
+        expired.extend(row.session_id for row in batch)
+
+def active_staff(session):
+    """{role: signed-in employees} from one grouped COUNT"""
+    counts = dict.fromkeys(ROLES, 0)
+    for role, count in session.query(Employee.role, func.count(Employee.id)).group_by(Employee.role):
+        counts[role] = count
+    return counts
+
+def reap_sessions(app):
+    """Expire idle sessions everywhere they are kept; returns (expired, active staff)"""
+    # This worker's latest activity first, so nobody active here is reaped
+    activity.flush(db.session)
+    if app.config['ACTIVITY_FLUSH_SECONDS'] > 0:
+        idle_minutes = app.config['SESSION_IDLE_MINUTES']
+    else:
+        # last_activity is the login time: don't sign anyone out mid-shift
+        idle_minutes = max(app.config['SESSION_IDLE_MINUTES'], SHIFT_MINUTES)
+    cutoff = datetime.utcnow() - timedelta(minutes=idle_minutes)
+    expired = expire_sessions(db.session, cutoff)
+    store = app.extensions['session_store']
+    for session_id in expired:
+        store.delete(session_id)
+    if expired:
+        # Cached dashboards are tagged per session; make expired ones revalidate
+        change_version.bump()
+    return len(expired), active_staff(db.session)
+
+def run_reaper(app):
+    expired, staff = reap_sessions(app)
+    logger.info("Session reaper: expired %d idle sessions; signed in: %s",
+                expired, ', '.join(f'{count} {role}' for role, count in staff.items()))
+
+def run_activity_flush(app):
+    activity.flush(db.session)
+
+class PeriodicTask:
+    """Daemon thread calling task(app) in an app context every interval seconds"""
+
+    def __init__(self, app, interval, task, name):
+        self.app = app
+        self.interval = interval
+        self.task = task
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.task(self.app)
+                except Exception:
+                    # Keep the thread alive; the next run retries
+                    db.session.rollback()
+                    logger.exception("%s failed", self.thread.name)
+                finally:
+                    db.session.remove()
+
+@click.command('reap-sessions')
+@with_appcontext
+def reap_sessions_command():
+    """Expire idle employee sessions and show who is still signed in"""
+    expired, staff = reap_sessions(current_app)
+    click.echo(f'Expired {expired} idle sessions.')
+    for role, count in staff.items():
+        click.echo(f'{role}: {count} signed in')
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cold-start import-time benchmark for the desktop app.
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+reports the slowest imports and appends the result to startup_times.csv so
+startup time can be tracked from build to build.
+
+Usage:
+    python startup_bench.py [module] [--budget MS]
+"""
+
+import csv
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+HISTORY_FILE = "startup_times.csv"
+
+def parse_importtime(output, module):
+    """Return (total_us, [(cumulative_us, name), ...]) from -X importtime output
+
+    The list holds the modules imported directly by `module`, slowest first.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|', 2)
+        # Names follow one separator space plus two spaces per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, int(cumulative_us), name.strip()))
+
+    # Children are printed before their parent, so the module's direct imports
+    # are the depth-1 lines between the previous top-level line and its own
+    children = []
+    for depth, cumulative_us, name in entries:
+        if depth == 0:
+            if name == module:
+                children.sort(reverse=True)
+                return cumulative_us, children
+            children = []
+        elif depth == 1:
+            children.append((cumulative_us, name))
+    return None, []
+
+def measure_import_time(module, runs=3, python=sys.executable):
+    """Import a module in fresh interpreters and return the best run's result"""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip()}")
+        total, entries = parse_importtime(result.stderr, module)
+        if total is not None and (best is None or total < best[0]):
+            best = (total, entries)
+    if best is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    return best
+
+def record(module, total_us, history_file=HISTORY_FILE):
+    """Append a measurement to the history file"""
+    new_file = not os.path.exists(history_file)
+    with open(history_file, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(['date', 'module', 'python', 'import_ms'])
+        writer.writerow([datetime.now().strftime('%Y-%m-%d %H:%M:%S'), module,
+                         sys.version.split()[0], f"{total_us / 1000:.1f}"])
+
+def report(module, budget_ms=None, top=10, history_file=HISTORY_FILE):
+    """Measure, print and record the startup import time; returns True if within budget"""
+    total_us, entries = measure_import_time(module)
+    print(f"Startup import time for {module}: {total_us / 1000:.1f} ms")
+    print("Slowest direct imports (cumulative):")
+    for cumulative_us, name in entries[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    record(module, total_us, history_file)
+
+    if budget_ms is not None and total_us / 1000 > budget_ms:
+        print(f"✗ Over the startup budget of {budget_ms} ms")
+        return False
+    return True
+
+def main(argv):
+    """Command line entry point"""
+    args = argv[1:]
+    budget_ms = None
+    if '--budget' in args:
+        index = args.index('--budget')
+        budget_ms = float(args[index + 1])
+        del args[index:index + 2]
+    module = args[0] if args else 'carwash_app'
+    return 0 if report(module, budget_ms) else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -88,36 +88,14 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Auto-refresh functionality
-    function updateDashboardCounters() {
-        if (window.location.pathname === '/dashboard') {
-            fetch('/api/dashboard_data')
-                .then(response => response.json())
-                .then(data => {
-                    if (!data.error) {
-                        // Update counters with animation
-                        updateCounterWithAnimation('washing-count', data.washing_count);
-                        updateCounterWithAnimation('awaiting-payment-count', data.awaiting_payment_count);
-                        updateCounterWithAnimation('finished-count', data.finished_count);
-                        updateCounterWithAnimation('total-count', data.total_count);
-                    }
-                })
-                .catch(error => {
-                    console.log('Dashboard refresh error:', error);
-                });
-        }
-    }
-    
-    function updateCounterWithAnimation(elementId, newValue) {
-        var element = document.getElementById(elementId);
-        if (element && element.textContent !== String(newValue)) {
-            element.style.transform = 'scale(1.1)';
-            element.textContent = newValue;
-            setTimeout(() => {
-                element.style.transform = 'scale(1)';
-            }, 200);
+    // Dashboard actions update the page in place (see submitFragmentForm)
+    document.addEventListener('submit', function(e) {
+        var form = e.target;
+        if (form.matches('form[data-fragment-form]') && !e.defaultPrevented) {
+            e.preventDefault();
+            submitFragmentForm(form);
         }
-    }
+    });
     
     // Keyboard shortcuts
     document.addEventListener('keydown', function(e) {
@@ -180,14 +158,17 @@ function showError(message) {
 }
 
 function showAlert(message, type) {
-    var alertsContainer = document.querySelector('main .container');
+    var alertsContainer = document.querySelector('main');
     if (alertsContainer) {
         var alert = document.createElement('div');
         alert.className = `alert alert-${type} alert-dismissible fade show`;
-        alert.innerHTML = `
-            ${message}
-            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-        `;
+        // Messages include user-entered car names: add them as text, never as HTML
+        alert.textContent = message;
+        var close = document.createElement('button');
+        close.type = 'button';
+        close.className = 'btn-close';
+        close.setAttribute('data-bs-dismiss', 'alert');
+        alert.appendChild(close);
         
         alertsContainer.insertBefore(alert, alertsContainer.firstChild);
         
@@ -205,3 +186,81 @@ if ('serviceWorker' in navigator && window.location.protocol === 'https:') {
         .then(registration => console.log('SW registered'))
         .catch(error => console.log('SW registration failed'));
 }
+
+function updateCounterWithAnimation(elementId, newValue) {
+    var element = document.getElementById(elementId);
+    if (element && element.textContent !== String(newValue)) {
+        element.style.transform = 'scale(1.1)';
+        element.textContent = newValue;
+        setTimeout(() => {
+            element.style.transform = 'scale(1)';
+        }, 200);
+    }
+}
+
+// Dashboard partial updates: re-rendered sections are swapped in place
+// instead of reloading the whole page after an action or refresh
+var SECTION_COUNTERS = {
+    washing: 'washing-count',
+    awaiting_payment: 'awaiting-payment-count',
+    finished: 'finished-count'
+};
+
+function applyDashboardSections(data) {
+    Object.keys(data.sections || {}).forEach(function(status) {
+        var section = data.sections[status];
+        var current = document.getElementById('section-' + status);
+        if (current) {
+            current.outerHTML = section.html;
+        }
+        updateCounterWithAnimation(SECTION_COUNTERS[status], section.count);
+    });
+    if (data.total_count !== undefined) {
+        updateCounterWithAnimation('total-count', data.total_count);
+    }
+}
+
+function refreshDashboardSections() {
+    // Send the tags of the sections on the page; only changed ones come back
+    var tags = new URLSearchParams();
+    document.querySelectorAll('[data-section]').forEach(function(section) {
+        tags.append(section.dataset.section, section.dataset.tag);
+    });
+    fetch('/dashboard/sections?' + tags.toString())
+        .then(response => response.json())
+        .then(data => {
+            if (!data.error) {
+                applyDashboardSections(data);
+            }
+        })
+        .catch(error => console.log('Dashboard refresh error:', error));
+}
+
+function submitFragmentForm(form) {
+    var button = form.querySelector('[type="submit"]');
+    if (button) {
+        button.disabled = true;
+    }
+    fetch(form.action, {
+        method: 'POST',
+        body: new FormData(form),
+        headers: {'X-Requested-With': 'fetch'}
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.category === 'error') {
+                showError(data.message);
+            } else {
+                showSuccess(data.message);
+                applyDashboardSections(data);
+            }
+            if (button) {
+                button.disabled = false;
+            }
+        })
+        .catch(error => {
+            // Not a fragment answer (e.g. signed out): show the page as it is now
+            console.log('Action error:', error);
+            window.location.reload();
+        });
+}
@@ -1,5 +1,5 @@
 // Service Worker for Carwash Management System PWA
-const CACHE_NAME = 'carwash-v1';
+const CACHE_NAME = 'carwash-v3';
 const urlsToCache = [
   '/',
   '/static/style.css',
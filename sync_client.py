@@ -0,0 +1,226 @@
+"""
+Offline-first sync between the desktop app and the Flask server.
+Local changes are queued on disk and pushed in batches with an idempotency
+key; server-side changes are pulled incrementally from a cursor.
+"""
+
+import json
+import os
+import urllib.parse
+from datetime import datetime, timezone
+
+from ids import new_id
+
+# Car fields exchanged with the server (the car id travels separately)
+SYNC_FIELDS = (
+    'car_name', 'plate_number', 'status', 'timestamp', 'completion_time',
+    'washer_name', 'cashier_name', 'payment_amount', 'photo_filename',
+)
+DATETIME_FIELDS = ('timestamp', 'completion_time')
+
+def local_to_utc(value):
+    """Convert a naive local datetime (desktop) to a naive UTC datetime (server)"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def utc_to_local(value):
+    """Convert a naive UTC datetime (server) to a naive local datetime (desktop)"""
+    return value.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+class SyncQueue:
+    """Persistent outbox of pending car changes plus the pull cursor"""
+
+    def __init__(self, path="carwash_sync_queue.json"):
+        self.path = path
+        self.pending = {}      # car_id -> list of changed fields
+        self.detached = {}     # car_id -> queued field values of cars no longer in the working set
+        self.in_flight = None  # batch sent but not yet acknowledged
+        self.cursor = None
+        self.load()
+
+    def load(self):
+        """Load the queue from disk"""
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.pending = data.get('pending', {})
+            self.detached = data.get('detached', {})
+            self.in_flight = data.get('in_flight')
+            self.cursor = data.get('cursor')
+
+    def save(self):
+        """Write the queue to disk atomically"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'pending': self.pending, 'detached': self.detached, 'in_flight': self.in_flight,
+                       'cursor': self.cursor}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def record(self, car_id, fields):
+        """Queue changed fields of a car; repeated changes are coalesced"""
+        changed = self.pending.setdefault(car_id, [])
+        for field in fields:
+            if field not in changed:
+                changed.append(field)
+        self.save()
+
+    def detach(self, cars):
+        """Keep the queued changes of cars leaving the working set (e.g. archived).
+
+        cars maps car ids to their data; the values of their pending fields are
+        stored with the queue so the next batch can still send them.
+        """
+        detached = False
+        for car_id, car_data in cars.items():
+            if car_id in self.pending:
+                self.detached[car_id] = self.delta(car_data, self.pending[car_id])
+                detached = True
+        if detached:
+            self.save()
+
+    def delta(self, car_data, fields):
+        """Wire format of the given fields of a car"""
+        delta = {}
+        for field in fields:
+            value = car_data.get(field)
+            if field in DATETIME_FIELDS and value is not None:
+                value = local_to_utc(value).isoformat()
+            delta[field] = value
+        return delta
+
+    def next_batch(self, cars_data, limit=200):
+        """Return the batch to push, reusing an unacknowledged one for retries"""
+        if self.in_flight:
+            return self.in_flight
+        if not self.pending:
+            return None
+
+        changes = []
+        for car_id in list(self.pending)[:limit]:
+            car_data = cars_data.get(car_id)
+            fields = self.pending.pop(car_id)
+            detached = self.detached.pop(car_id, None)
+            if car_data is not None:
+                delta = self.delta(car_data, fields)
+            elif detached is not None:
+                delta = detached
+            else:
+                continue
+            changes.append({'id': car_id, 'fields': delta})
+
+        if not changes:
+            self.save()
+            return None
+
+        # The batch id doubles as the idempotency key for retries
+        self.in_flight = {'batch_id': new_id(), 'changes': changes}
+        self.save()
+        return self.in_flight
+
+    def acknowledge(self):
+        """Drop the in-flight batch once the server has applied it"""
+        self.in_flight = None
+        self.save()
+
+class SyncClient:
+    """Pushes queued changes to and pulls changes from the sync endpoints"""
+
+    def __init__(self, server_url, token, queue=None, timeout=10):
+        self.server_url = server_url.rstrip('/')
+        self.token = token
+        self.queue = queue or SyncQueue()
+        self.timeout = timeout
+
+    def request(self, method, path, payload=None):
+        """Send a JSON request and return the decoded JSON response"""
+        # Deferred: urllib.request pulls in http.client/ssl, which the desktop
+        # app only needs once sync is actually running
+        import urllib.request
+
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.server_url + path, data=body, method=method)
+        req.add_header('Content-Type', 'application/json')
+        req.add_header('X-Sync-Token', self.token)
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def push(self, batch):
+        """Push one batch; safe to repeat because the server dedupes on batch_id"""
+        return self.request('POST', '/api/sync/push', batch)
+
+    def pull(self, cursor, max_pages=10):
+        """Fetch server-side changes since a cursor; returns (records, new cursor)"""
+        if cursor is None:
+            # First sync only needs today's working set; history lives on the server
+            start_of_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            cursor = local_to_utc(start_of_day).isoformat() + '|'
+
+        records = []
+        for _ in range(max_pages):
+            query = urllib.parse.urlencode({'since': cursor})
+            result = self.request('GET', f'/api/sync/pull?{query}')
+            records.extend(result['changes'])
+            cursor = result['cursor']
+            if not result['has_more']:
+                break
+        return records, cursor
+
+    def apply_pulled(self, cars_data, records, cursor):
+        """Merge pulled records into the local store; queued local edits win"""
+        merged = 0
+        for record in records:
+            car_id = record['id']
+            if car_id in self.queue.pending:
+                continue
+            if self.queue.in_flight and any(c['id'] == car_id for c in self.queue.in_flight['changes']):
+                continue
+            self.merge(cars_data.setdefault(car_id, {}), record)
+            merged += 1
+
+        self.queue.cursor = cursor
+        self.queue.save()
+        return merged
+
+    def apply_rejected(self, cars_data, errors):
+        """Reset local cars whose pushed changes the server rejected to the server's copy.
+
+        Cars edited again since, or no longer in the working set, are left
+        alone; returns the number of cars reset.
+        """
+        reset = 0
+        for error in errors:
+            record = error.get('car')
+            car_id = error.get('id')
+            if record is None or car_id not in cars_data or car_id in self.queue.pending:
+                continue
+            self.merge(cars_data[car_id], record)
+            reset += 1
+        return reset
+
+    def merge(self, car_data, record):
+        """Copy the synced fields of a server record into a local car"""
+        for field in SYNC_FIELDS:
+            value = record.get(field)
+            if field in DATETIME_FIELDS and value:
+                value = utc_to_local(datetime.fromisoformat(value))
+            car_data[field] = value
+
+    def exchange(self, batch, cursor):
+        """Network half of a sync round, safe to run off the UI thread.
+
+        Only talks to the server and returns (push result or None, pulled
+        records, new cursor); the caller acknowledges the batch and applies
+        the results on its own thread afterwards.
+        """
+        pushed = self.push(batch) if batch else None
+        records, cursor = self.pull(cursor)
+        return pushed, records, cursor
+
+def is_offline_error(error):
+    """Return True for errors that just mean the server is unreachable right now"""
+    from urllib.error import HTTPError
+
+    # The server answered (bad token, server error): that's a failure, not being offline
+    if isinstance(error, HTTPError):
+        return False
+    # URLError, timeouts and connection resets are all OSErrors
+    return isinstance(error, OSError)
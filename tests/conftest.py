@@ -0,0 +1,45 @@
+"""
+Shared fixtures: a web app on a scratch SQLite database with sync enabled.
+"""
+
+import pytest
+
+import app as web
+from app import create_app
+from models import db
+from schema import upgrade_schema
+
+SYNC_TOKEN = 'test-sync-token'
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(web, 'SYNC_TOKEN', SYNC_TOKEN)
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'carwash.sqlite'}",
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'SESSION_REAPER_INTERVAL': 0,
+        'ACTIVITY_FLUSH_SECONDS': 0,
+    })
+    with app.app_context():
+        upgrade_schema()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def sync_headers():
+    return {'X-Sync-Token': SYNC_TOKEN}
+
+@pytest.fixture
+def login(app):
+    """Factory of test clients signed in as an employee"""
+    def login(name='Ana', role='washer'):
+        client = app.test_client()
+        client.post('/login', data={'name': name, 'role': role})
+        return client
+    return login
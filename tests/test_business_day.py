@@ -0,0 +1,107 @@
+"""
+Business-day rollover and the guarded status changes and payments of the web app.
+"""
+
+from datetime import datetime, timedelta
+
+import app as web
+from models import db, BusinessDay, Car, Customer
+
+def add_car(client, plate='ABC 123'):
+    client.post('/add_car', data={'car_name': 'Civic', 'plate_number': plate})
+    with client.application.app_context():
+        return db.session.query(Car.id).filter_by(plate_number=plate).scalar()
+
+def flashes(client):
+    """Messages flashed so far (not yet shown on a page)"""
+    with client.session_transaction() as session:
+        return [message for _, message in session.get('_flashes', [])]
+
+def dashboard_counts(client):
+    data = client.get('/api/dashboard_data').get_json()
+    return data['washing_count'], data['awaiting_payment_count'], data['finished_count']
+
+def current_cars(client):
+    return [car['id'] for car in client.get('/api/cars?business_day=current&fields=id').get_json()['cars']]
+
+def test_reset_moves_the_days_cars_to_history(app, login):
+    washer = login()
+    car_id = add_car(washer)
+    assert dashboard_counts(washer) == (1, 0, 0)
+    assert current_cars(washer) == [car_id]
+
+    washer.post('/reset_daily_data')
+
+    assert dashboard_counts(washer) == (0, 0, 0)
+    assert current_cars(washer) == []
+    assert 'ABC 123' not in washer.get('/dashboard').get_data(as_text=True)
+    # Still in the history
+    assert [car['id'] for car in washer.get('/api/cars').get_json()['cars']] == [car_id]
+
+    # New cars belong to the new day
+    new_id = add_car(washer, plate='XYZ 789')
+    assert current_cars(washer) == [new_id]
+
+def test_cars_of_past_days_cant_be_updated_or_paid(app, login):
+    washer, cashier = login(), login('Ben', 'cashier')
+    car_id = add_car(washer)
+    washing_id = add_car(washer, plate='XYZ 789')
+    washer.post(f'/update_status/{car_id}', data={'status': 'awaiting_payment'})
+    washer.post('/reset_daily_data')
+
+    washer.post(f'/update_status/{washing_id}', data={'status': 'awaiting_payment'})
+    assert flashes(washer)[-1] == 'Car not found.'
+    cashier.post(f'/payment/{car_id}', data={'payment_amount': '250'})
+    assert flashes(cashier)[-1] == 'Car not found.'
+
+    with app.app_context():
+        assert db.session.get(Car, washing_id).status == 'washing'
+        car = db.session.get(Car, car_id)
+        assert (car.status, car.payment_amount) == ('awaiting_payment', None)
+
+def test_second_payment_hits_the_paid_guard(app, login, monkeypatch):
+    washer, cashier = login(), login('Ben', 'cashier')
+    car_id = add_car(washer)
+    washer.post(f'/update_status/{car_id}', data={'status': 'awaiting_payment'})
+    with app.app_context():
+        stale = web.cars.get_live(car_id)
+
+    cashier.post(f'/payment/{car_id}', data={'payment_amount': '250'})
+    # A second cashier loaded the car before the first payment committed
+    monkeypatch.setattr(web.cars, 'get_live', lambda _: dict(stale))
+    cashier.post(f'/payment/{car_id}', data={'payment_amount': '300'})
+
+    assert flashes(cashier)[-1] == 'Car "Civic" has already been paid for.'
+    with app.app_context():
+        assert db.session.get(Car, car_id).payment_amount == 250
+        assert db.session.query(Customer.typical_price).scalar() == 250
+
+def push(client, headers, batch_id, car_id, timestamp):
+    fields = {'car_name': 'Civic', 'plate_number': f'P {car_id}', 'timestamp': timestamp.isoformat()}
+    return client.post('/api/sync/push', json={'batch_id': batch_id, 'changes': [{'id': car_id, 'fields': fields}]},
+                       headers=headers).get_json()
+
+def test_synced_cars_are_filed_under_the_day_they_arrived_in(app, login, sync_headers):
+    washer = login()
+    first_day = datetime.utcnow() - timedelta(hours=1)
+    with app.app_context():
+        # init-db opened the first day just now; open it an hour ago
+        db.session.query(BusinessDay).update({'opened_at': first_day, 'cars_since': first_day})
+        db.session.commit()
+
+    # Recorded offline before any business day was opened: joins the current day
+    push(washer, sync_headers, 'batch-1', 'early', first_day - timedelta(days=3))
+    assert current_cars(washer) == ['early']
+
+    washer.post('/reset_daily_data')
+    # Arrived before the reset but pushed after it: yesterday's history
+    push(washer, sync_headers, 'batch-2', 'before-reset', datetime.utcnow() - timedelta(seconds=1))
+    # Arrived after the reset: today's dashboard
+    push(washer, sync_headers, 'batch-3', 'after-reset', datetime.utcnow() + timedelta(seconds=1))
+
+    assert current_cars(washer) == ['after-reset']
+    with app.app_context():
+        days = dict(db.session.query(Car.id, Car.business_day))
+        current = db.session.query(db.func.max(BusinessDay.id)).scalar()
+    assert days['after-reset'] == current
+    assert days['early'] == days['before-reset'] == current - 1
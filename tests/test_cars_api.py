@@ -0,0 +1,56 @@
+"""
+/api/cars: keyset pagination.
+"""
+
+from datetime import datetime, timedelta
+
+from models import db, Car
+
+def add_cars(app, timestamps):
+    """Cars with the given arrival times; returns their ids"""
+    with app.app_context():
+        cars = [Car(car_name='Civic', plate_number=f'P{i}', timestamp=timestamp)
+                for i, timestamp in enumerate(timestamps)]
+        db.session.add_all(cars)
+        db.session.commit()
+        return [car.id for car in cars]
+
+def test_pages_cover_every_car_once(app, login):
+    client = login()
+    start = datetime(2026, 3, 1, 9, 0)
+    # Runs of identical timestamps straddle the page boundaries
+    timestamps = [start + timedelta(minutes=i // 3) for i in range(11)]
+    ids = add_cars(app, timestamps)
+
+    seen = []
+    cursor = None
+    for _ in range(10):
+        query = {'limit': 2, 'fields': 'id,timestamp'}
+        if cursor:
+            query['cursor'] = cursor
+        page = client.get('/api/cars', query_string=query).get_json()
+        assert len(page['cars']) <= 2
+        seen.extend(car['id'] for car in page['cars'])
+        cursor = page['next_cursor']
+        if not page['has_more']:
+            break
+
+    assert cursor is None
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+    # Newest first, ties broken by id
+    with app.app_context():
+        order = [car.id for car in Car.query.order_by(Car.timestamp.desc(), Car.id.desc())]
+    assert seen == order
+
+def test_malformed_cursor_is_a_bad_request(app, login):
+    client = login()
+    add_cars(app, [datetime(2026, 3, 1, 9, 0)])
+
+    for cursor in ('yesterday|abc', '|abc', 'garbage'):
+        response = client.get('/api/cars', query_string={'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Invalid cursor'}
+
+def test_cars_api_needs_a_session(client):
+    assert client.get('/api/cars').status_code == 401
@@ -0,0 +1,24 @@
+"""
+Repeat-customer profiles (customers.py).
+"""
+
+from datetime import datetime, timedelta
+
+from customers import rebuild_customers
+from models import db, Car, Customer
+
+def test_rebuild_takes_name_and_plate_spelling_from_the_latest_visit(app):
+    start = datetime(2026, 3, 1, 9, 0)
+    with app.app_context():
+        db.session.add_all([
+            Car(car_name='Vios', plate_number='ZZ-123', timestamp=start, payment_amount=200),
+            Car(car_name='Civic', plate_number='ab 123', timestamp=start + timedelta(days=2), payment_amount=300),
+            Car(car_name='Altis', plate_number='AB123', timestamp=start + timedelta(days=1)),
+        ])
+        db.session.commit()
+
+        assert rebuild_customers(db.session) == 2
+        customer = db.session.get(Customer, 'AB123')
+        assert (customer.car_name, customer.plate_number, customer.visits) == ('Civic', 'ab 123', 2)
+        assert customer.typical_price == 300
+        assert customer.last_visit == start + timedelta(days=2)
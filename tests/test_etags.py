@@ -0,0 +1,49 @@
+"""
+Change-version ETags: 304 while nothing changed, a new ETag after every car change.
+"""
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+def test_matching_etag_is_not_modified(login):
+    client = login()
+    client.get('/dashboard')  # shows the welcome message; pages with messages aren't cached
+    for url in ('/api/dashboard_data', '/api/cars', '/dashboard'):
+        first = client.get(url)
+        assert first.status_code == 200
+        response = revalidate(client, url, first.headers['ETag'])
+        assert response.status_code == 304
+        assert response.get_data() == b''
+
+def test_every_car_change_moves_the_etag(app, login):
+    washer, cashier = login(), login('Ben', 'cashier')
+    urls = ('/api/dashboard_data', '/api/cars')
+    etags = {url: washer.get(url).headers['ETag'] for url in urls}
+
+    def assert_changed():
+        for url in urls:
+            response = revalidate(washer, url, etags[url])
+            assert response.status_code == 200, url
+            assert response.headers['ETag'] != etags[url]
+            etags[url] = response.headers['ETag']
+
+    washer.post('/add_car', data={'car_name': 'Civic', 'plate_number': 'ABC 123'})
+    assert_changed()
+    car_id = washer.get('/api/cars?fields=id').get_json()['cars'][0]['id']
+
+    washer.post(f'/update_status/{car_id}', data={'status': 'awaiting_payment'})
+    assert_changed()
+
+    cashier.post(f'/payment/{car_id}', data={'payment_amount': '250'})
+    assert_changed()
+
+    washer.post('/reset_daily_data')
+    assert_changed()
+
+def test_failed_action_keeps_the_etag(login):
+    washer = login()
+    etag = washer.get('/api/dashboard_data').headers['ETag']
+
+    washer.post('/add_car', data={'car_name': '', 'plate_number': ''})
+
+    assert revalidate(washer, '/api/dashboard_data', etag).status_code == 304
@@ -0,0 +1,34 @@
+"""
+Car search by plate prefix, similar plate and car name (/api/search).
+"""
+
+from datetime import datetime, timedelta
+
+from models import db, Car
+
+def add_cars(app, *plates):
+    start = datetime(2026, 3, 1, 9, 0)
+    with app.app_context():
+        db.session.add_all(Car(car_name='Civic', plate_number=plate, timestamp=start + timedelta(minutes=i))
+                           for i, plate in enumerate(plates))
+        db.session.commit()
+
+def search(client, q, limit=20):
+    results = client.get('/api/search', query_string={'q': q, 'limit': limit}).get_json()['results']
+    return [(car['plate_number'], car['match']) for car in results]
+
+def test_prefix_matches_come_in_plate_order_newest_first(app, login):
+    client = login()
+    add_cars(app, 'AB 2', 'AB 1', 'ABC 1', 'AB 1', 'XAB 1')
+
+    assert search(client, 'ab', limit=4) == [
+        ('AB 1', 'plate'), ('AB 1', 'plate'), ('AB 2', 'plate'), ('ABC 1', 'plate'),
+    ]
+
+def test_misread_plates_are_found(app, login):
+    client = login()
+    add_cars(app, 'ABC 123', 'ABD 128', 'XYZ 789', 'QRS 456')
+
+    # First letter misread: no prefix match, found by trigrams
+    assert search(client, '8BC 123') == [('ABC 123', 'similar_plate')]
+    assert search(client, 'ABC 128') == [('ABC 123', 'similar_plate'), ('ABD 128', 'similar_plate')]
@@ -0,0 +1,39 @@
+"""
+Session reaping (staff.py) with and without activity tracking.
+"""
+
+from datetime import datetime, timedelta
+
+from models import db, Employee
+from staff import reap_sessions
+
+def signed_in_for(app, hours):
+    """Sign an employee in hours ago, with no activity recorded since"""
+    with app.app_context():
+        db.session.add(Employee(session_id=f'session-{hours}', name='Ana', role='washer',
+                                last_activity=datetime.utcnow() - timedelta(hours=hours)))
+        db.session.commit()
+
+def remaining(app):
+    with app.app_context():
+        return sorted(session_id for (session_id,) in db.session.query(Employee.session_id))
+
+def test_idle_sessions_are_reaped(app):
+    app.config['ACTIVITY_FLUSH_SECONDS'] = 30
+    signed_in_for(app, 1)
+    signed_in_for(app, 3)
+
+    with app.app_context():
+        reap_sessions(app)
+
+    assert remaining(app) == ['session-1']
+
+def test_without_activity_tracking_sessions_last_a_shift(app):
+    # The test app runs with ACTIVITY_FLUSH_SECONDS=0: last_activity is the login time
+    signed_in_for(app, 3)
+    signed_in_for(app, 13)
+
+    with app.app_context():
+        reap_sessions(app)
+
+    assert remaining(app) == ['session-3']
@@ -0,0 +1,149 @@
+"""
+Server side of the sync protocol: /api/sync/push and /api/sync/pull.
+"""
+
+from datetime import datetime, timedelta
+
+import app as web
+from models import db, Car
+
+def push(client, headers, batch_id, changes):
+    response = client.post('/api/sync/push', json={'batch_id': batch_id, 'changes': changes}, headers=headers)
+    return response.status_code, response.get_json()
+
+def new_car(car_id, **fields):
+    values = {'car_name': 'Civic', 'plate_number': f'P {car_id}', 'timestamp': datetime.utcnow().isoformat()}
+    values.update(fields)
+    return {'id': car_id, 'fields': values}
+
+def pull(client, headers, since=None):
+    query = {'since': since} if since is not None else {}
+    return client.get('/api/sync/pull', query_string=query, headers=headers).get_json()
+
+def test_sync_needs_the_token(client):
+    assert client.post('/api/sync/push', json={'batch_id': 'b', 'changes': []}).status_code == 401
+    assert client.get('/api/sync/pull', headers={'X-Sync-Token': 'wrong'}).status_code == 401
+
+def test_push_creates_cars(app, client, sync_headers):
+    status, result = push(client, sync_headers, 'batch-1', [new_car('car-1'), new_car('car-2')])
+
+    assert status == 200
+    assert result == {'batch_id': 'batch-1', 'applied': 2, 'duplicate': False, 'errors': []}
+    with app.app_context():
+        car = db.session.get(Car, 'car-1')
+        assert car.status == 'washing'
+        assert car.plate_normalized == 'PCAR1'
+        assert car.business_day is not None
+
+def test_repeated_batch_is_not_applied_twice(app, client, sync_headers):
+    push(client, sync_headers, 'batch-1', [new_car('car-1')])
+
+    # A retry of the same batch (e.g. the response was lost) is only acknowledged
+    status, result = push(client, sync_headers, 'batch-1', [new_car('car-1', car_name='Changed')])
+
+    assert status == 200
+    assert result['duplicate'] is True
+    assert result['applied'] == 1
+    with app.app_context():
+        assert db.session.get(Car, 'car-1').car_name == 'Civic'
+
+def test_invalid_changes_are_reported_and_the_rest_applied(app, client, sync_headers):
+    status, result = push(client, sync_headers, 'batch-1', [
+        'not a change',
+        new_car('car-1'),
+        new_car('car-2', payment_amount='lots'),
+        new_car('car-3', status='teleported'),
+        new_car('car-4', timestamp='yesterday'),
+        {'id': 'car-5', 'fields': {'car_name': 'No plate'}},
+    ])
+
+    assert status == 200
+    assert result['applied'] == 1
+    assert [(error['index'], error['id']) for error in result['errors']] == [
+        (0, None), (2, 'car-2'), (3, 'car-3'), (4, 'car-4'), (5, 'car-5'),
+    ]
+    with app.app_context():
+        assert db.session.query(Car.id).all() == [('car-1',)]
+
+def test_non_finite_payments_are_rejected(app, client, sync_headers):
+    _, result = push(client, sync_headers, 'batch-1', [
+        {'id': 'car-1', 'fields': {**new_car('car-1')['fields'], 'payment_amount': 1e400}},
+        new_car('car-2', payment_amount='inf'),
+        new_car('car-3', payment_amount='nan'),
+    ])
+
+    assert result['applied'] == 0
+    assert [error['id'] for error in result['errors']] == ['car-1', 'car-2', 'car-3']
+
+def test_aware_timestamps_are_stored_in_utc(app, client, sync_headers):
+    push(client, sync_headers, 'batch-1', [new_car('car-1', timestamp='2025-01-01T10:00:00+08:00')])
+
+    with app.app_context():
+        assert db.session.get(Car, 'car-1').timestamp == datetime(2025, 1, 1, 2, 0)
+
+def test_malformed_payloads_are_rejected(client, sync_headers):
+    assert client.post('/api/sync/push', json=[1], headers=sync_headers).status_code == 400
+    assert client.post('/api/sync/push', json={'batch_id': ['b'], 'changes': []},
+                       headers=sync_headers).status_code == 400
+    assert client.post('/api/sync/push', json={'batch_id': 'b', 'changes': 'all'},
+                       headers=sync_headers).status_code == 400
+
+def test_finished_cars_keep_their_status(app, client, sync_headers):
+    push(client, sync_headers, 'batch-1', [new_car('car-1', status='finished', payment_amount=250)])
+
+    status, result = push(client, sync_headers, 'batch-2', [{'id': 'car-1', 'fields': {'status': 'washing'}}])
+
+    assert result['applied'] == 0
+    assert result['errors'][0]['id'] == 'car-1'
+    assert result['errors'][0]['car']['status'] == 'finished'
+    with app.app_context():
+        assert db.session.get(Car, 'car-1').status == 'finished'
+
+def test_retried_batch_repeats_its_rejections(client, sync_headers):
+    push(client, sync_headers, 'batch-1', [new_car('car-1', status='finished', payment_amount=250)])
+    changes = [{'id': 'car-1', 'fields': {'status': 'washing'}}, new_car('car-2', payment_amount='lots')]
+    _, first = push(client, sync_headers, 'batch-2', changes)
+
+    # The first response was lost; the retry still tells the client what to undo
+    _, retry = push(client, sync_headers, 'batch-2', changes)
+
+    assert retry['duplicate'] is True
+    assert retry['errors'] == first['errors']
+    assert [(error['id'], error['car'] and error['car']['status']) for error in retry['errors']] == [
+        ('car-1', 'finished'), ('car-2', None),
+    ]
+
+def test_pull_pages_through_changes(app, client, sync_headers, monkeypatch):
+    monkeypatch.setattr(web, 'SYNC_PULL_LIMIT', 2)
+    old = datetime.utcnow() - timedelta(hours=1)
+    with app.app_context():
+        for i in range(5):
+            db.session.add(Car(id=f'car-{i}', car_name='Civic', plate_number=f'P{i}',
+                               updated_at=old + timedelta(seconds=i)))
+        db.session.commit()
+
+    seen = []
+    cursor = None
+    for _ in range(5):
+        page = pull(client, sync_headers, cursor)
+        seen.extend(car['id'] for car in page['changes'])
+        cursor = page['cursor']
+        if not page['has_more']:
+            break
+
+    assert seen == [f'car-{i}' for i in range(5)]
+    assert pull(client, sync_headers, cursor)['changes'] == []
+
+def test_pull_rereads_changes_that_commit_late(app, client, sync_headers):
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add(Car(id='early', car_name='Civic', plate_number='P1', updated_at=now))
+        db.session.commit()
+    cursor = pull(client, sync_headers)['cursor']
+
+    # Stamped before the car the client has seen, committed after its pull
+    with app.app_context():
+        db.session.add(Car(id='late', car_name='Civic', plate_number='P2', updated_at=now - timedelta(seconds=5)))
+        db.session.commit()
+
+    assert 'late' in [car['id'] for car in pull(client, sync_headers, cursor)['changes']]
@@ -0,0 +1,105 @@
+"""
+Desktop side of the sync protocol: the persistent outbox in sync_client.
+"""
+
+import socket
+from datetime import datetime
+from urllib.error import HTTPError, URLError
+
+from carwash_core import LocalCarRepository
+from sync_client import SyncClient, SyncQueue, is_offline_error, local_to_utc
+
+def make_car(**fields):
+    car = {'car_name': 'Civic', 'plate_number': 'ABC 123', 'status': 'washing',
+           'timestamp': datetime(2026, 3, 1, 9, 0), 'completion_time': None}
+    car.update(fields)
+    return car
+
+def test_record_coalesces_changes_and_survives_restart(tmp_path):
+    path = str(tmp_path / 'queue.json')
+    queue = SyncQueue(path)
+    queue.record('car-1', ['status'])
+    queue.record('car-1', ['status', 'payment_amount'])
+
+    assert SyncQueue(path).pending == {'car-1': ['status', 'payment_amount']}
+
+def test_next_batch_sends_current_values_in_utc(tmp_path):
+    queue = SyncQueue(str(tmp_path / 'queue.json'))
+    cars_data = {'car-1': make_car()}
+    queue.record('car-1', ['car_name', 'timestamp'])
+
+    batch = queue.next_batch(cars_data)
+
+    assert batch['changes'] == [{'id': 'car-1', 'fields': {
+        'car_name': 'Civic',
+        'timestamp': local_to_utc(datetime(2026, 3, 1, 9, 0)).isoformat(),
+    }}]
+    assert queue.pending == {}
+
+def test_unacknowledged_batch_is_retried_with_the_same_id(tmp_path):
+    path = str(tmp_path / 'queue.json')
+    queue = SyncQueue(path)
+    cars_data = {'car-1': make_car(), 'car-2': make_car()}
+    queue.record('car-1', ['status'])
+    first = queue.next_batch(cars_data)
+
+    # Later changes wait until the in-flight batch is acknowledged, even across restarts
+    queue.record('car-2', ['status'])
+    restarted = SyncQueue(path)
+    assert restarted.next_batch(cars_data) == first
+
+    restarted.acknowledge()
+    second = restarted.next_batch(cars_data)
+    assert second['batch_id'] != first['batch_id']
+    assert [change['id'] for change in second['changes']] == ['car-2']
+
+def test_changes_of_archived_cars_are_still_sent(tmp_path):
+    path = str(tmp_path / 'queue.json')
+    queue = SyncQueue(path)
+    cars_data = {'car-1': make_car(status='finished', completion_time=datetime(2026, 3, 1, 10, 0))}
+    store = LocalCarRepository(cars_data)
+    queue.record('car-1', ['status', 'completion_time'])
+
+    # What archive_cars does: hand the cars to the queue, then drop them from the working set
+    queue.detach({'car-1': cars_data['car-1']})
+    store.remove(['car-1'])
+
+    batch = SyncQueue(path).next_batch(cars_data)
+    assert batch['changes'] == [{'id': 'car-1', 'fields': {
+        'status': 'finished',
+        'completion_time': local_to_utc(datetime(2026, 3, 1, 10, 0)).isoformat(),
+    }}]
+
+def test_changes_of_unknown_cars_are_dropped(tmp_path):
+    queue = SyncQueue(str(tmp_path / 'queue.json'))
+    queue.record('gone', ['status'])
+
+    assert queue.next_batch({}) is None
+    assert queue.pending == {}
+
+def test_rejected_changes_reset_to_the_server_copy(tmp_path):
+    client = SyncClient('http://server', 'token', SyncQueue(str(tmp_path / 'queue.json')))
+    cars_data = {'car-1': make_car(status='washing'), 'car-2': make_car(status='washing')}
+    client.queue.record('car-2', ['car_name'])
+    server_copy = {'id': 'car-1', 'car_name': 'Civic', 'plate_number': 'ABC 123', 'status': 'finished',
+                   'timestamp': local_to_utc(datetime(2026, 3, 1, 9, 0)).isoformat(),
+                   'completion_time': None, 'payment_amount': 250.0}
+
+    reset = client.apply_rejected(cars_data, [
+        {'index': 0, 'id': 'car-1', 'error': "Finished cars can't change status.", 'car': server_copy},
+        # Edited again since the batch was sent: the new edit is pushed as usual
+        {'index': 1, 'id': 'car-2', 'error': 'Conflict', 'car': dict(server_copy, id='car-2')},
+        {'index': 2, 'id': 'car-3', 'error': 'Invalid payment_amount.', 'car': None},
+    ])
+
+    assert reset == 1
+    assert cars_data['car-1']['status'] == 'finished'
+    assert cars_data['car-1']['payment_amount'] == 250.0
+    assert cars_data['car-1']['timestamp'] == datetime(2026, 3, 1, 9, 0)
+    assert cars_data['car-2']['status'] == 'washing'
+
+def test_server_errors_are_not_offline():
+    assert is_offline_error(URLError('connection refused'))
+    assert is_offline_error(socket.timeout())
+    assert not is_offline_error(HTTPError('http://server/api/sync/push', 401, 'UNAUTHORIZED', {}, None))
+    assert not is_offline_error(HTTPError('http://server/api/sync/push', 500, 'INTERNAL SERVER ERROR', {}, None))
@@ -0,0 +1,42 @@
+"""
+Request-level unit of work for the web app.
+Routes stage their changes in the request's database session and the
+request commits once, after the route returns a successful response (see
+app.commit_request). Side effects that must only happen once the changes
+are durable (saving uploaded photos, invalidating caches, bumping change
+versions) are registered with after_commit and run right after the commit;
+a rollback drops them.
+"""
+
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
+
+logger = logging.getLogger(__name__)
+
+CALLBACKS_KEY = 'after_commit'
+
+def after_commit(session, callback):
+    """Run callback() after the session's current transaction commits"""
+    if isinstance(session, scoped_session):
+        session = session()
+    # Start the transaction now, so a rollback before any query still drops the callback
+    if not session.in_transaction():
+        session.begin()
+    session.info.setdefault(CALLBACKS_KEY, []).append(callback)
+
+@event.listens_for(Session, 'after_commit')
+def run_after_commit(session):
+    for callback in session.info.pop(CALLBACKS_KEY, []):
+        try:
+            callback()
+        except Exception:
+            # The changes are committed either way; one failed side effect must not hide that
+            logger.exception("After-commit callback %r failed", callback)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def drop_after_commit(session, previous_transaction):
+    # Only the outermost transaction; a savepoint rollback leaves the rest to commit
+    if previous_transaction.parent is None:
+        session.info.pop(CALLBACKS_KEY, None)
@@ -0,0 +1,84 @@
+"""
+Live wait-time estimates for cars on the dashboard.
+Each finished stage (washing, waiting for payment) updates a rolling,
+exponentially weighted average duration in the stage_stats table with one
+atomic UPDATE, so estimates never need to scan history.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, update
+
+from carwash_core import STATUS_WASHING, STATUS_AWAITING_PAYMENT
+from models import StageStat
+
+# Weight of the newest sample in the rolling average
+ALPHA = 0.2
+
+# Used until a stage has its first sample
+DEFAULT_SECONDS = {
+    STATUS_WASHING: 30 * 60,
+    STATUS_AWAITING_PAYMENT: 5 * 60,
+}
+STAGES = tuple(DEFAULT_SECONDS)
+
+# Longer durations are cars left overnight or forgotten, not real waits
+MAX_SAMPLE_SECONDS = 4 * 60 * 60
+
+# Estimates are computed against a clock that advances in steps, so they
+# (and the ETags of pages showing them) only change this often between car changes
+ESTIMATE_STEP_SECONDS = 5 * 60
+
+def record_stage(session, stage, started, ended):
+    """Fold one stage duration into its rolling average; the caller commits"""
+    if started is None or ended is None:
+        return
+    seconds = (ended - started).total_seconds()
+    if not 0 < seconds <= MAX_SAMPLE_SECONDS:
+        return
+
+    result = session.execute(
+        update(StageStat)
+        .where(StageStat.stage == stage)
+        .values(
+            average_seconds=case(
+                (StageStat.samples == 0, seconds),
+                else_=StageStat.average_seconds + ALPHA * (seconds - StageStat.average_seconds),
+            ),
+            samples=StageStat.samples + 1,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    if result.rowcount == 0:
+        # Rows are normally created by `flask init-db`
+        session.add(StageStat(stage=stage, average_seconds=seconds, samples=1))
+
+def stage_averages(session):
+    """Return {stage: average seconds}, falling back to DEFAULT_SECONDS"""
+    averages = dict(DEFAULT_SECONDS)
+    for stat in session.query(StageStat).filter(StageStat.samples > 0):
+        averages[stat.stage] = stat.average_seconds
+    return averages
+
+def estimate_clock(now):
+    """now rounded down to the start of its ESTIMATE_STEP_SECONDS step"""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = int((now - midnight).total_seconds())
+    return midnight + timedelta(seconds=elapsed - elapsed % ESTIMATE_STEP_SECONDS)
+
+def estimate_completion(car, averages, now):
+    """Expected time a car will be washed and paid for"""
+    payment_wait = timedelta(seconds=averages[STATUS_AWAITING_PAYMENT])
+    if car['status'] == STATUS_WASHING:
+        ready = max(car['timestamp'] + timedelta(seconds=averages[STATUS_WASHING]), now)
+        return ready + payment_wait
+    if car['status'] == STATUS_AWAITING_PAYMENT:
+        ready = car.get('ready_time') or car['timestamp']
+        return max(ready + payment_wait, now)
+    return car.get('completion_time')
+
+def add_estimates(car_list, averages, now):
+    """Set 'estimated_completion' on each car record in place"""
+    for car in car_list:
+        car['estimated_completion'] = estimate_completion(car, averages, now)
+    return car_list